@@ -0,0 +1,352 @@
+"""Analyze an archive of articles offline and write the results incrementally.
+
+    python -m app.ingest archive/2024-*.jsonl --output results.jsonl
+    python -m app.ingest archive/ --output results/ --format parquet --workers 4 --resume
+    python -m app.ingest --query "climate" --max-articles 500 --output climate.jsonl
+
+Inputs are JSONL, JSON or CSV files, or directories of them, with at least a
+text field (title, url, source and publish_date are optional), or the
+News API results for a query, fetched page by page as they are needed. Articles
+stream through summarization, sentiment and entity extraction in chunks,
+so memory stays bounded whatever the archive size (a .json file, a list of
+records or a News API response, is read whole). A checkpoint written
+after each flush lets --resume continue an interrupted run.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlparse
+from app.models.summarizer import TextSummarizer
+from app.models.sentiment import SentimentAnalyzer
+from app.models.analyzer import NewsAnalyzer
+from app.models.registry import registry, configure_threads
+from app.pipeline import AnalysisPipeline, SUMMARY_TIERS
+from app.utils.cache import make_key
+from app.utils.fetcher import NewsFetcher
+from app.utils.store import ArticleStore
+from app.utils.visualizer import DataVisualizer
+from app.utils.workers import WorkerPool
+from config import Config
+
+INPUT_EXTENSIONS = ('.jsonl', '.json', '.csv')
+
+# Stages run in the worker processes; everything else is cheap enough for the driver
+INGEST_STAGES = ['summarize', 'summarize_greedy', 'sentiment', 'analyze_documents']
+
+
+def iter_input_files(paths):
+    """Input files in a stable order, expanding directories"""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith(INPUT_EXTENSIONS):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def iter_records(paths):
+    """Raw article dicts from every input file, one at a time"""
+    csv.field_size_limit(sys.maxsize)
+    for path in iter_input_files(paths):
+        with open(path, encoding='utf-8', newline='') as f:
+            if path.endswith('.csv'):
+                yield from csv.DictReader(f)
+                continue
+            if path.endswith('.json'):
+                yield from json_records(json.load(f))
+                continue
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def json_records(data):
+    """Records in a JSON document: a list of them, a News API response, or a single record"""
+    if isinstance(data, dict):
+        data = data['articles'] if isinstance(data.get('articles'), list) else [data]
+    return data
+
+
+def normalize_record(record):
+    """Fill the fields NewsFetcher records have, or return None when there is no text"""
+    if not record:
+        return None
+    text = (record.get('text') or record.get('content') or '').strip()
+    if not text:
+        return None
+    
+    publish_date = record.get('publish_date') or record.get('publishedAt')
+    if isinstance(publish_date, str):
+        try:
+            publish_date = datetime.fromisoformat(publish_date.replace('Z', '+00:00'))
+        except ValueError:
+            publish_date = None
+    
+    # Missing URLs are None, not '', so the article store does not treat them as one URL
+    url = record.get('url') or None
+    return {
+        'title': record.get('title') or '',
+        'text': text,
+        'url': url,
+        'source': record.get('source') or urlparse(url or '').netloc or 'unknown',
+        'publish_date': publish_date or None,
+        'top_image': record.get('top_image') or ''
+    }
+
+
+def iter_chunks(records, chunk_size, skip=0):
+    """Lists of normalized articles, after skipping the first `skip` raw records"""
+    chunk = []
+    for position, record in enumerate(records):
+        if position < skip:
+            continue
+        article = normalize_record(record)
+        # Unusable records still count towards the checkpoint position
+        chunk.append(article)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def analyze_chunk(pipeline, chunk, record, tier):
+    """Rows for one chunk, in input order; None entries are skipped records"""
+    articles = [article for article in chunk if article]
+    if not articles:
+        return [], len(chunk)
+    
+    articles = pipeline.deduplicate(articles)
+    results = pipeline.analyze_articles(articles, tier=tier)
+    documents = pipeline.run_stage('analyze_documents', articles)
+    if record:
+        pipeline._record(articles, documents, results)
+    
+    # Rows without a URL are identified by the hash of their text
+    content_hashes = [make_key(article['text']) for article in articles]
+    rows = []
+    for i, (article, result, document) in enumerate(zip(articles, results, documents)):
+        # Cluster ids index into this chunk, so point duplicates at their representative's URL
+        # (or content hash) instead
+        cluster_id = result['cluster_id']
+        representative = articles[cluster_id]['url'] or content_hashes[cluster_id]
+        rows.append({
+            'url': article['url'],
+            'content_hash': content_hashes[i],
+            'title': article['title'],
+            'source': article['source'],
+            'publish_date': result['publish_date'],
+            'duplicate_of': representative if cluster_id != i else None,
+            'summary': result['summary'],
+            'summary_tier': result['summary_tier'],
+            'sentiment_label': result['sentiment']['label'],
+            'sentiment_score': result['sentiment']['score'],
+            'sentiment_method': result['sentiment']['method'],
+            'entities': document['entities'],
+            'word_count': document['word_count']
+        })
+    return rows, len(chunk)
+
+
+class JsonlWriter:
+    """Appends rows to a JSONL file; the checkpoint records its flushed size"""
+    
+    def __init__(self, path, checkpoint=None):
+        self.path = path
+        mode = 'r+' if checkpoint and os.path.exists(path) else 'w'
+        self.file = open(path, mode, encoding='utf-8')
+        if checkpoint:
+            # Drop anything written after the last checkpoint
+            self.file.truncate(checkpoint.get('output_bytes', 0))
+            self.file.seek(checkpoint.get('output_bytes', 0))
+    
+    def write(self, rows):
+        for row in rows:
+            self.file.write(json.dumps(row, ensure_ascii=False) + '\n')
+    
+    def flush(self):
+        """Make written rows durable; returns the checkpoint fields"""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return {'output_bytes': self.file.tell()}
+    
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """Buffers rows and writes one Parquet part file per flush into a directory"""
+    
+    def __init__(self, path, checkpoint=None):
+        try:
+            import pyarrow  # noqa: F401 - pandas needs it for to_parquet
+        except ImportError:
+            raise RuntimeError("Parquet output needs pyarrow: pip install pyarrow")
+        
+        self.path = path
+        self.parts = checkpoint.get('parts', 0) if checkpoint else 0
+        self.rows = []
+        os.makedirs(path, exist_ok=True)
+        # Remove parts written after the last checkpoint
+        for name in os.listdir(path):
+            if name.startswith('part-') and int(name[5:10]) >= self.parts:
+                os.remove(os.path.join(path, name))
+    
+    def write(self, rows):
+        for row in rows:
+            row = dict(row, entities=json.dumps(row['entities'], ensure_ascii=False))
+            self.rows.append(row)
+    
+    def flush(self):
+        import pandas as pd
+        
+        if self.rows:
+            pd.DataFrame(self.rows).to_parquet(os.path.join(self.path, f'part-{self.parts:05d}.parquet'), index=False)
+            self.parts += 1
+            self.rows = []
+        return {'parts': self.parts}
+    
+    def close(self):
+        pass
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, checkpoint):
+    """Replace the checkpoint atomically, so a crash leaves the previous one intact"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def analyze_chunk_with_retries(pipeline, chunk, record, tier, retries):
+    """analyze_chunk, retried after a timeout or a worker crash before the run gives up"""
+    for attempt in range(retries + 1):
+        try:
+            return analyze_chunk(pipeline, chunk, record, tier)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            print(f"Error analyzing chunk (attempt {attempt + 1} of {retries + 1}), retrying: {e}")
+
+
+def build_pipeline(workers, store, task_timeout):
+    """The components create_app uses, with the model stages spread over worker processes"""
+    worker_pool = None
+    if workers > 1:
+        worker_pool = WorkerPool(num_workers=workers, stages=INGEST_STAGES, task_timeout=task_timeout)
+    if not worker_pool:
+        registry.warm_up(background=False)
+    
+    return AnalysisPipeline(
+        TextSummarizer(),
+        SentimentAnalyzer(),
+        NewsAnalyzer(),
+        None,
+        DataVisualizer(),
+        worker_pool=worker_pool,
+        article_store=ArticleStore() if store else None
+    )
+
+
+def main(argv=None):
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('inputs', nargs='*', help='JSONL/CSV files or directories')
+    parser.add_argument('--query', help='analyze News API results for a query instead of files')
+    parser.add_argument('--max-articles', type=int, default=100, help='article budget for --query')
+    parser.add_argument('--output', required=True, help='JSONL file, or a directory for --format parquet')
+    parser.add_argument('--format', choices=['jsonl', 'parquet'], default='jsonl')
+    parser.add_argument('--checkpoint', help='defaults to <output>.checkpoint.json')
+    parser.add_argument('--resume', action='store_true', help='continue from the checkpoint')
+    parser.add_argument('--chunk-size', type=int, default=32, help='articles per model call')
+    parser.add_argument('--workers', type=int, default=max(1, cpu_count // 4),
+                        help='model worker processes; torch threads are split so all cores are used')
+    parser.add_argument('--task-timeout', type=float,
+                        help='seconds per model call in a worker; defaults to WORKER_TASK_TIMEOUT per article in a chunk')
+    parser.add_argument('--retries', type=int, default=2, help='attempts to repeat a failed chunk before stopping')
+    parser.add_argument('--flush-every', type=int, default=1000, help='rows between checkpoints')
+    parser.add_argument('--store', action='store_true', help='also record articles in the trend store')
+    parser.add_argument('--tier', choices=list(SUMMARY_TIERS) + ['auto'], default='beam',
+                        help="summary tier; 'auto' degrades with load as the web server does")
+    args = parser.parse_args(argv)
+    if bool(args.inputs) == bool(args.query):
+        parser.error('give either input files or --query')
+    
+    # Every core is busy: workers times intra-op threads. Spawned workers read this from the environment.
+    threads = max(1, cpu_count // args.workers)
+    if Config.TORCH_INTRA_OP_THREADS <= 0:
+        os.environ['TORCH_INTRA_OP_THREADS'] = str(threads)
+        Config.TORCH_INTRA_OP_THREADS = threads
+    # Chunks are already batched, and each result is seen once
+    Config.MICROBATCH_ENABLED = False
+    configure_threads()
+    
+    checkpoint_path = args.checkpoint or args.output.rstrip('/') + '.checkpoint.json'
+    checkpoint = load_checkpoint(checkpoint_path) if args.resume else None
+    records_done = checkpoint['records_done'] if checkpoint else 0
+    writer_class = ParquetWriter if args.format == 'parquet' else JsonlWriter
+    writer = writer_class(args.output, checkpoint)
+    
+    # A whole chunk of beam searches is one worker task, so its timeout scales with the chunk
+    task_timeout = args.task_timeout or Config.WORKER_TASK_TIMEOUT * args.chunk_size
+    pipeline = build_pipeline(args.workers, args.store, task_timeout)
+    if args.query:
+        # Failed downloads yield None so the checkpoint position matches the listing position; a long run has no overall deadline
+        fetcher = NewsFetcher(api_key=Config.NEWS_API_KEY, compact=True)
+        records = fetcher.iter_news_api(args.query, args.max_articles, skip=records_done, include_failed=True, deadline=0)
+        chunks = iter_chunks(records, args.chunk_size)
+    else:
+        chunks = iter_chunks(iter_records(args.inputs), args.chunk_size, skip=records_done)
+    
+    # Each driver thread keeps one chunk in the worker pool; the window bounds memory and keeps output ordered
+    window = deque()
+    unflushed = 0
+    rows_written = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        def fill():
+            for chunk in chunks:
+                window.append(executor.submit(analyze_chunk_with_retries, pipeline, chunk, args.store, args.tier, args.retries))
+                if len(window) >= args.workers * 2:
+                    return
+        
+        fill()
+        while window:
+            rows, consumed = window.popleft().result()
+            fill()
+            writer.write(rows)
+            records_done += consumed
+            unflushed += len(rows)
+            rows_written += len(rows)
+            
+            if unflushed >= args.flush_every or not window:
+                checkpoint = {'records_done': records_done}
+                checkpoint.update(writer.flush())
+                save_checkpoint(checkpoint_path, checkpoint)
+                unflushed = 0
+                print(f"{records_done} records processed, {rows_written} rows written this run")
+    
+    writer.close()
+    if pipeline.worker_pool:
+        pipeline.worker_pool.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
@@ -1,98 +1,256 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context, url_for, g
 from app.models.summarizer import TextSummarizer
 from app.models.sentiment import SentimentAnalyzer
 from app.models.analyzer import NewsAnalyzer
+from app.models.registry import registry, configure_threads
+from app.pipeline import AnalysisPipeline, SUMMARY_TIERS
+from app.utils.batching import get_batcher_stats
+from app.utils.cache import get_cache_stats
 from app.utils.fetcher import NewsFetcher
+from app.utils.jobs import JobStore, JobStoreFullError
+from app.utils.metrics import metrics
+from app.utils.scheduler import WatchlistScheduler, SingleFlight
+from app.utils.store import ArticleStore
 from app.utils.visualizer import DataVisualizer
+from app.utils.workers import WorkerPool, PoolFullError, StageTimeoutError, model_names, claim_host_pool
 from config import Config
 import json
+import time
 
-def create_app():
+def create_app(background=True):
+    """Build the application; background=False skips the worker pool, model warm-up and watchlist refreshes"""
     app = Flask(__name__)
     app.config.from_object(Config)
     
-    # Initialize components
+    configure_threads()
+    
+    # Initialize components (models load through the registry, not here)
     summarizer = TextSummarizer()
     sentiment_analyzer = SentimentAnalyzer()
     news_analyzer = NewsAnalyzer()
     news_fetcher = NewsFetcher(api_key=app.config['NEWS_API_KEY'])
     visualizer = DataVisualizer()
     
+    # CPU-bound stages go to worker processes when a pool is configured
+    worker_pool = None
+    if background and Config.WORKER_PROCESSES > 0:
+        claim_host_pool()
+        worker_pool = WorkerPool()
+    article_store = ArticleStore() if Config.ARTICLE_STORE_ENABLED else None
+    
+    pipeline = AnalysisPipeline(
+        summarizer,
+        sentiment_analyzer,
+        news_analyzer,
+        news_fetcher,
+        visualizer,
+        worker_pool=worker_pool,
+        article_store=article_store
+    )
+    jobs = JobStore()
+    
+    # Watched queries are refreshed in the background; identical live analyses share one computation
+    scheduler = WatchlistScheduler(pipeline)
+    if background:
+        scheduler.start()
+    analyses = SingleFlight()
+    
+    # Models only used by delegated stages are loaded in the worker processes instead
+    warm_models = registry.names()
+    if worker_pool:
+        warm_models = [name for name in warm_models if name not in model_names(worker_pool.component_names)]
+    if background and Config.MODEL_WARMUP != 'lazy':
+        registry.warm_up(warm_models, background=Config.MODEL_WARMUP == 'background')
+    
+    def run_analysis_job(job, query, custom_url, compact, max_articles):
+        news_articles = pipeline.fetch(query, custom_url, max_articles)
+        if not news_articles:
+            raise ValueError('No news articles found')
+        
+        job.add_event({'type': 'fetched', 'total_articles': len(news_articles)})
+        for event in pipeline.iter_events(news_articles, compact=compact):
+            job.add_event(event)
+    
+    if Config.METRICS_ENABLED:
+        _register_collectors(worker_pool, jobs, scheduler)
+        
+        @app.before_request
+        def start_request_timing():
+            g.request_start = time.perf_counter()
+            metrics.start_request()
+        
+        @app.after_request
+        def record_request_timing(response):
+            elapsed = time.perf_counter() - g.request_start
+            timings = metrics.end_request()
+            metrics.observe('request_seconds', elapsed, endpoint=request.endpoint or 'unmatched', status=response.status_code)
+            if Config.METRICS_TIMING_HEADERS:
+                entries = [f'{stage};dur={1000 * seconds:.1f}' for stage, seconds in timings.items()]
+                entries.append(f'total;dur={1000 * elapsed:.1f}')
+                response.headers['Server-Timing'] = ', '.join(entries)
+            return response
+        
+        @app.route('/metrics', methods=['GET'])
+        def metrics_endpoint():
+            return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+    
     @app.route('/')
     def index():
         return render_template('index.html')
     
+    @app.route('/ready', methods=['GET'])
+    def ready():
+        models = registry.status()
+        # Ready once warm-up has settled; a failed model falls back rather than blocking
+        pending = [name for name in warm_models if models[name]['state'] in ('loading', 'not_loaded')]
+        is_ready = Config.MODEL_WARMUP == 'lazy' or not pending
+        body = {'models': models}
+        if worker_pool:
+            # Worker processes load their models up front whatever MODEL_WARMUP says
+            body['workers'] = {'warmed_up': worker_pool.stats()['warmed_workers'], 'total': worker_pool.num_workers}
+            is_ready = is_ready and worker_pool.warmed_up()
+        return jsonify(dict(body, ready=is_ready)), 200 if is_ready else 503
+    
     @app.route('/analyze', methods=['POST'])
     def analyze_news():
         try:
             data = request.get_json()
             query = data.get('query', '')
             custom_url = data.get('url', '')
+            # "visualizations": "compact" returns chart data and an image URL instead of full figures
+            compact = data.get('visualizations', Config.VISUALIZATION_MODE) == 'compact'
             
-            news_articles = []
+            # Articles to analyze for a query; budgets past one page are fetched page by page
+            max_articles = data.get('max_articles', 10)
+            if not isinstance(max_articles, int) or max_articles < 1:
+                return jsonify({'error': 'max_articles must be a positive integer'}), 400
+            max_articles = min(max_articles, Config.FETCH_MAX_ARTICLES)
             
-            if custom_url:
-                # Analyze single article from URL
-                article = news_fetcher.fetch_from_url(custom_url)
-                if article:
-                    news_articles.append(article)
-            else:
-                # Fetch news based on query
-                news_articles = news_fetcher.fetch_from_news_api(query, page_size=10)
+            # Large budgets take minutes to page through, so they always run as a job
+            if data.get('async') or (not custom_url and max_articles > Config.FETCH_SYNC_MAX_ARTICLES):
+                job = jobs.submit(run_analysis_job, query, custom_url, compact, max_articles)
+                return jsonify({
+                    'job_id': job.id,
+                    'status_url': url_for('job_status', job_id=job.id),
+                    'stream_url': url_for('job_stream', job_id=job.id)
+                }), 202
             
-            if not news_articles:
-                return jsonify({'error': 'No news articles found'}), 404
-            
-            # Process each article
-            results = []
-            for article in news_articles:
-                # Summarize
-                summary = summarizer.summarize(article['text'])
-                
-                # Analyze sentiment
-                sentiment = sentiment_analyzer.analyze_sentiment_transformers(article['text'])
-                
-                results.append({
-                    'title': article['title'],
-                    'url': article['url'],
-                    'source': article['source'],
-                    'summary': summary,
-                    'sentiment': sentiment,
-                    'publish_date': article['publish_date'].isoformat() if article['publish_date'] else None,
-                    'image': article['top_image']
-                })
-            
-            # Overall analysis
-            overall_analysis = news_analyzer.analyze_news(news_articles)
-            sentiment_stats = sentiment_analyzer.get_sentiment_stats(
-                [result['sentiment'] for result in results]
-            )
+            # Watched queries are answered from the background scheduler's latest analysis
+            precomputed = None
+            if not custom_url and max_articles == 10 and compact == (Config.VISUALIZATION_MODE == 'compact'):
+                precomputed = scheduler.get(query)
+            if precomputed:
+                response, updated_at = precomputed
+                return jsonify(dict(response, watchlist={'updated_at': updated_at, 'age_seconds': round(time.time() - updated_at, 1)}))
             
-            # Generate visualizations
-            sentiment_chart = visualizer.create_sentiment_chart(sentiment_stats)
-            entity_chart = visualizer.create_entity_chart(overall_analysis['entity_frequencies'])
-            wordcloud = visualizer.create_wordcloud(overall_analysis['processed_text'])
+            def run_analysis():
+                news_articles = pipeline.fetch(query, custom_url, max_articles, max_deadline=Config.FETCH_SYNC_DEADLINE)
+                return pipeline.analyze(news_articles, compact) if news_articles else None
             
-            # Source comparison
-            source_analysis = news_analyzer.compare_sources(news_articles)
-            source_chart = visualizer.create_source_comparison_chart(source_analysis)
-            
-            return jsonify({
-                'articles': results,
-                'analysis': overall_analysis,
-                'visualizations': {
-                    'sentiment_chart': sentiment_chart.to_json(),
-                    'entity_chart': entity_chart.to_json(),
-                    'wordcloud': wordcloud,
-                    'source_chart': source_chart.to_json()
-                },
-                'sentiment_stats': sentiment_stats
-            })
+            response = analyses.do((query, custom_url, compact, max_articles), run_analysis)
+            if response is None:
+                return jsonify({'error': 'No news articles found'}), 404
             
+            return jsonify(response)
+        
+        except (PoolFullError, JobStoreFullError):
+            return jsonify({'error': 'Server is busy, try again shortly'}), 503, {'Retry-After': '5'}
+        except StageTimeoutError as e:
+            app.logger.error(f"Timeout in analysis: {e}")
+            return jsonify({'error': 'Analysis timed out'}), 504
         except Exception as e:
             app.logger.error(f"Error in analysis: {e}")
             return jsonify({'error': 'Internal server error'}), 500
     
+    @app.route('/jobs/<job_id>', methods=['GET'])
+    def job_status(job_id):
+        job = jobs.get(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        # Pass ?since=<next> from the previous poll to receive only new events
+        since = request.args.get('since', 0, type=int)
+        return jsonify(job.to_dict(since))
+    
+    @app.route('/jobs/<job_id>/stream', methods=['GET'])
+    def job_stream(job_id):
+        job = jobs.get(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        sse = request.args.get('format') == 'sse'
+        
+        def generate():
+            for event in job.iter_events():
+                if event is None:
+                    # Keep-alive so proxies do not close an idle stream
+                    yield ': keep-alive\n\n' if sse else '\n'
+                    continue
+                payload = json.dumps(event)
+                yield f"data: {payload}\n\n" if sse else payload + '\n'
+            
+            final = json.dumps({'type': 'end', 'status': job.status, 'error': job.error})
+            yield f"data: {final}\n\n" if sse else final + '\n'
+        
+        mimetype = 'text/event-stream' if sse else 'application/x-ndjson'
+        return Response(stream_with_context(generate()), mimetype=mimetype, headers={'Cache-Control': 'no-cache'})
+    
+    @app.route('/watchlist', methods=['GET'])
+    def watchlist():
+        return jsonify({
+            'interval_seconds': scheduler.interval,
+            'queries': scheduler.status()
+        })
+    
+    @app.route('/trends', methods=['GET'])
+    def trends():
+        if not article_store:
+            return jsonify({'error': 'Article store is disabled'}), 404
+        
+        kind = request.args.get('kind', 'term')
+        if kind not in ('term', 'entity'):
+            return jsonify({'error': 'kind must be term or entity'}), 400
+        
+        hours = request.args.get('hours', 24, type=float)
+        return jsonify({
+            'kind': kind,
+            'hours': hours,
+            'articles_indexed': article_store.article_count(),
+            'trending': article_store.trending(
+                kind,
+                hours=hours,
+                limit=request.args.get('limit', 20, type=int),
+                min_docs=request.args.get('min_docs', 2, type=int)
+            )
+        })
+    
+    @app.route('/trends/<kind>/<path:term>', methods=['GET'])
+    def term_trend(kind, term):
+        if not article_store:
+            return jsonify({'error': 'Article store is disabled'}), 404
+        if kind not in ('term', 'entity'):
+            return jsonify({'error': 'kind must be term or entity'}), 400
+        
+        return jsonify({
+            'kind': kind,
+            'term': term,
+            'buckets': article_store.term_trend(term, kind, hours=request.args.get('hours', 24 * 7, type=float)),
+            'articles': article_store.search(term, kind, limit=request.args.get('limit', 20, type=int))
+        })
+    
+    @app.route('/wordcloud/<fingerprint>.png', methods=['GET'])
+    def wordcloud_image(fingerprint):
+        png = visualizer.wordcloud_image(fingerprint)
+        if png is None:
+            return jsonify({'error': 'Word cloud not found'}), 404
+        
+        # The fingerprint identifies the image content, so it never changes
+        response = Response(png, mimetype='image/png')
+        response.set_etag(fingerprint)
+        response.cache_control.public = True
+        response.cache_control.max_age = Config.CACHE_TTL
+        return response.make_conditional(request)
+    
     @app.route('/summarize', methods=['POST'])
     def summarize_text():
         try:
@@ -102,15 +260,56 @@ def create_app():
             if not text:
                 return jsonify({'error': 'No text provided'}), 400
             
-            summary = summarizer.summarize(text)
+            # extractive, greedy or beam; auto picks by load and length; omitted uses SUMMARY_TIER
+            tier = data.get('tier')
+            if tier is not None and tier != 'auto' and tier not in SUMMARY_TIERS:
+                return jsonify({'error': f"tier must be auto or one of {', '.join(SUMMARY_TIERS)}"}), 400
+            
+            summaries, tiers = pipeline.summarize([text], tier)
             
             return jsonify({
                 'original_text': text,
-                'summary': summary
+                'summary': summaries[0],
+                'tier': tiers[0]
             })
-            
+        
+        except PoolFullError:
+            return jsonify({'error': 'Server is busy, try again shortly'}), 503, {'Retry-After': '5'}
+        except StageTimeoutError as e:
+            app.logger.error(f"Timeout in summarization: {e}")
+            return jsonify({'error': 'Summarization timed out'}), 504
         except Exception as e:
             app.logger.error(f"Error in summarization: {e}")
             return jsonify({'error': 'Internal server error'}), 500
     
-    return app
\ No newline at end of file
+    return app
+
+
+def _register_collectors(worker_pool, jobs, scheduler):
+    """Cache, queue, job, watchlist and model gauges read at scrape time"""
+    def cache_lookups():
+        for namespace, stats in get_cache_stats().items():
+            for tier, count in (('memory', stats['hits']), ('disk', stats['disk_hits'])):
+                yield {'namespace': namespace, 'result': 'hit', 'tier': tier}, count
+            yield {'namespace': namespace, 'result': 'miss', 'tier': 'none'}, stats['misses']
+    
+    metrics.collector('cache_lookups_total', 'counter', 'Result cache lookups by outcome', cache_lookups)
+    metrics.collector('cache_entries', 'gauge', 'Entries in the in-process cache tier',
+                      lambda: [({'namespace': namespace}, stats['entries']) for namespace, stats in get_cache_stats().items()])
+    metrics.collector('batch_queue_depth', 'gauge', 'Items waiting in each micro-batcher',
+                      lambda: [({'batcher': name}, stats['queue_depth']) for name, stats in get_batcher_stats().items()])
+    metrics.collector('batch_items_total', 'counter', 'Items processed by each micro-batcher',
+                      lambda: [({'batcher': name}, stats['items']) for name, stats in get_batcher_stats().items()])
+    metrics.collector('batches_total', 'counter', 'Model calls made by each micro-batcher',
+                      lambda: [({'batcher': name}, stats['batches']) for name, stats in get_batcher_stats().items()])
+    metrics.collector('jobs', 'gauge', 'Stored background jobs by status',
+                      lambda: [({'status': status}, count) for status, count in jobs.stats().items()])
+    metrics.collector('model_loaded', 'gauge', 'Whether each model is loaded in this process',
+                      lambda: [({'model': name}, int(status['state'] == 'loaded')) for name, status in registry.status().items()])
+    metrics.collector('watchlist_age_seconds', 'gauge', 'Age of the precomputed analysis of each watched query',
+                      lambda: [({'query': status['query']}, status['age_seconds']) for status in scheduler.status() if status['ready']])
+    if worker_pool:
+        metrics.collector('worker_pool_pending', 'gauge', 'Tasks running or queued in the worker pool',
+                          lambda: [({}, worker_pool.stats()['pending'])])
+        metrics.collector('worker_pool_capacity', 'gauge', 'Tasks the worker pool accepts before rejecting work',
+                          lambda: [({}, worker_pool.stats()['capacity'])])
\ No newline at end of file
@@ -1,27 +1,67 @@
 from collections import Counter
 import numpy as np
+import pandas as pd
+from app.models.keyphrases import KeyPhraseExtractor
+from app.utils.cache import make_key
 from app.utils.preprocessor import TextPreprocessor
 
 class NewsAnalyzer:
     def __init__(self):
         self.preprocessor = TextPreprocessor()
+        self.key_phrase_extractor = KeyPhraseExtractor()
     
-    def analyze_news(self, news_data):
+    def analyze_documents(self, news_data):
+        """Parse every article once; the result lines up with news_data"""
+        return self.preprocessor.analyze_documents([news.get('text', '') for news in news_data])
+    
+    def _merge_documents(self, documents):
+        """Combine per-article results into corpus-level lemmas, entities and phrase counts"""
+        lemmas = []
+        entities = []
+        phrase_counts = Counter()
+        word_count = 0
+        
+        for document in documents:
+            lemmas.extend(document['lemmas'])
+            entities.extend(document['entities'])
+            phrase_counts.update(document['phrase_counts'])
+            word_count += document['word_count']
+        
+        return lemmas, entities, phrase_counts, word_count
+    
+    def rank_key_phrases(self, news_data, documents):
+        """TF-IDF key phrases for the corpus and per source, from one document-phrase matrix"""
+        doc_ids = [make_key(news.get('text', '')) for news in news_data]
+        try:
+            self.key_phrase_extractor.update(documents, doc_ids)
+        except Exception as e:
+            print(f"Error updating key phrase statistics: {e}")
+        
+        # The corpus ranking counts each near-duplicate cluster once; per-source rankings keep every copy
+        corpus_rows = None
+        if all('cluster_id' in news for news in news_data):
+            first_rows = {}
+            for row, news in enumerate(news_data):
+                first_rows.setdefault(news['cluster_id'], row)
+            corpus_rows = list(first_rows.values())
+        
+        sources = [news.get('source', 'unknown') for news in news_data]
+        return self.key_phrase_extractor.rank(
+            documents, groups=sources, top_n=10, group_top_n=5, corpus_rows=corpus_rows
+        )
+    
+    def analyze_news(self, news_data, documents=None, phrase_rankings=None):
         """Comprehensive analysis of news data"""
         if not news_data:
             return {}
         
-        # Extract all text for analysis
-        all_text = ' '.join([news.get('text', '') for news in news_data if news.get('text')])
+        if documents is None:
+            documents = self.analyze_documents(news_data)
+        if phrase_rankings is None:
+            phrase_rankings = self.rank_key_phrases(news_data, documents)
         
-        # Preprocess text
-        processed_text = self.preprocessor.preprocess(all_text)
-        
-        # Extract entities
-        entities = self.preprocessor.extract_entities(all_text)
-        
-        # Extract key phrases
-        key_phrases = self.preprocessor.extract_key_phrases(all_text, num_phrases=10)
+        lemmas, entities, phrase_counts, word_count = self._merge_documents(documents)
+        key_phrases = phrase_rankings[0]
         
         # Calculate entity frequencies
         entity_freq = Counter([entity[0] for entity in entities])
@@ -30,13 +70,13 @@ class NewsAnalyzer:
         topics = self._extract_topics(key_phrases)
         
         return {
-            'processed_text': processed_text,
+            'processed_text': ' '.join(lemmas),
             'entities': entities,
             'key_phrases': key_phrases,
             'entity_frequencies': dict(entity_freq.most_common(20)),
             'topics': topics,
             'total_articles': len(news_data),
-            'total_words': len(all_text.split())
+            'total_words': word_count
         }
     
     def _extract_topics(self, key_phrases):
@@ -51,25 +91,71 @@ class NewsAnalyzer:
         
         return dict(sorted(topics.items(), key=lambda x: x[1], reverse=True))
     
-    def compare_sources(self, news_data):
-        """Compare news across different sources"""
-        sources = {}
+    def compare_sources(self, news_data, sentiments, documents=None, phrase_rankings=None):
+        """Compare news across different sources from per-article results, without another NLP pass"""
+        if documents is None:
+            documents = self.analyze_documents(news_data)
+        if phrase_rankings is None:
+            phrase_rankings = self.rank_key_phrases(news_data, documents)
+        if not news_data:
+            return {}
         
-        for news in news_data:
-            source = news.get('source', 'unknown')
-            if source not in sources:
-                sources[source] = []
-            sources[source].append(news)
+        # One row per article; labels are upper-cased so model and TextBlob labels group together
+        articles = pd.DataFrame({
+            'source': [news.get('source', 'unknown') for news in news_data],
+            'label': [sentiment['label'].upper() for sentiment in sentiments],
+            'score': [sentiment['score'] for sentiment in sentiments],
+            'word_count': [document['word_count'] for document in documents]
+        })
+        articles['polarity'] = np.select(
+            [articles['label'] == 'POSITIVE', articles['label'] == 'NEGATIVE'],
+            [articles['score'], -articles['score']],
+            0.0
+        )
+        
+        by_source = articles.groupby('source', sort=False).agg(
+            article_count=('label', 'size'),
+            polarity=('polarity', 'mean'),
+            confidence=('score', 'mean'),
+            avg_word_count=('word_count', 'mean')
+        )
+        distribution = pd.crosstab(articles['source'], articles['label'], normalize='index')
+        
+        entities = pd.DataFrame(
+            [(source, text) for source, document in zip(articles['source'], documents) for text, label in document['entities']],
+            columns=['source', 'entity']
+        )
+        ranked = (
+            entities.groupby(['source', 'entity'], sort=False).size()
+            .sort_values(ascending=False, kind='stable')
+            .groupby(level='source', sort=False).head(5)
+        )
+        top_entities = {
+            source: group.index.get_level_values('entity').tolist()
+            for source, group in ranked.groupby(level='source', sort=False)
+        }
         
         source_analysis = {}
-        for source, articles in sources.items():
-            source_text = ' '.join([article.get('text', '') for article in articles])
-            sentiment = self.preprocessor.analyze_sentiment(source_text)
+        for source, row in by_source.iterrows():
+            polarity = float(row['polarity'])
+            if polarity > 0.1:
+                label = 'POSITIVE'
+            elif polarity < -0.1:
+                label = 'NEGATIVE'
+            else:
+                label = 'NEUTRAL'
             
             source_analysis[source] = {
-                'article_count': len(articles),
-                'avg_sentiment': sentiment,
-                'key_topics': self.preprocessor.extract_key_phrases(source_text, num_phrases=5)
+                'article_count': int(row['article_count']),
+                'avg_sentiment': {
+                    'label': label,
+                    'score': round(polarity, 4),
+                    'confidence': round(float(row['confidence']), 4),
+                    'distribution': {name: round(float(share), 4) for name, share in distribution.loc[source].items() if share > 0}
+                },
+                'avg_word_count': round(float(row['avg_word_count']), 1),
+                'top_entities': top_entities.get(source, []),
+                'key_topics': phrase_rankings[1].get(source, [])
             }
         
-        return source_analysis
\ No newline at end of file
+        return source_analysis
@@ -0,0 +1,126 @@
+import re
+import numpy as np
+from config import Config
+
+# End of a sentence: terminal punctuation, optional closing quote or bracket, then whitespace
+SENTENCE_END = re.compile(r'[.!?]["\'\)\]]*\s+')
+
+WORD = re.compile(r'[a-z0-9]+')
+
+
+def split_sentences(text):
+    """Sentences of a text, split after terminal punctuation"""
+    sentences = []
+    start = 0
+    for match in SENTENCE_END.finditer(text):
+        sentences.append(text[start:match.end()].strip())
+        start = match.end()
+    sentences.append(text[start:].strip())
+    return [sentence for sentence in sentences if sentence]
+
+
+class ExtractiveSummarizer:
+    """Picks the most central sentences by TextRank and centroid similarity over a TF-IDF sentence-term matrix"""
+
+    def __init__(self, num_sentences=None, damping=0.85, max_iterations=50, redundancy=0.7):
+        self.config = Config()
+        self.num_sentences = num_sentences or self.config.EXTRACTIVE_SENTENCES
+        self.damping = damping
+        self.max_iterations = max_iterations
+        self.redundancy = redundancy
+
+    def _sentence_matrix(self, sentences):
+        """L2-normalized TF-IDF sentence-term matrix in coordinate form: (rows, cols, weights, vocabulary size)"""
+        vocabulary = {}
+        rows, cols = [], []
+        for row, sentence in enumerate(sentences):
+            for word in WORD.findall(sentence.lower()):
+                rows.append(row)
+                cols.append(vocabulary.setdefault(word, len(vocabulary)))
+
+        num_terms = max(len(vocabulary), 1)
+        # One entry per (sentence, term) with its count
+        keys = np.array(rows, dtype=np.int64) * num_terms + np.array(cols, dtype=np.int64)
+        keys, counts = np.unique(keys, return_counts=True)
+        rows, cols = keys // num_terms, keys % num_terms
+
+        # Sublinear term frequency times smoothed IDF over sentences
+        doc_freq = np.bincount(cols, minlength=num_terms)
+        idf = np.log((1 + len(sentences)) / (1 + doc_freq)) + 1
+        weights = (1 + np.log(counts)) * idf[cols]
+
+        norms = np.sqrt(np.bincount(rows, weights ** 2, minlength=len(sentences)))
+        norms[norms == 0] = 1
+        return rows, cols, weights / norms[rows], num_terms
+
+    @staticmethod
+    def _similarity(rows, cols, weights, n):
+        """Cosine similarity of every pair of sentences, summed over the terms they share"""
+        # Group entries by term and pair every entry with each entry of its group
+        order = np.argsort(cols, kind='stable')
+        rows, cols, weights = rows[order], cols[order], weights[order]
+        group_starts = np.flatnonzero(np.r_[True, cols[1:] != cols[:-1]])
+        group_sizes = np.diff(np.r_[group_starts, len(cols)])
+        entry_starts = np.repeat(group_starts, group_sizes)
+        entry_sizes = np.repeat(group_sizes, group_sizes)
+
+        left = np.repeat(np.arange(len(cols)), entry_sizes)
+        pair_offsets = np.arange(entry_sizes.sum()) - np.repeat(np.cumsum(entry_sizes) - entry_sizes, entry_sizes)
+        right = np.repeat(entry_starts, entry_sizes) + pair_offsets
+        return np.bincount(
+            rows[left] * n + rows[right], weights[left] * weights[right], minlength=n * n
+        ).reshape(n, n)
+
+    def _textrank(self, similarity):
+        """PageRank over the sentence similarity graph"""
+        n = similarity.shape[0]
+        weights = similarity.copy()
+        np.fill_diagonal(weights, 0)
+        out_weight = weights.sum(axis=1, keepdims=True)
+        # Sentences with no similar neighbours link uniformly
+        transition = np.where(out_weight > 0, weights / np.where(out_weight > 0, out_weight, 1), 1 / n)
+
+        scores = np.full(n, 1 / n)
+        for _ in range(self.max_iterations):
+            updated = (1 - self.damping) / n + self.damping * transition.T @ scores
+            if np.abs(updated - scores).sum() < 1e-6:
+                return updated
+            scores = updated
+        return scores
+
+    def score_sentences(self, sentences):
+        """TextRank and centroid similarity, each scaled to [0, 1] and averaged"""
+        n = len(sentences)
+        rows, cols, weights, num_terms = self._sentence_matrix(sentences)
+        similarity = self._similarity(rows, cols, weights, n)
+
+        textrank = self._textrank(similarity)
+        centroid = np.bincount(cols, weights, minlength=num_terms) / n
+        centroid_similarity = np.bincount(rows, weights * centroid[cols], minlength=n) / (np.linalg.norm(centroid) or 1)
+
+        scores = textrank / (textrank.max() or 1) + centroid_similarity / (centroid_similarity.max() or 1)
+        return scores / 2, similarity
+
+    def summarize(self, text, num_sentences=None):
+        """The top sentences, skipping near repeats of ones already chosen, in their original order"""
+        if not text or len(text.split()) < 50:
+            return text
+
+        num_sentences = num_sentences or self.num_sentences
+        sentences = split_sentences(text)
+        if len(sentences) <= num_sentences:
+            return ' '.join(sentences)
+
+        scores, similarity = self.score_sentences(sentences)
+        chosen = []
+        for index in np.argsort(-scores, kind='stable'):
+            if chosen and similarity[index, chosen].max() > self.redundancy:
+                continue
+            chosen.append(index)
+            if len(chosen) == num_sentences:
+                break
+
+        return ' '.join(sentences[i] for i in sorted(chosen))
+
+    def summarize_batch(self, texts, num_sentences=None):
+        return [self.summarize(text, num_sentences) for text in texts]
@@ -0,0 +1,170 @@
+import math
+import os
+import sqlite3
+import threading
+import numpy as np
+from config import Config
+
+
+class KeyPhraseExtractor:
+    """TF-IDF ranking of uni/bi/tri-gram phrases against persistent corpus document frequencies"""
+    
+    def __init__(self, db_path=None):
+        self.config = Config()
+        self.db_path = db_path or self.config.KEYPHRASE_DF_PATH
+        self._local = threading.local()
+    
+    def _connection(self):
+        """Return this thread's SQLite connection, reopening it after a fork"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS documents (doc_id TEXT PRIMARY KEY)')
+            conn.execute('CREATE TABLE IF NOT EXISTS doc_freq (phrase TEXT PRIMARY KEY, count INTEGER) WITHOUT ROWID')
+            conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
+    def num_docs(self):
+        row = self._connection().execute("SELECT value FROM meta WHERE key = 'num_docs'").fetchone()
+        return row[0] if row else 0
+    
+    def doc_freq(self, phrases):
+        """Corpus document frequency of each phrase, looked up in chunks"""
+        conn = self._connection()
+        found = {}
+        for start in range(0, len(phrases), 500):
+            chunk = phrases[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            found.update(conn.execute(f'SELECT phrase, count FROM doc_freq WHERE phrase IN ({placeholders})', chunk))
+        return np.array([found.get(phrase, 0) for phrase in phrases], dtype=np.float64)
+    
+    def update(self, documents, doc_ids):
+        """Count each previously unseen document's phrases once in the corpus statistics"""
+        conn = self._connection()
+        with conn:
+            added = 0
+            for document, doc_id in zip(documents, doc_ids):
+                cursor = conn.execute('INSERT OR IGNORE INTO documents (doc_id) VALUES (?)', (doc_id,))
+                if cursor.rowcount == 0:
+                    continue
+                
+                conn.executemany(
+                    'INSERT INTO doc_freq (phrase, count) VALUES (?, 1) '
+                    'ON CONFLICT (phrase) DO UPDATE SET count = count + 1',
+                    [(phrase,) for phrase in document['ngram_counts']]
+                )
+                added += 1
+            
+            if added:
+                conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('num_docs', ?) "
+                    "ON CONFLICT (key) DO UPDATE SET value = value + excluded.value",
+                    (added,)
+                )
+                self._prune(conn)
+    
+    def _prune(self, conn):
+        """Every KEYPHRASE_DF_PRUNE_EVERY documents, drop phrases seen in fewer than KEYPHRASE_DF_MIN_COUNT of them
+        
+        Most n-grams occur in a single document, so without this the table grows with every article.
+        A pruned phrase reads as unseen, which gives it almost the same IDF.
+        """
+        meta = dict(conn.execute("SELECT key, value FROM meta WHERE key IN ('num_docs', 'pruned_at')"))
+        if meta['num_docs'] - meta.get('pruned_at', 0) < self.config.KEYPHRASE_DF_PRUNE_EVERY:
+            return
+        conn.execute('DELETE FROM doc_freq WHERE count < ?', (self.config.KEYPHRASE_DF_MIN_COUNT,))
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('pruned_at', ?)", (meta['num_docs'],)
+        )
+    
+    def build_matrix(self, documents):
+        """Sparse document-phrase count matrix in coordinate form"""
+        vocabulary = {}
+        rows, cols, counts = [], [], []
+        for row, document in enumerate(documents):
+            for phrase, count in document['ngram_counts'].items():
+                rows.append(row)
+                cols.append(vocabulary.setdefault(phrase, len(vocabulary)))
+                counts.append(count)
+        
+        phrases = list(vocabulary)
+        return (
+            np.array(rows, dtype=np.int64),
+            np.array(cols, dtype=np.int64),
+            np.array(counts, dtype=np.float64),
+            phrases
+        )
+    
+    def rank(self, documents, groups=None, top_n=10, group_top_n=5, corpus_rows=None):
+        """Top phrases for the whole request and, optionally, for each group of documents
+        
+        groups holds one label per document (e.g. its source); the result is
+        (corpus_phrases, {label: phrases}). corpus_rows limits the request-wide
+        ranking to those documents, e.g. one per near-duplicate cluster.
+        """
+        rows, cols, counts, phrases = self.build_matrix(documents)
+        if not phrases:
+            return [], {label: [] for label in set(groups or [])}
+        
+        in_corpus = np.ones(len(rows), dtype=bool)
+        if corpus_rows is not None:
+            in_corpus = np.isin(rows, np.asarray(corpus_rows, dtype=np.int64))
+        
+        # Smoothed IDF from corpus statistics, falling back to the request itself
+        corpus_docs = self.num_docs()
+        if corpus_docs:
+            num_docs = corpus_docs
+            doc_freq = self.doc_freq(phrases)
+        else:
+            num_docs = len(documents) if corpus_rows is None else len(corpus_rows)
+            doc_freq = np.bincount(cols[in_corpus], minlength=len(phrases)).astype(np.float64)
+        idf = np.log((1 + num_docs) / (1 + doc_freq)) + 1
+        
+        # Sublinear TF-IDF, L2-normalized per document
+        weights = (1 + np.log(counts)) * idf[cols]
+        norms = np.sqrt(np.bincount(rows, weights ** 2, minlength=len(documents)))
+        weights /= norms[rows]
+        
+        # Multi-word phrases seen only once in the request are mostly noise
+        lengths = np.array([phrase.count(' ') + 1 for phrase in phrases])
+        min_count = self.config.KEYPHRASE_MIN_PHRASE_COUNT
+        eligible = (lengths == 1) | (np.bincount(cols, counts, minlength=len(phrases)) >= min_count)
+        corpus_eligible = (lengths == 1) | (
+            np.bincount(cols[in_corpus], counts[in_corpus], minlength=len(phrases)) >= min_count
+        )
+        
+        corpus_scores = np.bincount(cols[in_corpus], weights[in_corpus], minlength=len(phrases))
+        corpus_phrases = self._top(corpus_scores, corpus_eligible & (corpus_scores > 0), phrases, top_n)
+        
+        if groups is None:
+            return corpus_phrases, {}
+        
+        labels = sorted(set(groups), key=str)
+        label_index = {label: i for i, label in enumerate(labels)}
+        group_of_row = np.array([label_index[label] for label in groups], dtype=np.int64)
+        group_scores = np.bincount(
+            group_of_row[rows] * len(phrases) + cols,
+            weights,
+            minlength=len(labels) * len(phrases)
+        ).reshape(len(labels), len(phrases))
+        
+        group_phrases = {
+            label: self._top(group_scores[i], eligible & (group_scores[i] > 0), phrases, group_top_n)
+            for label, i in label_index.items()
+        }
+        return corpus_phrases, group_phrases
+    
+    @staticmethod
+    def _top(scores, eligible, phrases, n):
+        """Highest scoring eligible phrases, best first"""
+        scores = np.where(eligible, scores, -math.inf)
+        n = min(n, int(eligible.sum()))
+        if n <= 0:
+            return []
+        top = np.argpartition(-scores, n - 1)[:n]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [phrases[i] for i in top]
\ No newline at end of file
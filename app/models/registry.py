@@ -0,0 +1,204 @@
+import threading
+import time
+from app.utils.metrics import metrics
+from config import Config
+
+
+class ModelRegistry:
+    """Loads each model once per process, on first use or in a background warm-up"""
+    
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._errors = {}
+        self._load_times = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+    
+    def register(self, name, loader):
+        """Register a zero-argument function that loads the named model"""
+        with self._lock:
+            self._loaders[name] = loader
+            self._locks[name] = threading.Lock()
+    
+    def names(self):
+        return list(self._loaders)
+    
+    def get(self, name):
+        """Return the loaded model, loading it on first use; re-raises a previous load failure"""
+        if name in self._models:
+            return self._models[name]
+        if name in self._errors:
+            raise self._errors[name]
+        
+        with self._locks[name]:
+            # Another thread may have finished loading while we waited
+            if name in self._models:
+                return self._models[name]
+            if name in self._errors:
+                raise self._errors[name]
+            
+            start = time.perf_counter()
+            try:
+                model = self._loaders[name]()
+            except Exception as e:
+                print(f"Error loading model {name}: {e}")
+                metrics.increment('errors_total', component='registry')
+                self._errors[name] = e
+                raise
+            finally:
+                self._load_times[name] = time.perf_counter() - start
+            
+            self._models[name] = model
+            return model
+    
+    def try_get(self, name):
+        """Like get, but returns None if the model failed to load"""
+        try:
+            return self.get(name)
+        except Exception:
+            return None
+    
+    def warm_up(self, names=None, background=True):
+        """Load models ahead of the first request"""
+        names = self.names() if names is None else list(names)
+        
+        def load_all():
+            for name in names:
+                self.try_get(name)
+        
+        if not background:
+            load_all()
+            return None
+        
+        thread = threading.Thread(target=load_all, name='model-warm-up', daemon=True)
+        thread.start()
+        return thread
+    
+    def status(self):
+        """Load state and load time of every registered model"""
+        status = {}
+        for name in self._loaders:
+            if name in self._models:
+                state = 'loaded'
+            elif name in self._errors:
+                state = 'failed'
+            elif self._locks[name].locked():
+                state = 'loading'
+            else:
+                state = 'not_loaded'
+            
+            status[name] = {
+                'state': state,
+                'load_seconds': round(self._load_times[name], 3) if name in self._load_times else None,
+                'error': str(self._errors[name]) if name in self._errors else None
+            }
+        return status
+
+
+def inference_profile(name=None):
+    """Settings of the named CPU inference profile, the configured one by default"""
+    config = Config()
+    profile = dict(config.INFERENCE_PROFILES[name or config.INFERENCE_PROFILE])
+    profile['name'] = name or config.INFERENCE_PROFILE
+    return profile
+
+
+def summarization_model_name(profile=None):
+    """Checkpoint the summarizer loads under the given profile"""
+    config = Config()
+    profile = profile or inference_profile()
+    return config.DISTILLED_SUMMARIZATION_MODEL if profile['distilled'] else config.SUMMARIZATION_MODEL
+
+
+def configure_threads():
+    """Apply the configured torch thread counts to this process"""
+    import torch
+    
+    config = Config()
+    if config.TORCH_INTRA_OP_THREADS > 0:
+        torch.set_num_threads(config.TORCH_INTRA_OP_THREADS)
+    if config.TORCH_INTER_OP_THREADS > 0:
+        try:
+            torch.set_num_interop_threads(config.TORCH_INTER_OP_THREADS)
+        except RuntimeError as e:
+            # Only allowed before any inter-op parallel work has started
+            print(f"Could not set inter-op threads: {e}")
+
+
+def _prepare_model(model, profile):
+    """Switch to eval mode and quantize linear layers to int8 when the profile asks for it"""
+    import torch
+    
+    model.eval()
+    if profile['quantize'] and not torch.cuda.is_available():
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+def load_summarization(profile=None):
+    from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+    import torch
+    
+    profile = profile or inference_profile()
+    model_name = summarization_model_name(profile)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = _prepare_model(AutoModelForSeq2SeqLM.from_pretrained(model_name), profile)
+    if torch.cuda.is_available():
+        model = model.to('cuda')
+    return {'tokenizer': tokenizer, 'model': model}
+
+
+def load_sentiment(profile=None):
+    from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
+    import torch
+    
+    config = Config()
+    profile = profile or inference_profile()
+    tokenizer = AutoTokenizer.from_pretrained(config.SENTIMENT_MODEL)
+    model = _prepare_model(AutoModelForSequenceClassification.from_pretrained(config.SENTIMENT_MODEL), profile)
+    # The pipeline wraps the already loaded model instead of loading it again
+    analyzer = pipeline(
+        "sentiment-analysis",
+        model=model,
+        tokenizer=tokenizer,
+        device=0 if torch.cuda.is_available() else -1
+    )
+    return {'tokenizer': tokenizer, 'model': model, 'pipeline': analyzer}
+
+
+def _load_spacy():
+    import spacy
+    
+    config = Config()
+    try:
+        return spacy.load(config.SPACY_MODEL)
+    except OSError:
+        print("Downloading spaCy model...")
+        from spacy.cli import download
+        download(config.SPACY_MODEL)
+        return spacy.load(config.SPACY_MODEL)
+
+
+def _load_nltk():
+    import nltk
+    from nltk.corpus import stopwords
+    from nltk.stem import WordNetLemmatizer
+    
+    # Only download NLTK data that is missing, and only when first needed
+    for resource, package in [('tokenizers/punkt', 'punkt'), ('corpora/stopwords', 'stopwords'), ('corpora/wordnet', 'wordnet')]:
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            nltk.download(package, quiet=True)
+    
+    lemmatizer = WordNetLemmatizer()
+    lemmatizer.lemmatize('warm')  # WordNet loads lazily on first use
+    return {'stop_words': set(stopwords.words('english')), 'lemmatizer': lemmatizer}
+
+
+registry = ModelRegistry()
+registry.register('summarization', load_summarization)
+registry.register('sentiment', load_sentiment)
+registry.register('spacy', _load_spacy)
+registry.register('nltk', _load_nltk)
\ No newline at end of file
@@ -1,45 +1,78 @@
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
 from textblob import TextBlob
 import torch
+from app.models.registry import registry, inference_profile
+from app.utils.cache import ResultCache, make_key
+from app.utils.metrics import metrics
 from config import Config
 
 class SentimentAnalyzer:
-    def __init__(self):
+    def __init__(self, models=None):
         self.config = Config()
         self.device = 0 if torch.cuda.is_available() else -1
         
-        # Load transformer-based sentiment model
-        try:
-            self.tokenizer = AutoTokenizer.from_pretrained(self.config.SENTIMENT_MODEL)
-            self.model = AutoModelForSequenceClassification.from_pretrained(self.config.SENTIMENT_MODEL)
-            self.analyzer = pipeline(
-                "sentiment-analysis",
-                model=self.model,
-                tokenizer=self.tokenizer,
-                device=self.device
-            )
-        except Exception as e:
-            print(f"Error loading sentiment model: {e}")
-            self.analyzer = None
+        # Explicitly loaded models (e.g. for profile comparisons) bypass the registry
+        self._models = models
+        self.profile = inference_profile()
+        
+        self.cache = ResultCache('sentiment')
+    
+    # Transformer-based sentiment model, loaded by the registry on first use
+    def _loaded(self):
+        return self._models or registry.get('sentiment')
+    
+    @property
+    def tokenizer(self):
+        return self._loaded()['tokenizer']
+    
+    @property
+    def model(self):
+        return self._loaded()['model']
+    
+    @property
+    def analyzer(self):
+        """Sentiment pipeline, or None if the model could not be loaded"""
+        loaded = self._models or registry.try_get('sentiment')
+        return loaded['pipeline'] if loaded else None
+    
+    def _cache_key(self, text, windowed=False):
+        """Cache key covering the text, model and truncation/window settings"""
+        return make_key(
+            text,
+            self.config.SENTIMENT_MODEL,
+            self.profile['quantize'],
+            self.config.SENTIMENT_MAX_TOKENS,
+            # A stride of 0 still scores every window, so the mode is part of the key
+            ('windowed', self.config.SENTIMENT_WINDOW_STRIDE) if windowed else 'truncated'
+        )
     
     def analyze_sentiment_transformers(self, text):
         """Analyze sentiment using transformer model"""
+        # The key needs no model, so a cache hit never loads one
+        key = self._cache_key(text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
         if not self.analyzer:
             return self.analyze_sentiment_textblob(text)
         
         try:
-            result = self.analyzer(text[:512])[0]  # Truncate to model max length
-            return {
+            result = self.analyzer(text, truncation=True, max_length=self.config.SENTIMENT_MAX_TOKENS)[0]
+            sentiment = {
                 'label': result['label'],
                 'score': result['score'],
                 'method': 'transformer'
             }
+            self.cache.set(key, sentiment)
+            return sentiment
         except Exception as e:
             print(f"Error in transformer sentiment analysis: {e}")
+            metrics.increment('errors_total', component='sentiment')
             return self.analyze_sentiment_textblob(text)
     
     def analyze_sentiment_textblob(self, text):
         """Analyze sentiment using TextBlob (fallback)"""
+        metrics.increment('fallbacks_total', path='sentiment_textblob')
         analysis = TextBlob(text)
         polarity = analysis.sentiment.polarity
         
@@ -56,13 +89,104 @@ class SentimentAnalyzer:
             'method': 'textblob'
         }
     
-    def analyze_sentiment_batch(self, texts):
-        """Analyze sentiment for multiple texts"""
-        return [self.analyze_sentiment_transformers(text) for text in texts]
+    def analyze_sentiment_batch(self, texts, windowed=None, batch_size=None):
+        """Analyze sentiment for multiple texts in padded mini-batches"""
+        if not texts:
+            return []
+        
+        if windowed is None:
+            windowed = self.config.SENTIMENT_WINDOWED
+        if batch_size is None:
+            batch_size = self.config.SENTIMENT_BATCH_SIZE
+        
+        results = [None] * len(texts)
+        keys = [self._cache_key(text, windowed) for text in texts]
+        pending = []
+        for i, key in enumerate(keys):
+            results[i] = self.cache.get(key)
+            if results[i] is None:
+                pending.append(i)
+        
+        if pending and not self.analyzer:
+            for i in pending:
+                results[i] = self.analyze_sentiment_textblob(texts[i])
+        elif pending:
+            scored = self._analyze_uncached([texts[i] for i in pending], windowed, batch_size)
+            for i, sentiment in zip(pending, scored):
+                results[i] = sentiment
+                if sentiment['method'] == 'transformer':
+                    self.cache.set(keys[i], sentiment)
+        
+        return results
+    
+    def _analyze_uncached(self, texts, windowed, batch_size):
+        """Score texts with the model, bypassing the cache"""
+        try:
+            encodings = self.tokenizer(
+                [text or '' for text in texts],
+                truncation=True,
+                max_length=self.config.SENTIMENT_MAX_TOKENS,
+                stride=self.config.SENTIMENT_WINDOW_STRIDE if windowed else 0,
+                return_overflowing_tokens=windowed
+            )
+            input_ids = encodings['input_ids']
+            # Each window maps back to the text it was cut from
+            if windowed:
+                sample_mapping = encodings['overflow_to_sample_mapping']
+            else:
+                sample_mapping = list(range(len(texts)))
+            
+            window_probs = self._score_windows(input_ids, batch_size)
+        except Exception as e:
+            print(f"Error in batch sentiment analysis: {e}")
+            metrics.increment('errors_total', component='sentiment')
+            return [self.analyze_sentiment_transformers(text) for text in texts]
+        
+        # Aggregate window probabilities per text, weighted by window length
+        num_labels = window_probs.shape[1]
+        totals = torch.zeros(len(texts), num_labels)
+        weights = torch.zeros(len(texts))
+        for window, sample in enumerate(sample_mapping):
+            length = len(input_ids[window])
+            totals[sample] += window_probs[window] * length
+            weights[sample] += length
+        probs = totals / weights.clamp(min=1).unsqueeze(1)
+        
+        id2label = self.model.config.id2label
+        results = []
+        for row in probs:
+            label_id = int(row.argmax())
+            results.append({
+                'label': id2label[label_id],
+                'score': float(row[label_id]),
+                'method': 'transformer'
+            })
+        
+        return results
+    
+    def _score_windows(self, input_ids, batch_size):
+        """Run token windows through the model in length-sorted, padded batches"""
+        order = sorted(range(len(input_ids)), key=lambda i: len(input_ids[i]))
+        window_probs = [None] * len(input_ids)
+        
+        for start in range(0, len(order), batch_size):
+            chunk = order[start:start + batch_size]
+            batch = self.tokenizer.pad(
+                {'input_ids': [input_ids[i] for i in chunk]},
+                return_tensors="pt"
+            ).to(self.model.device)
+            
+            with torch.inference_mode():
+                logits = self.model(**batch).logits
+            
+            for i, row in zip(chunk, torch.softmax(logits, dim=-1).cpu()):
+                window_probs[i] = row
+        
+        return torch.stack(window_probs)
     
     def get_sentiment_stats(self, sentiment_results):
         """Calculate sentiment statistics"""
-        labels = [result['label'] for result in sentiment_results]
+        labels = [result['label'].upper() for result in sentiment_results]
         
         return {
             'positive_count': labels.count('POSITIVE'),
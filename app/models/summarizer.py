@@ -1,25 +1,49 @@
-from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
+import bisect
 import torch
+from app.models.extractive import ExtractiveSummarizer, SENTENCE_END
+from app.models.registry import registry, inference_profile, summarization_model_name
+from app.utils.cache import ResultCache, make_key
+from app.utils.metrics import metrics
 from config import Config
 
 class TextSummarizer:
-    def __init__(self):
+    def __init__(self, models=None):
         self.config = Config()
         self.device = 0 if torch.cuda.is_available() else -1
         
-        # Load model and tokenizer
-        self.tokenizer = AutoTokenizer.from_pretrained(self.config.SUMMARIZATION_MODEL)
-        self.model = AutoModelForSeq2SeqLM.from_pretrained(self.config.SUMMARIZATION_MODEL)
+        # Explicitly loaded models (e.g. for profile comparisons) bypass the registry
+        self._models = models
+        self.profile = inference_profile()
         
-        # Create summarization pipeline
-        self.summarizer = pipeline(
-            "summarization",
-            model=self.model,
-            tokenizer=self.tokenizer,
-            device=self.device
+        self.cache = ResultCache('summaries')
+        self.extractive = ExtractiveSummarizer()
+    
+    # Model and tokenizer are loaded by the registry on first use
+    def _loaded(self):
+        return self._models or registry.get('summarization')
+    
+    @property
+    def tokenizer(self):
+        return self._loaded()['tokenizer']
+    
+    @property
+    def model(self):
+        return self._loaded()['model']
+    
+    def _cache_key(self, text, max_length, min_length, num_beams):
+        """Cache key covering the text, model and generation parameters"""
+        return make_key(
+            text,
+            summarization_model_name(self.profile),
+            self.profile['quantize'],
+            max_length,
+            min_length,
+            num_beams,
+            self.config.SUMMARY_MAX_INPUT_TOKENS,
+            self.config.SUMMARY_LONG_DOCUMENTS
         )
     
-    def summarize(self, text, max_length=None, min_length=None):
+    def summarize(self, text, max_length=None, min_length=None, num_beams=None):
         """Generate summary of text"""
         if not text or len(text.split()) < 50:
             return text
@@ -28,29 +52,194 @@ class TextSummarizer:
             max_length = self.config.MAX_SUMMARY_LENGTH
         if min_length is None:
             min_length = self.config.MIN_SUMMARY_LENGTH
+        if num_beams is None:
+            num_beams = self.config.NUM_BEAMS
+        
+        key = self._cache_key(text, max_length, min_length, num_beams)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
         
         try:
-            # Tokenize to check length
-            inputs = self.tokenizer(text, return_tensors="pt", truncation=True, max_length=1024)
-            
-            # Generate summary
-            summary = self.summarizer(
-                text,
-                max_length=max_length,
-                min_length=min_length,
-                num_beams=self.config.NUM_BEAMS,
-                length_penalty=2.0,
-                early_stopping=True,
-                no_repeat_ngram_size=3
-            )
-            
-            return summary[0]['summary_text']
+            # Tokenize once and generate straight from the token ids
+            input_ids, offsets = self._encode([text])
+            summary_text = self._summarize_encoded(text, input_ids[0], offsets[0], max_length, min_length, num_beams)
+            self.cache.set(key, summary_text)
+            return summary_text
         except Exception as e:
             print(f"Error in summarization: {e}")
-            # Fallback: return first few sentences
+            metrics.increment('errors_total', component='summarizer')
+            return self._fallback_summary(text)
+    
+    def _fallback_summary(self, text):
+        """Fallback: the extractive summary, or the first few sentences"""
+        metrics.increment('fallbacks_total', path='summary_extractive')
+        try:
+            return self.extractive.summarize(text)
+        except Exception as e:
+            print(f"Error in extractive summarization: {e}")
             sentences = text.split('. ')
             return '. '.join(sentences[:3]) + '.'
     
-    def summarize_batch(self, texts, max_length=None, min_length=None):
-        """Summarize multiple texts"""
-        return [self.summarize(text, max_length, min_length) for text in texts]
\ No newline at end of file
+    def _encode(self, texts):
+        """Tokenize without special tokens or truncation, keeping character offsets"""
+        encodings = self.tokenizer(texts, add_special_tokens=False, return_offsets_mapping=True)
+        return encodings['input_ids'], encodings['offset_mapping']
+    
+    def _token_budget(self):
+        """Content tokens that fit in one model input"""
+        return self.config.SUMMARY_MAX_INPUT_TOKENS - self.tokenizer.num_special_tokens_to_add()
+    
+    def _is_long(self, input_ids):
+        return self.config.SUMMARY_LONG_DOCUMENTS and len(input_ids) > self._token_budget()
+    
+    def _model_input(self, input_ids):
+        """Truncate to the model limit and add special tokens"""
+        return self.tokenizer.build_inputs_with_special_tokens(input_ids[:self._token_budget()])
+    
+    def _summarize_encoded(self, text, input_ids, offsets, max_length, min_length, num_beams, depth=0):
+        """Summarize already tokenized text, using map-reduce when it is over the input limit"""
+        if not self._is_long(input_ids) or depth >= self.config.SUMMARY_MAX_REDUCE_DEPTH:
+            return self._generate([self._model_input(input_ids)], max_length, min_length, num_beams=num_beams)[0]
+        
+        # Map: summarize sentence-aligned chunks together in batches
+        chunks = self._chunk_by_sentences(text, input_ids, offsets)[:self.config.SUMMARY_MAX_CHUNKS]
+        chunk_summaries = self._generate(
+            [self.tokenizer.build_inputs_with_special_tokens(chunk) for chunk in chunks],
+            self.config.SUMMARY_CHUNK_MAX_LENGTH,
+            self.config.SUMMARY_CHUNK_MIN_LENGTH,
+            num_beams=num_beams
+        )
+        
+        # Reduce: summarize the joined chunk summaries, chunking again if they are still too long
+        combined = ' '.join(chunk_summaries)
+        combined_ids, combined_offsets = self._encode([combined])
+        return self._summarize_encoded(combined, combined_ids[0], combined_offsets[0], max_length, min_length, num_beams, depth + 1)
+    
+    def _chunk_by_sentences(self, text, input_ids, offsets):
+        """Split token ids into chunks within the token budget, breaking only between sentences"""
+        budget = self._token_budget()
+        boundaries = [match.end() for match in SENTENCE_END.finditer(text)]
+        
+        # Group tokens by the sentence their first character falls in
+        sentences = []
+        for token_id, (start, _) in zip(input_ids, offsets):
+            index = bisect.bisect_right(boundaries, start)
+            if not sentences or sentences[-1][0] != index:
+                sentences.append((index, []))
+            sentences[-1][1].append(token_id)
+        
+        chunks = [[]]
+        for _, sentence_ids in sentences:
+            # A single sentence over the budget is split on token boundaries
+            for start in range(0, len(sentence_ids), budget):
+                piece = sentence_ids[start:start + budget]
+                if len(chunks[-1]) + len(piece) > budget:
+                    chunks.append([])
+                chunks[-1].extend(piece)
+        
+        return [chunk for chunk in chunks if chunk]
+    
+    def _generate(self, model_inputs, max_length, min_length, batch_size=None, num_beams=None):
+        """Run generate over padded, length-sorted batches and return summaries in input order"""
+        if batch_size is None:
+            batch_size = self.config.SUMMARY_BATCH_SIZE
+        if num_beams is None:
+            num_beams = self.config.NUM_BEAMS
+        
+        summaries = [None] * len(model_inputs)
+        # Sorting by length keeps padding within each batch small
+        order = sorted(range(len(model_inputs)), key=lambda i: len(model_inputs[i]))
+        
+        for start in range(0, len(order), batch_size):
+            chunk = order[start:start + batch_size]
+            batch = self.tokenizer.pad(
+                {'input_ids': [model_inputs[i] for i in chunk]},
+                return_tensors="pt"
+            ).to(self.model.device)
+            
+            with torch.inference_mode():
+                output_ids = self.model.generate(
+                    **batch,
+                    max_length=max_length,
+                    min_length=min_length,
+                    num_beams=num_beams,
+                    length_penalty=2.0,
+                    early_stopping=num_beams > 1,
+                    no_repeat_ngram_size=3
+                )
+            
+            decoded = self.tokenizer.batch_decode(output_ids, skip_special_tokens=True, clean_up_tokenization_spaces=True)
+            for i, summary in zip(chunk, decoded):
+                summaries[i] = summary.strip()
+        
+        return summaries
+    
+    def summarize_batch(self, texts, max_length=None, min_length=None, batch_size=None, num_beams=None):
+        """Summarize multiple texts in padded, length-sorted batches"""
+        if max_length is None:
+            max_length = self.config.MAX_SUMMARY_LENGTH
+        if min_length is None:
+            min_length = self.config.MIN_SUMMARY_LENGTH
+        if batch_size is None:
+            batch_size = self.config.SUMMARY_BATCH_SIZE
+        if num_beams is None:
+            num_beams = self.config.NUM_BEAMS
+        
+        # Short texts are passed through unchanged, as in summarize()
+        summaries = list(texts)
+        pending = []
+        keys = {}
+        for i, text in enumerate(texts):
+            if not text or len(text.split()) < 50:
+                continue
+            keys[i] = self._cache_key(text, max_length, min_length, num_beams)
+            cached = self.cache.get(keys[i])
+            if cached is not None:
+                summaries[i] = cached
+            else:
+                pending.append(i)
+        if not pending:
+            return summaries
+        
+        input_ids, offsets = self._encode([texts[i] for i in pending])
+        
+        # Long documents go through map-reduce on their existing tokenization
+        regular = []
+        for j, i in enumerate(pending):
+            if not self._is_long(input_ids[j]):
+                regular.append(j)
+                continue
+            try:
+                summaries[i] = self._summarize_encoded(texts[i], input_ids[j], offsets[j], max_length, min_length, num_beams)
+                self.cache.set(keys[i], summaries[i])
+            except Exception as e:
+                print(f"Error in long document summarization: {e}")
+                metrics.increment('errors_total', component='summarizer')
+                summaries[i] = self._fallback_summary(texts[i])
+        
+        # Sort across the whole request so each batch pads articles of similar length together
+        regular.sort(key=lambda j: len(input_ids[j]))
+        for start in range(0, len(regular), batch_size):
+            chunk = regular[start:start + batch_size]
+            try:
+                generated = self._generate([self._model_input(input_ids[j]) for j in chunk], max_length, min_length, batch_size, num_beams)
+                for j, summary in zip(chunk, generated):
+                    summaries[pending[j]] = summary
+                    self.cache.set(keys[pending[j]], summary)
+            except Exception as e:
+                print(f"Error in batch summarization: {e}")
+                metrics.increment('errors_total', component='summarizer')
+                # Fall back to summarizing this batch one item at a time
+                for j in chunk:
+                    summaries[pending[j]] = self.summarize(texts[pending[j]], max_length, min_length, num_beams)
+        
+        return summaries
+    
+    def summarize_batch_greedy(self, texts):
+        """summarize_batch with greedy decoding, the cheaper abstractive tier"""
+        return self.summarize_batch(texts, num_beams=1)
+    
+    def summarize_batch_extractive(self, texts):
+        """Extractive summaries, the tier that needs no model"""
+        return self.extractive.summarize_batch(texts)
\ No newline at end of file
@@ -0,0 +1,282 @@
+from app.utils.batching import MicroBatcher
+from app.utils.dedup import NearDuplicateDetector
+from app.utils.metrics import metrics
+from app.utils.visualizer import WORDCLOUD_IMAGE_PATH
+from app.utils.workers import execute
+from config import Config
+
+# Summary tier -> stage that produces it, cheapest first
+SUMMARY_TIERS = {
+    'extractive': 'summarize_extractive',
+    'greedy': 'summarize_greedy',
+    'beam': 'summarize'
+}
+
+
+class AnalysisPipeline:
+    """Fetch, per-article and aggregate analysis stages shared by the routes"""
+    
+    def __init__(self, summarizer, sentiment_analyzer, news_analyzer, news_fetcher, visualizer, worker_pool=None, article_store=None):
+        self.config = Config()
+        self.summarizer = summarizer
+        self.sentiment_analyzer = sentiment_analyzer
+        self.news_analyzer = news_analyzer
+        self.news_fetcher = news_fetcher
+        self.visualizer = visualizer
+        self.worker_pool = worker_pool
+        self.article_store = article_store
+        self.components = {
+            'summarizer': summarizer,
+            'sentiment': sentiment_analyzer,
+            'analyzer': news_analyzer,
+            'visualizer': visualizer
+        }
+        
+        # Items from concurrent requests share one model call per batch
+        self.batchers = {}
+        if self.config.MICROBATCH_ENABLED:
+            for stage in self.config.MICROBATCH_STAGES:
+                # Pool-backed stages keep every worker process busy with a batch of its own
+                concurrency = worker_pool.num_workers if worker_pool and worker_pool.handles(stage) else 1
+                self.batchers[stage] = MicroBatcher(
+                    stage, lambda items, stage=stage: self._run_direct(stage, items), concurrency=concurrency
+                )
+        
+        self.deduplicator = NearDuplicateDetector() if self.config.DEDUP_ENABLED else None
+    
+    def run_stage(self, stage, *args):
+        """Run a stage through its micro-batcher, the worker pool or this thread"""
+        with metrics.timer('stage_seconds', stage=stage):
+            if stage in self.batchers:
+                return self.batchers[stage](*args)
+            return self._run_direct(stage, *args)
+    
+    def _run_direct(self, stage, *args):
+        if self.worker_pool and self.worker_pool.handles(stage):
+            return self.worker_pool.run(stage, *args)
+        return execute(self.components, stage, *args)
+    
+    def summary_load(self):
+        """Summaries waiting in the batch queues, plus summarization tasks running or queued in the worker pool"""
+        load = sum(
+            self.batchers[stage].stats()['queue_depth']
+            for stage in SUMMARY_TIERS.values() if stage in self.batchers
+        )
+        if self.worker_pool:
+            pending_stages = self.worker_pool.stats()['pending_stages']
+            load += sum(pending_stages.get(stage, 0) for stage in SUMMARY_TIERS.values())
+        return load
+    
+    def summary_tiers(self, texts, tier=None):
+        """Tier for each text: the requested one, or under 'auto' the cheapest the current load calls for"""
+        tier = tier or self.config.SUMMARY_TIER
+        if tier != 'auto':
+            if tier not in SUMMARY_TIERS:
+                raise ValueError(f"Unknown summary tier '{tier}'")
+            return [tier] * len(texts)
+        
+        load = self.summary_load()
+        if load >= self.config.SUMMARY_EXTRACTIVE_QUEUE_DEPTH:
+            return ['extractive'] * len(texts)
+        if load >= self.config.SUMMARY_GREEDY_QUEUE_DEPTH:
+            return ['greedy'] * len(texts)
+        
+        # Beam search over a map-reduced long document costs several times a normal article
+        return [
+            'greedy' if len((text or '').split()) > self.config.SUMMARY_BEAM_MAX_WORDS else 'beam'
+            for text in texts
+        ]
+    
+    def summarize(self, texts, tier=None):
+        """Summaries and the tier that produced each"""
+        tiers = self.summary_tiers(texts, tier)
+        summaries = [None] * len(texts)
+        for name in SUMMARY_TIERS:
+            indices = [i for i, text_tier in enumerate(tiers) if text_tier == name]
+            if not indices:
+                continue
+            metrics.increment('summary_tier_total', len(indices), tier=name)
+            for i, summary in zip(indices, self.run_stage(SUMMARY_TIERS[name], [texts[i] for i in indices])):
+                summaries[i] = summary
+        return summaries, tiers
+    
+    def fetch(self, query, custom_url=None, max_articles=None, max_deadline=None):
+        """Fetch a single article by URL or search results for a query, paging within max_deadline seconds if given"""
+        with metrics.timer('stage_seconds', stage='fetch'):
+            if custom_url:
+                # Analyze single article from URL
+                article = self.news_fetcher.fetch_from_url(custom_url)
+                return [article] if article else []
+            
+            # Larger budgets page through the listing, with FETCH_DEADLINE for every 10 articles
+            if max_articles and max_articles > 10:
+                deadline = self.config.FETCH_DEADLINE * -(-max_articles // 10)
+                if max_deadline:
+                    deadline = min(deadline, max_deadline)
+                return list(self.news_fetcher.iter_news_api(query, max_articles, deadline=deadline))
+            
+            # Fetch news based on query
+            return self.news_fetcher.fetch_from_news_api(query, page_size=max_articles or 10)
+    
+    def deduplicate(self, news_articles):
+        """Copies of the articles tagged with the id of their near-duplicate cluster"""
+        if self.deduplicator:
+            with metrics.timer('stage_seconds', stage='dedup'):
+                cluster_ids = self.deduplicator.cluster([article['text'] for article in news_articles])
+        else:
+            cluster_ids = range(len(news_articles))
+        
+        # Fetched records may be shared through the fetch cache, so tag copies
+        return [dict(article, cluster_id=cluster_id) for article, cluster_id in zip(news_articles, cluster_ids)]
+    
+    @staticmethod
+    def _representatives(news_articles):
+        """First article of each cluster, by cluster id"""
+        representatives = {}
+        for article in news_articles:
+            representatives.setdefault(article['cluster_id'], article)
+        return representatives
+    
+    def analyze_articles(self, news_articles, cluster_results=None, tier=None):
+        """Summarize and analyze sentiment once per cluster and fan the result out to its members"""
+        if cluster_results is None:
+            cluster_results = {}
+        
+        pending = [
+            (cluster_id, article) for cluster_id, article in self._representatives(news_articles).items()
+            if cluster_id not in cluster_results
+        ]
+        if pending:
+            texts = [article['text'] for cluster_id, article in pending]
+            summaries, tiers = self.summarize(texts, tier)
+            sentiments = self.run_stage('sentiment', texts)
+            for (cluster_id, article), summary, tier, sentiment in zip(pending, summaries, tiers, sentiments):
+                cluster_results[cluster_id] = (summary, tier, sentiment)
+        
+        results = []
+        for article in news_articles:
+            summary, tier, sentiment = cluster_results[article['cluster_id']]
+            results.append({
+                'title': article['title'],
+                'url': article['url'],
+                'source': article['source'],
+                'cluster_id': article['cluster_id'],
+                'summary': summary,
+                'summary_tier': tier,
+                'sentiment': sentiment,
+                'publish_date': article['publish_date'].isoformat() if article['publish_date'] else None,
+                'image': article['top_image']
+            })
+        
+        return results
+    
+    def aggregate(self, news_articles, results, compact=None):
+        """Corpus analysis, sentiment statistics, source comparison and charts"""
+        if compact is None:
+            compact = self.config.VISUALIZATION_MODE == 'compact'
+        
+        # Parse one article per cluster; copies share its document
+        representatives = self._representatives(news_articles)
+        unique_articles = list(representatives.values())
+        unique_documents = self.run_stage('analyze_documents', unique_articles)
+        cluster_documents = dict(zip(representatives, unique_documents))
+        documents = [cluster_documents[article['cluster_id']] for article in news_articles]
+        
+        # Overall analysis counts each story once; source comparison keeps every copy
+        with metrics.timer('stage_seconds', stage='key_phrases'):
+            phrase_rankings = self.news_analyzer.rank_key_phrases(news_articles, documents)
+        with metrics.timer('stage_seconds', stage='corpus_analysis'):
+            overall_analysis = self.news_analyzer.analyze_news(unique_articles, unique_documents, phrase_rankings)
+        overall_analysis['total_clusters'] = len(unique_articles)
+        overall_analysis['total_articles'] = len(news_articles)
+        self._record(news_articles, documents, results)
+        sentiment_stats = self.sentiment_analyzer.get_sentiment_stats(
+            [result['sentiment'] for result in results]
+        )
+        
+        # Source comparison
+        with metrics.timer('stage_seconds', stage='compare_sources'):
+            source_analysis = self.news_analyzer.compare_sources(
+                news_articles, [result['sentiment'] for result in results], documents, phrase_rankings
+            )
+        
+        # Generate visualizations
+        if compact:
+            visualizations = self._compact_visualizations(overall_analysis, sentiment_stats, source_analysis)
+        else:
+            wordcloud = self.run_stage('wordcloud', overall_analysis['processed_text'])
+            with metrics.timer('stage_seconds', stage='charts'):
+                visualizations = {
+                    'sentiment_chart': self.visualizer.create_sentiment_chart(sentiment_stats).to_json(),
+                    'entity_chart': self.visualizer.create_entity_chart(overall_analysis['entity_frequencies']).to_json(),
+                    'wordcloud': wordcloud,
+                    'source_chart': self.visualizer.create_source_comparison_chart(source_analysis).to_json()
+                }
+        
+        return {
+            'analysis': overall_analysis,
+            'visualizations': visualizations,
+            'sentiment_stats': sentiment_stats
+        }
+    
+    def _compact_visualizations(self, overall_analysis, sentiment_stats, source_analysis):
+        """Chart data and word frequencies for client-side rendering; the image is fetched separately"""
+        with metrics.timer('stage_seconds', stage='charts'):
+            charts = self.visualizer.chart_data(sentiment_stats, overall_analysis['entity_frequencies'], source_analysis)
+            wordcloud = self.visualizer.word_frequencies(overall_analysis['processed_text'])
+        
+        return {
+            'mode': 'compact',
+            'charts': charts,
+            'wordcloud': {
+                'words': wordcloud['words'],
+                'image_url': WORDCLOUD_IMAGE_PATH.format(fingerprint=wordcloud['fingerprint']) if wordcloud['words'] else None
+            }
+        }
+    
+    def _record(self, news_articles, documents, results):
+        """Add processed articles to the persistent store and trend index"""
+        if not self.article_store:
+            return
+        try:
+            with metrics.timer('stage_seconds', stage='record'):
+                self.article_store.add_articles(news_articles, documents, [result['sentiment'] for result in results])
+        except Exception as e:
+            print(f"Error recording articles: {e}")
+            metrics.increment('errors_total', component='article_store')
+    
+    def analyze(self, news_articles, compact=None, known_results=None):
+        """Full analysis in one response; known_results maps URL to a previous article result to reuse"""
+        news_articles = self.deduplicate(news_articles)
+        if known_results:
+            fresh = [article for article in news_articles if article['url'] not in known_results]
+            fresh_results = dict(zip((article['url'] for article in fresh), self.analyze_articles(fresh))) if fresh else {}
+            # Cluster ids index into this listing, so reused results take the current one
+            results = [
+                dict(known_results[article['url']], cluster_id=article['cluster_id'])
+                if article['url'] in known_results else fresh_results[article['url']]
+                for article in news_articles
+            ]
+        else:
+            results = self.analyze_articles(news_articles)
+        response = {'articles': results}
+        response.update(self.aggregate(news_articles, results, compact))
+        return response
+    
+    def iter_events(self, news_articles, chunk_size=None, compact=None):
+        """Yield each article's result as its chunk finishes, then the aggregate analysis"""
+        if chunk_size is None:
+            chunk_size = self.config.JOB_CHUNK_SIZE
+        
+        news_articles = self.deduplicate(news_articles)
+        cluster_results = {}
+        results = []
+        for start in range(0, len(news_articles), chunk_size):
+            chunk_results = self.analyze_articles(news_articles[start:start + chunk_size], cluster_results)
+            for offset, result in enumerate(chunk_results):
+                yield {'type': 'article', 'index': start + offset, 'article': result}
+            results.extend(chunk_results)
+        
+        event = {'type': 'analysis'}
+        event.update(self.aggregate(news_articles, results, compact))
+        yield event
\ No newline at end of file
@@ -114,14 +114,74 @@ class NewsNexus {
     }
 
     displayVisualizations(visualizations) {
+        const wordcloudContainer = document.getElementById('wordcloudContainer');
+        
+        if (visualizations.mode === 'compact') {
+            // Compact payloads carry chart data only; build the same figures the server would
+            const charts = visualizations.charts;
+            this.renderChart('sentimentChart', this.sentimentFigure(charts.sentiment));
+            this.renderChart('entityChart', this.entityFigure(charts.entities));
+            this.renderChart('sourceChart', this.sourceFigure(charts.sources));
+            
+            const imageUrl = visualizations.wordcloud.image_url;
+            wordcloudContainer.innerHTML = imageUrl ? `<img src="${imageUrl}" alt="Word Cloud">` : '';
+            return;
+        }
+        
         this.renderChart('sentimentChart', JSON.parse(visualizations.sentiment_chart));
         this.renderChart('entityChart', JSON.parse(visualizations.entity_chart));
         this.renderChart('sourceChart', JSON.parse(visualizations.source_chart));
         
-        const wordcloudContainer = document.getElementById('wordcloudContainer');
         wordcloudContainer.innerHTML = `<img src="${visualizations.wordcloud}" alt="Word Cloud">`;
     }
 
+    sentimentFigure(sentiment) {
+        return {
+            data: [{ type: 'pie', labels: sentiment.labels, values: sentiment.values, hole: 0.3 }],
+            layout: { title: { text: 'Sentiment Distribution' } }
+        };
+    }
+
+    entityFigure(entities) {
+        return {
+            data: [{ type: 'bar', x: entities.labels, y: entities.values }],
+            layout: {
+                title: { text: 'Top Entities' },
+                xaxis: { title: { text: 'Entities' } },
+                yaxis: { title: { text: 'Frequency' } }
+            }
+        };
+    }
+
+    sourceFigure(sources) {
+        return {
+            data: [
+                { type: 'bar', x: sources.labels, y: sources.article_counts, name: 'Article Count', marker: { color: 'lightskyblue' } },
+                {
+                    type: 'scatter',
+                    x: sources.labels,
+                    y: sources.sentiment_scores,
+                    name: 'Sentiment Score',
+                    yaxis: 'y2',
+                    mode: 'markers+lines',
+                    marker: { color: 'red', size: 10 }
+                }
+            ],
+            layout: {
+                title: { text: 'News Source Comparison' },
+                xaxis: { title: { text: 'News Sources' } },
+                yaxis: { title: { text: 'Article Count', font: { color: 'lightskyblue' } }, tickfont: { color: 'lightskyblue' } },
+                yaxis2: {
+                    title: { text: 'Sentiment Score', font: { color: 'red' } },
+                    tickfont: { color: 'red' },
+                    anchor: 'x',
+                    overlaying: 'y',
+                    side: 'right'
+                }
+            }
+        };
+    }
+
     renderChart(containerId, chartData) {
         const container = document.getElementById(containerId);
         container.innerHTML = '';
@@ -0,0 +1,12 @@
+import os
+import pytest
+from config import Config
+
+
+@pytest.fixture(autouse=True)
+def data_paths(tmp_path, monkeypatch):
+    """Keep the SQLite caches and stores of each test in its own directory"""
+    monkeypatch.setattr(Config, 'CACHE_DB_PATH', os.path.join(tmp_path, 'cache.sqlite3'))
+    monkeypatch.setattr(Config, 'KEYPHRASE_DF_PATH', os.path.join(tmp_path, 'keyphrases.sqlite3'))
+    monkeypatch.setattr(Config, 'WORKER_LOCK_PATH', os.path.join(tmp_path, 'worker_pool.lock'))
+    return tmp_path
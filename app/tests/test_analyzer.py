@@ -0,0 +1,62 @@
+import pytest
+from app.models.analyzer import NewsAnalyzer
+
+
+def document(word_count, entities=()):
+    return {'word_count': word_count, 'entities': list(entities)}
+
+
+ARTICLES = [
+    {'source': 'wire.com', 'text': 'a'},
+    {'source': 'daily.com', 'text': 'b'},
+    {'source': 'wire.com', 'text': 'c'},
+    {'source': 'wire.com', 'text': 'd'}
+]
+SENTIMENTS = [
+    {'label': 'positive', 'score': 0.9},
+    {'label': 'NEGATIVE', 'score': 0.6},
+    {'label': 'POSITIVE', 'score': 0.7},
+    {'label': 'neutral', 'score': 0.8}
+]
+DOCUMENTS = [
+    document(100, [('Senate', 'ORG'), ('Paris', 'GPE')]),
+    document(300, [('Senate', 'ORG')]),
+    document(200, [('Senate', 'ORG'), ('Senate', 'ORG')]),
+    document(150, [('Paris', 'GPE')])
+]
+RANKINGS = ([], {'wire.com': ['climate summit'], 'daily.com': ['budget']})
+
+
+@pytest.fixture
+def source_analysis():
+    return NewsAnalyzer().compare_sources(ARTICLES, SENTIMENTS, DOCUMENTS, RANKINGS)
+
+
+def test_sources_keep_first_seen_order(source_analysis):
+    assert list(source_analysis) == ['wire.com', 'daily.com']
+
+
+def test_source_sentiment(source_analysis):
+    wire = source_analysis['wire.com']
+    assert wire['article_count'] == 3
+    # Polarity is the signed score averaged over the source's articles; labels are compared case-insensitively
+    assert wire['avg_sentiment'] == {
+        'label': 'POSITIVE',
+        'score': round((0.9 + 0.7 + 0) / 3, 4),
+        'confidence': 0.8,
+        'distribution': {'NEUTRAL': 0.3333, 'POSITIVE': 0.6667}
+    }
+    assert source_analysis['daily.com']['avg_sentiment']['label'] == 'NEGATIVE'
+    assert source_analysis['daily.com']['avg_sentiment']['score'] == -0.6
+
+
+def test_source_entities_and_topics(source_analysis):
+    wire = source_analysis['wire.com']
+    assert wire['avg_word_count'] == 150.0
+    assert wire['top_entities'] == ['Senate', 'Paris']
+    assert wire['key_topics'] == ['climate summit']
+    assert source_analysis['daily.com']['top_entities'] == ['Senate']
+
+
+def test_no_articles():
+    assert NewsAnalyzer().compare_sources([], [], [], RANKINGS) == {}
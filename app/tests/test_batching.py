@@ -0,0 +1,66 @@
+import threading
+import time
+import pytest
+from app.utils.batching import MicroBatcher, BatchQueueFullError
+from app.utils.workers import StageTimeoutError
+
+
+def test_results_keep_item_order():
+    batcher = MicroBatcher('test_order', lambda items: [item * 2 for item in items], max_batch_size=4, max_wait=0.01)
+    assert batcher(list(range(10))) == [item * 2 for item in range(10)]
+    assert batcher.stats()['max_batch_size'] <= 4
+
+
+def test_more_items_than_the_queue_holds():
+    batcher = MicroBatcher('test_overflow', lambda items: items, max_batch_size=2, max_wait=0, max_queue=4)
+    assert batcher(list(range(50))) == list(range(50))
+
+
+def test_concurrent_callers_share_batches():
+    barrier = threading.Barrier(4)
+    batcher = MicroBatcher('test_shared', lambda items: [item + 1 for item in items], max_batch_size=16, max_wait=0.05)
+    results = {}
+    
+    def call(i):
+        barrier.wait()
+        results[i] = batcher([i])
+    
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert results == {i: [i + 1] for i in range(4)}
+    assert batcher.stats()['batches'] < 4
+
+
+def test_timeout():
+    release = threading.Event()
+    batcher = MicroBatcher('test_timeout', lambda items: release.wait() and items, max_wait=0, timeout=0.1)
+    with pytest.raises(StageTimeoutError):
+        batcher([1])
+    release.set()
+
+
+def test_full_queue_rejects_new_requests():
+    release = threading.Event()
+    batcher = MicroBatcher('test_full', lambda items: release.wait() and items, max_batch_size=1, max_wait=0, max_queue=1)
+    running = batcher.submit('running')
+    # Wait until the loop has taken the first item, so the next one fills the queue
+    while batcher.stats()['queue_depth']:
+        time.sleep(0.001)
+    batcher.submit('queued')
+    with pytest.raises(BatchQueueFullError):
+        batcher(['rejected'])
+    release.set()
+    assert running.result(timeout=1) == 'running'
+
+
+def test_errors_reach_every_caller():
+    def fail(items):
+        raise ValueError('model failed')
+    
+    batcher = MicroBatcher('test_errors', fail, max_wait=0)
+    with pytest.raises(ValueError):
+        batcher([1, 2])
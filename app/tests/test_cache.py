@@ -0,0 +1,51 @@
+import time
+from app.utils.cache import ResultCache, make_key
+
+
+def test_key_ignores_whitespace_but_not_parameters():
+    assert make_key('a  b\n c', 'model') == make_key('a b c', 'model')
+    assert make_key('a b c', 'model') != make_key('a b c', 'other')
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = ResultCache('test_lru', max_entries=2, disk=False)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_entries_expire():
+    cache = ResultCache('test_ttl', disk=True)
+    cache.set('a', 1, ttl=0.05)
+    assert cache.get('a') == 1
+    time.sleep(0.1)
+    assert cache.get('a', 'missing') == 'missing'
+
+
+def test_disk_tier_outlives_the_process_tier():
+    ResultCache('test_disk', disk=True).set('a', {'value': 1})
+    cache = ResultCache('test_disk', disk=True)
+    assert cache.get('a') == {'value': 1}
+    assert cache.stats()['disk_hits'] == 1
+
+
+def test_unreadable_rows_are_misses():
+    cache = ResultCache('test_corrupt', disk=True)
+    cache.set('a', 1)
+    with cache._connection() as conn:
+        conn.execute('UPDATE cache SET value = ?', (b'\x80\x04truncated',))
+    
+    cache = ResultCache('test_corrupt', disk=True)
+    assert cache.get('a') is None
+    assert cache.stats()['misses'] == 1
+    assert cache._connection().execute('SELECT COUNT(*) FROM cache').fetchone()[0] == 0
+
+
+def test_disabled_cache_stores_nothing():
+    cache = ResultCache('test_disabled', enabled=False)
+    cache.set('a', 1)
+    assert cache.get('a') is None
@@ -0,0 +1,24 @@
+from app.utils.dedup import NearDuplicateDetector
+
+STORY = (
+    "The central bank raised interest rates by a quarter point on Wednesday, its third increase this year, "
+    "citing persistent inflation in services and a labor market that remains tight despite slowing growth. "
+    "Officials signaled that further increases were possible if price pressures do not ease in the coming months."
+)
+OTHER = (
+    "A powerful storm brought heavy snow and high winds to the northern plains over the weekend, "
+    "closing highways and knocking out power to tens of thousands of homes as crews worked through the night."
+)
+
+
+def test_syndicated_copies_share_a_cluster():
+    copy = STORY.replace('Wednesday', 'Wednesday afternoon') + ' Reporting by our staff.'
+    assert NearDuplicateDetector().cluster([STORY, OTHER, copy]) == [0, 1, 0]
+
+
+def test_distinct_and_empty_texts_stay_apart():
+    assert NearDuplicateDetector().cluster([STORY, OTHER, '', None]) == [0, 1, 2, 3]
+
+
+def test_cluster_id_is_the_first_member():
+    assert NearDuplicateDetector().cluster([OTHER, STORY, STORY, OTHER]) == [0, 1, 1, 0]
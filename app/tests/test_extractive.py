@@ -0,0 +1,43 @@
+import numpy as np
+from app.models.extractive import ExtractiveSummarizer, split_sentences
+
+TEXT = (
+    "The city council approved a new budget for public transit on Tuesday. "
+    "The budget adds bus routes and extends late night train service across the city. "
+    "Council members said the transit budget was the largest in a decade. "
+    "A local bakery also celebrated its fiftieth anniversary with free pastries. "
+    "Riders welcomed the added bus routes, though some questioned how the transit budget would be funded. "
+    "The mayor is expected to sign the budget next week."
+)
+
+
+def test_split_sentences():
+    assert split_sentences('One. "Two!" Three? Four') == ['One.', '"Two!"', 'Three?', 'Four']
+
+
+def test_summary_keeps_central_sentences_in_order():
+    summary = ExtractiveSummarizer(num_sentences=2).summarize(TEXT)
+    sentences = split_sentences(summary)
+    assert len(sentences) == 2
+    assert all(sentence in TEXT for sentence in sentences)
+    assert 'bakery' not in summary
+    assert TEXT.index(sentences[0]) < TEXT.index(sentences[1])
+
+
+def test_short_texts_are_returned_unchanged():
+    assert ExtractiveSummarizer().summarize('Too short to summarize.') == 'Too short to summarize.'
+    assert ExtractiveSummarizer().summarize('') == ''
+
+
+def test_similarity_is_cosine():
+    summarizer = ExtractiveSummarizer()
+    sentences = split_sentences(TEXT)
+    scores, similarity = summarizer.score_sentences(sentences)
+    assert scores.shape == (len(sentences),)
+    assert np.allclose(np.diag(similarity), 1)
+    assert np.allclose(similarity, similarity.T)
+    assert similarity.max() <= 1 + 1e-9
+
+
+def test_summarize_batch():
+    assert ExtractiveSummarizer(num_sentences=1).summarize_batch([TEXT, ''])[1] == ''
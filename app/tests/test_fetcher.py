@@ -0,0 +1,115 @@
+from datetime import datetime
+import pytest
+import requests
+from app.pipeline import AnalysisPipeline
+from app.utils.fetcher import ArticleRecord, NewsFetcher, canonicalize_url
+from config import Config
+
+
+@pytest.mark.parametrize('url, canonical', [
+    ('HTTPS://Example.com/World/Story/', 'https://example.com/World/Story'),
+    ('https://example.com/story?utm_source=feed&id=7&fbclid=abc', 'https://example.com/story?id=7'),
+    ('https://example.com/story?b=2&a=1#comments', 'https://example.com/story?a=1&b=2'),
+    ('https://example.com', 'https://example.com/'),
+    ('  https://example.com/story  ', 'https://example.com/story')
+])
+def test_canonicalize_url(url, canonical):
+    assert canonicalize_url(url) == canonical
+
+
+class FailingSession:
+    def get(self, url, headers=None, timeout=None):
+        raise requests.Timeout('timed out')
+
+
+def test_failed_revalidation_serves_the_stale_article():
+    fetcher = NewsFetcher()
+    fetcher.session = FailingSession()
+    key = canonicalize_url('https://example.com/story')
+    fetcher.article_cache.set(key, {'article': {'title': 'Cached'}, 'etag': '"v1"', 'last_modified': None, 'fetched_at': 0})
+    
+    assert fetcher.fetch_from_url('https://example.com/story') == {'title': 'Cached'}
+    assert not fetcher.failure_cache.get(key)
+
+
+def test_failed_first_fetch_is_remembered():
+    fetcher = NewsFetcher()
+    fetcher.session = FailingSession()
+    assert fetcher.fetch_from_url('https://example.com/missing') is None
+    assert fetcher.failure_cache.get(canonicalize_url('https://example.com/missing'))
+
+
+def test_article_record_reads_like_a_dict():
+    published = datetime(2024, 5, 1)
+    record = ArticleRecord('Title', 'Body text', 'https://example.com/a', 'example.com', published)
+    assert record['title'] == 'Title'
+    assert record.get('publish_date') == published
+    assert record.get('summary') is None
+    assert dict(record) == {
+        'title': 'Title',
+        'text': 'Body text',
+        'url': 'https://example.com/a',
+        'source': 'example.com',
+        'publish_date': published,
+        'top_image': ''
+    }
+    assert dict(record, cluster_id=3)['cluster_id'] == 3
+    with pytest.raises(KeyError):
+        record['keywords']
+
+
+def test_article_record_has_no_instance_dict():
+    record = ArticleRecord('Title', 'Body text', 'https://example.com/a', 'example.com')
+    assert not hasattr(record, '__dict__')
+
+
+class PagedFetcher(NewsFetcher):
+    """News API listings of numbered URLs; one URL repeats on the next page, one cannot be fetched"""
+    
+    def __init__(self, total):
+        super().__init__(api_key='test', max_workers=2)
+        self.total = total
+        self.pages = []
+    
+    def search_news_api(self, query, language='en', sort_by='publishedAt', page_size=10, page=1):
+        self.pages.append(page)
+        start = (page - 1) * page_size
+        urls = [f'https://example.com/{i}' for i in range(start, min(start + page_size, self.total))]
+        if page == 2:
+            urls[0] = 'https://example.com/0/'
+        return [{'url': url} for url in urls]
+    
+    def fetch_from_url(self, url, timeout=None):
+        if url.endswith('/3'):
+            return None
+        return ArticleRecord('Title', 'Text', url, 'example.com')
+
+
+def test_iter_news_api_pages_in_order(monkeypatch):
+    monkeypatch.setattr('app.utils.fetcher.NEWS_API_MAX_PAGE_SIZE', 4)
+    fetcher = PagedFetcher(total=20)
+    urls = [article['url'] for article in fetcher.iter_news_api('climate', max_articles=10, deadline=0)]
+    assert urls == [f'https://example.com/{i}' for i in (0, 1, 2, 5, 6, 7, 8, 9)]
+    assert fetcher.pages == [1, 2, 3]
+
+
+def test_iter_news_api_keeps_listing_positions(monkeypatch):
+    monkeypatch.setattr('app.utils.fetcher.NEWS_API_MAX_PAGE_SIZE', 4)
+    articles = list(PagedFetcher(total=6).iter_news_api('climate', max_articles=10, include_failed=True, deadline=0))
+    assert [article and article['url'] for article in articles] == [
+        'https://example.com/0', 'https://example.com/1', 'https://example.com/2', None, None, 'https://example.com/5'
+    ]
+
+
+def test_pipeline_caps_the_paged_fetch_budget(monkeypatch):
+    monkeypatch.setattr(Config, 'MICROBATCH_ENABLED', False)
+    monkeypatch.setattr(Config, 'FETCH_DEADLINE', 20)
+    fetcher = PagedFetcher(total=0)
+    deadlines = []
+    monkeypatch.setattr(fetcher, 'iter_news_api', lambda query, max_articles, deadline: deadlines.append(deadline) or [])
+    pipeline = AnalysisPipeline(None, None, None, fetcher, None)
+    
+    pipeline.fetch('climate', max_articles=500)
+    pipeline.fetch('climate', max_articles=500, max_deadline=60)
+    pipeline.fetch('climate', max_articles=20, max_deadline=60)
+    assert deadlines == [1000, 60, 40]
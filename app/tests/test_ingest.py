@@ -0,0 +1,92 @@
+import json
+import pytest
+from app import ingest
+
+
+def write_lines(path, records):
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records))
+    return str(path)
+
+
+def test_json_files_hold_a_list_of_records(tmp_path):
+    (tmp_path / 'a.json').write_text(json.dumps([{'text': 'one'}, {'text': 'two'}]))
+    (tmp_path / 'b.json').write_text(json.dumps({'status': 'ok', 'articles': [{'content': 'three'}]}))
+    write_lines(tmp_path / 'c.jsonl', [{'text': 'four'}])
+    assert [record.get('text') or record.get('content') for record in ingest.iter_records([str(tmp_path)])] == [
+        'one', 'two', 'three', 'four'
+    ]
+
+
+def test_chunks_skip_records_and_keep_unusable_positions():
+    records = [{'text': 'one'}, {'text': ''}, {'text': 'three'}, None, {'text': 'five'}]
+    chunks = list(ingest.iter_chunks(records, chunk_size=2, skip=1))
+    assert [[article and article['text'] for article in chunk] for chunk in chunks] == [[None, 'three'], [None, 'five']]
+
+
+def test_checkpoint_is_replaced_atomically(tmp_path):
+    path = str(tmp_path / 'run.checkpoint.json')
+    assert ingest.load_checkpoint(path) is None
+    ingest.save_checkpoint(path, {'records_done': 3, 'output_bytes': 10})
+    ingest.save_checkpoint(path, {'records_done': 5, 'output_bytes': 20})
+    assert ingest.load_checkpoint(path) == {'records_done': 5, 'output_bytes': 20}
+    assert list(tmp_path.iterdir()) == [tmp_path / 'run.checkpoint.json']
+
+
+class FakePipeline:
+    """Summarizes an article as its text, failing on one text to interrupt a run"""
+    
+    worker_pool = None
+    
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.analyzed = []
+    
+    def deduplicate(self, articles):
+        return articles
+    
+    def analyze_articles(self, articles, tier=None):
+        texts = [article['text'] for article in articles]
+        if self.fail_on in texts:
+            raise RuntimeError('worker died')
+        self.analyzed.extend(texts)
+        return [
+            {'cluster_id': i, 'publish_date': None, 'summary': text, 'summary_tier': tier,
+             'sentiment': {'label': 'NEUTRAL', 'score': 0.5, 'method': 'transformer'}}
+            for i, text in enumerate(texts)
+        ]
+    
+    def run_stage(self, stage, articles):
+        return [{'entities': [], 'word_count': len(article['text'].split())} for article in articles]
+
+
+@pytest.fixture
+def run(monkeypatch, tmp_path):
+    monkeypatch.setattr(ingest.Config, 'TORCH_INTRA_OP_THREADS', 1)
+    monkeypatch.setattr(ingest.Config, 'MICROBATCH_ENABLED', True)
+    monkeypatch.setattr(ingest, 'configure_threads', lambda: None)
+    inputs = write_lines(tmp_path / 'archive.jsonl', [{'text': f'article {i}'} for i in range(7)])
+    output = str(tmp_path / 'results.jsonl')
+    
+    def run(pipeline, *args):
+        monkeypatch.setattr(ingest, 'build_pipeline', lambda workers, store, task_timeout: pipeline)
+        return ingest.main([inputs, '--output', output, '--workers', '1', '--chunk-size', '2',
+                            '--flush-every', '2', '--retries', '0', *args])
+    
+    run.output = output
+    return run
+
+
+def test_resume_continues_after_the_checkpoint(run):
+    with pytest.raises(RuntimeError):
+        run(FakePipeline(fail_on='article 4'))
+    assert ingest.load_checkpoint(run.output + '.checkpoint.json')['records_done'] == 4
+    # A row written after the last checkpoint is dropped on resume
+    with open(run.output, 'a') as f:
+        f.write('{"summary": "article 4"')
+    
+    pipeline = FakePipeline()
+    assert run(pipeline, '--resume') == 0
+    assert pipeline.analyzed == ['article 4', 'article 5', 'article 6']
+    with open(run.output) as f:
+        assert [json.loads(line)['summary'] for line in f] == [f'article {i}' for i in range(7)]
+    assert ingest.load_checkpoint(run.output + '.checkpoint.json')['records_done'] == 7
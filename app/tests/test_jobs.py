@@ -0,0 +1,85 @@
+import threading
+import pytest
+from app.utils.jobs import JobStore, JobStoreFullError
+
+
+@pytest.fixture
+def store():
+    store = JobStore(max_jobs=2, ttl=60, workers=2)
+    yield store
+    store.executor.shutdown(wait=True)
+
+
+def wait(job):
+    for _ in job.iter_events(heartbeat=1):
+        pass
+    return job
+
+
+def test_job_lifecycle(store):
+    started = threading.Event()
+    proceed = threading.Event()
+    
+    def analysis(job, query):
+        job.add_event({'stage': 'fetch', 'query': query})
+        started.set()
+        proceed.wait(5)
+        job.add_event({'stage': 'done'})
+    
+    job = store.submit(analysis, 'markets')
+    assert store.get(job.id) is job
+    assert started.wait(5)
+    assert job.status == 'running'
+    assert job.to_dict()['events'] == [{'stage': 'fetch', 'query': 'markets'}]
+    
+    proceed.set()
+    wait(job)
+    state = job.to_dict(since=1)
+    assert (state['status'], state['error'], state['events'], state['next']) == ('done', None, [{'stage': 'done'}], 2)
+    assert state['finished_at'] >= state['created_at']
+
+
+def test_failed_job_records_the_error(store):
+    def analysis(job):
+        raise ValueError('no articles')
+    
+    job = wait(store.submit(analysis))
+    assert (job.status, job.error) == ('error', 'no articles')
+    assert store.stats()['error'] == 1
+
+
+def test_stream_yields_keep_alives_then_all_events(store):
+    proceed = threading.Event()
+    
+    def analysis(job):
+        proceed.wait(5)
+        job.add_event(1)
+        job.add_event(2)
+    
+    stream = store.submit(analysis).iter_events(heartbeat=0.05)
+    assert next(stream) is None
+    proceed.set()
+    assert [event for event in stream if event is not None] == [1, 2]
+
+
+def test_full_store_rejects_while_jobs_run(store):
+    proceed = threading.Event()
+    jobs = [store.submit(lambda job: proceed.wait(5)) for _ in range(2)]
+    with pytest.raises(JobStoreFullError):
+        store.submit(lambda job: None)
+    
+    proceed.set()
+    for job in jobs:
+        wait(job)
+    # Finished jobs make room, oldest first
+    newest = store.submit(lambda job: None)
+    assert store.get(jobs[0].id) is None
+    assert store.get(jobs[1].id) is jobs[1]
+    assert store.get(newest.id) is newest
+
+
+def test_finished_jobs_expire_after_the_ttl(store, monkeypatch):
+    job = wait(store.submit(lambda job: None))
+    monkeypatch.setattr(job, 'finished_at', job.finished_at - 61)
+    assert store.get(job.id) is None
+    assert store.stats() == {'queued': 0, 'running': 0, 'done': 0, 'error': 0}
@@ -0,0 +1,67 @@
+from collections import Counter
+from app.models.keyphrases import KeyPhraseExtractor
+
+
+def document(*phrases):
+    return {'ngram_counts': Counter(phrases)}
+
+
+DOCUMENTS = [
+    document('climate', 'climate', 'summit', 'climate summit', 'climate summit', 'said'),
+    document('climate', 'summit', 'climate summit', 'climate summit', 'delegates', 'said'),
+    document('election', 'election', 'ballot', 'said')
+]
+
+
+def test_rank_prefers_distinctive_phrases():
+    corpus_phrases, groups = KeyPhraseExtractor().rank(DOCUMENTS, top_n=2)
+    assert corpus_phrases == ['climate summit', 'climate']
+    assert groups == {}
+
+
+def test_corpus_statistics_demote_common_words():
+    extractor = KeyPhraseExtractor()
+    extractor.update([document('said', 'official')] * 20, [str(i) for i in range(20)])
+    corpus_phrases, _ = extractor.rank([document('said', 'said', 'election')], top_n=1)
+    assert corpus_phrases == ['election']
+
+
+def test_rank_by_group():
+    corpus_phrases, groups = KeyPhraseExtractor().rank(DOCUMENTS, groups=['a', 'a', 'b'], group_top_n=2)
+    assert set(groups) == {'a', 'b'}
+    assert groups['b'][0] == 'election'
+    assert all(phrase != 'election' for phrase in groups['a'])
+
+
+def test_multi_word_phrases_need_repeats():
+    corpus_phrases, _ = KeyPhraseExtractor().rank([document('rare phrase', 'word')])
+    assert corpus_phrases == ['word']
+
+
+def test_rank_without_phrases():
+    assert KeyPhraseExtractor().rank([document()], groups=['a']) == ([], {'a': []})
+
+
+def test_update_counts_each_document_once():
+    extractor = KeyPhraseExtractor()
+    extractor.update(DOCUMENTS, ['1', '2', '3'])
+    extractor.update(DOCUMENTS[:1], ['1'])
+    assert extractor.num_docs() == 3
+    assert list(extractor.doc_freq(['said', 'climate summit', 'unseen'])) == [3, 2, 0]
+
+
+def test_update_prunes_rare_phrases(monkeypatch):
+    extractor = KeyPhraseExtractor()
+    monkeypatch.setattr(extractor.config, 'KEYPHRASE_DF_PRUNE_EVERY', 3)
+    extractor.update(DOCUMENTS, ['1', '2', '3'])
+    assert list(extractor.doc_freq(['said', 'election'])) == [3, 0]
+
+
+def test_corpus_ranking_counts_each_cluster_once():
+    syndicated = document('storm', 'storm', 'power outage', 'power outage')
+    documents = [syndicated, syndicated, syndicated, document('budget', 'budget', 'budget', 'vote')]
+    corpus_phrases, groups = KeyPhraseExtractor().rank(
+        documents, groups=['a', 'b', 'c', 'd'], top_n=1, corpus_rows=[0, 3]
+    )
+    assert corpus_phrases == ['budget']
+    assert set(groups['b']) == {'storm', 'power outage'}
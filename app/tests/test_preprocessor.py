@@ -0,0 +1,20 @@
+import pytest
+from nltk.tokenize import word_tokenize
+from app.utils.preprocessor import TextPreprocessor
+from benchmarks.corpus import load_articles
+
+TEXTS = [
+    "The senator said: \"We cannot wait.\" Markets fell 3.2% on Monday.",
+    "I'm gonna say it, you gotta see https://example.com/x?y=1 and lemme know!",
+    "U.S.-China trade talks (resumed) in Geneva; officials didn't comment.",
+    "ÉCOLE naïve café — résumé",
+    "",
+    "   "
+]
+
+
+@pytest.mark.parametrize('text', TEXTS + [article['text'] for article in load_articles()])
+def test_fast_tokenize_matches_word_tokenize(text):
+    preprocessor = TextPreprocessor()
+    # Cleaned text is one line without punctuation, so sentence splitting does not change word_tokenize's output
+    assert preprocessor.fast_tokenize(text) == word_tokenize(preprocessor.clean_text(text), preserve_line=True)
@@ -0,0 +1,122 @@
+import threading
+import time
+import pytest
+from app.utils.scheduler import RequestBudget, SingleFlight, WatchlistScheduler, WatchlistStore, normalize_query
+
+
+def test_normalize_query():
+    assert normalize_query('  Climate   Change ') == 'climate change'
+
+
+def test_single_flight_shares_one_call():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+    
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return 'result'
+    
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do('key', slow)))
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=lambda: results.append(flight.do('key', slow)))
+    follower.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join()
+    follower.join()
+    
+    assert results == ['result', 'result']
+    assert len(calls) == 1
+    # The key is free again once the call finishes
+    assert flight.do('key', lambda: 'again') == 'again'
+
+
+def test_single_flight_raises_for_every_caller():
+    with pytest.raises(ValueError):
+        SingleFlight().do('key', lambda: int('x'))
+
+
+def test_request_budget():
+    budget = RequestBudget(per_day=24, capacity=2)
+    assert budget.try_acquire() == 0
+    assert budget.try_acquire() == 0
+    assert budget.try_acquire() == pytest.approx(3600, rel=0.01)
+    assert RequestBudget(per_day=0).try_acquire() == 0
+
+
+def test_shared_budget_and_lease(data_paths):
+    first = WatchlistStore()
+    second = WatchlistStore()
+    assert first.try_acquire_request(24, 1) == 0
+    assert second.try_acquire_request(24, 1) == pytest.approx(3600, rel=0.01)
+    
+    assert first.acquire_lease('climate', 'first', ttl=60)
+    assert not second.acquire_lease('climate', 'second', ttl=60)
+    first.release_lease('climate', 'first')
+    assert second.acquire_lease('climate', 'second', ttl=60)
+
+
+class FakePipeline:
+    def __init__(self):
+        self.fetches = 0
+        self.analyzed = []
+    
+    def fetch(self, query):
+        self.fetches += 1
+        return [{'url': 'https://example.com/a'}, {'url': 'https://example.com/b'}]
+    
+    def analyze(self, news_articles, known_results=None):
+        self.analyzed.append([article['url'] for article in news_articles if article['url'] not in (known_results or {})])
+        return {'articles': [{'url': article['url']} for article in news_articles]}
+
+
+def test_refresh_reuses_known_results():
+    pipeline = FakePipeline()
+    scheduler = WatchlistScheduler(pipeline, queries=['Climate'], daily_requests=0)
+    scheduler.refresh('climate')
+    scheduler.refresh('climate')
+    assert pipeline.analyzed == [['https://example.com/a', 'https://example.com/b'], []]
+    
+    snapshot, updated_at = scheduler.get('CLIMATE')
+    assert len(snapshot['articles']) == 2
+    assert scheduler.get('climate', max_age=-1) is None
+    assert scheduler.get('elections') is None
+
+
+def test_processes_share_refreshes():
+    first = WatchlistScheduler(FakePipeline(), queries=['climate'], interval=3600)
+    second_pipeline = FakePipeline()
+    second = WatchlistScheduler(second_pipeline, queries=['climate'], interval=3600)
+    
+    first._scheduled_refresh('climate')
+    second._scheduled_refresh('climate')
+    assert second_pipeline.fetches == 0
+    assert second.get('climate') is not None
+
+
+def test_max_age_follows_the_interval():
+    scheduler = WatchlistScheduler(FakePipeline(), queries=['a', 'b', 'c'], interval=900, jitter=0.2, daily_requests=50)
+    assert scheduler.interval == 24 * 3600 * 3 / 50
+    assert scheduler.max_age >= scheduler.interval * 1.2
+
+
+def test_unreadable_snapshot_is_dropped():
+    first = WatchlistScheduler(FakePipeline(), queries=['climate'], interval=3600)
+    first.refresh('climate')
+    # Pickled by code that no longer exists
+    first.store._connection().execute("UPDATE watchlist_snapshots SET snapshot = ?", (b'capp.removed\nSnapshot\n.',))
+    
+    second_pipeline = FakePipeline()
+    second = WatchlistScheduler(second_pipeline, queries=['climate'], interval=3600)
+    assert second.get('climate') is None
+    assert second.store.snapshot_time('climate') is None
+    
+    second._scheduled_refresh('climate')
+    assert second_pipeline.fetches == 1
+    assert second.get('climate') is not None
@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+import pytest
+import torch
+from app.models.sentiment import SentimentAnalyzer
+from config import Config
+
+NEGATIVE = [0.9, 0.05, 0.05]
+POSITIVE = [0.05, 0.05, 0.9]
+
+
+class FakeTokenizer:
+    """Whitespace tokenizer that cuts overflowing windows like a fast Hugging Face tokenizer"""
+    
+    vocabulary = {'bad': 3, 'good': 4}
+    
+    def __call__(self, texts, truncation=True, max_length=None, stride=0, return_overflowing_tokens=False):
+        input_ids, sample_mapping = [], []
+        for sample, text in enumerate(texts):
+            ids = [self.vocabulary.get(word, 5) for word in text.split()] or [5]
+            starts = range(0, max(len(ids) - stride, 1), max_length - stride) if return_overflowing_tokens else [0]
+            for start in starts:
+                input_ids.append(ids[start:start + max_length])
+                sample_mapping.append(sample)
+        encodings = {'input_ids': input_ids}
+        if return_overflowing_tokens:
+            encodings['overflow_to_sample_mapping'] = sample_mapping
+        return encodings
+    
+    def pad(self, encoded, return_tensors=None):
+        rows = encoded['input_ids']
+        width = max(len(row) for row in rows)
+        return PaddedBatch(
+            input_ids=torch.tensor([row + [0] * (width - len(row)) for row in rows]),
+            attention_mask=torch.tensor([[1] * len(row) + [0] * (width - len(row)) for row in rows])
+        )
+
+
+class PaddedBatch(dict):
+    def to(self, device):
+        return self
+
+
+class FakeModel:
+    """Positive for any window containing 'good', otherwise negative; records each batch size"""
+    
+    device = 'cpu'
+    config = SimpleNamespace(id2label={0: 'negative', 1: 'neutral', 2: 'positive'})
+    
+    def __init__(self):
+        self.batches = []
+    
+    def __call__(self, input_ids, attention_mask):
+        self.batches.append(len(input_ids))
+        probs = [POSITIVE if (row == 4).any() else NEGATIVE for row in input_ids]
+        return SimpleNamespace(logits=torch.tensor(probs).log())
+
+
+def analyzer(model=None):
+    return SentimentAnalyzer(models={'tokenizer': FakeTokenizer(), 'model': model or FakeModel(), 'pipeline': object()})
+
+
+@pytest.fixture
+def short_windows(monkeypatch):
+    monkeypatch.setattr(Config, 'SENTIMENT_MAX_TOKENS', 4)
+    monkeypatch.setattr(Config, 'SENTIMENT_WINDOW_STRIDE', 0)
+
+
+def test_batch_scores_each_text(short_windows):
+    model = FakeModel()
+    results = analyzer(model).analyze_sentiment_batch(['good news', 'bad news', 'good', ''], batch_size=3)
+    assert [result['label'] for result in results] == ['positive', 'negative', 'positive', 'negative']
+    assert results[0]['score'] == pytest.approx(0.9)
+    assert all(result['method'] == 'transformer' for result in results)
+    assert model.batches == [3, 1]
+
+
+def test_truncation_reads_only_the_first_window(short_windows):
+    result = analyzer().analyze_sentiment_batch(['bad bad bad bad good good'], windowed=False)[0]
+    assert (result['label'], result['score']) == ('negative', pytest.approx(0.9))
+
+
+def test_windows_are_averaged_by_length(short_windows):
+    # A 4-token negative window and a 2-token positive one
+    result = analyzer().analyze_sentiment_batch(['bad bad bad bad good good'], windowed=True)[0]
+    assert result['label'] == 'negative'
+    assert result['score'] == pytest.approx((0.9 * 4 + 0.05 * 2) / 6)
+
+
+def test_windowed_results_are_cached_separately(short_windows):
+    model = FakeModel()
+    sentiment_analyzer = analyzer(model)
+    text = 'bad bad bad bad good good'
+    sentiment_analyzer.analyze_sentiment_batch([text], windowed=False)
+    sentiment_analyzer.analyze_sentiment_batch([text], windowed=False)
+    assert len(model.batches) == 1
+    sentiment_analyzer.analyze_sentiment_batch([text], windowed=True)
+    assert len(model.batches) == 2
+
+
+def test_without_a_model_textblob_scores_the_batch():
+    sentiment_analyzer = SentimentAnalyzer(models={'pipeline': None})
+    results = sentiment_analyzer.analyze_sentiment_batch(['This is a wonderful, excellent result.'])
+    assert results[0]['method'] == 'textblob'
+    assert results[0]['label'] == 'POSITIVE'
+
+
+def test_stats_normalize_label_case():
+    stats = SentimentAnalyzer(models={}).get_sentiment_stats([
+        {'label': 'positive'}, {'label': 'POSITIVE'}, {'label': 'negative'}, {'label': 'Neutral'}
+    ])
+    assert stats == {'positive_count': 2, 'negative_count': 1, 'neutral_count': 1, 'total': 4}
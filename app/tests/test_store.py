@@ -0,0 +1,78 @@
+import time
+from datetime import datetime, timedelta
+import pytest
+from app.utils.store import ArticleStore
+
+HOUR = 3600
+
+
+@pytest.fixture
+def store(data_paths):
+    return ArticleStore(db_path=str(data_paths / 'articles.db'), bucket_seconds=HOUR)
+
+
+def ingest(store, url, text, lemmas, entities=(), hours_ago=0, title=None):
+    article = {
+        'url': url,
+        'text': text,
+        'title': title or text,
+        'source': 'wire.com',
+        'publish_date': datetime.now() - timedelta(hours=hours_ago)
+    }
+    document = {'word_count': len(lemmas), 'lemmas': lemmas, 'entities': list(entities)}
+    return store.add_articles([article], [document], [{'label': 'POSITIVE', 'score': 0.9}])
+
+
+def test_articles_are_added_once(store):
+    assert ingest(store, 'https://a.com/1', 'rates rise', ['rate', 'rise']) == 1
+    assert ingest(store, 'https://a.com/1', 'rates rise again', ['rate', 'rise']) == 0
+    assert store.article_count() == 1
+    assert store.search('rate')[0]['title'] == 'rates rise'
+
+
+def test_articles_without_url_are_matched_by_content(store):
+    assert ingest(store, None, 'rates  rise', ['rate', 'rise']) == 1
+    # Whitespace differences do not make a new article
+    assert ingest(store, '', 'rates rise', ['rate', 'rise']) == 0
+    assert ingest(store, None, 'rates fall', ['rate', 'fall']) == 1
+    assert store.article_count() == 2
+
+
+def test_repeated_upserts_do_not_inflate_term_counts(store):
+    for _ in range(3):
+        ingest(store, 'https://a.com/1', 'rates', ['rate', 'rate'], [('Fed', 'ORG')])
+    ingest(store, 'https://a.com/2', 'rates', ['rate'], [('Fed', 'ORG')])
+    
+    assert store.search('rate') == [
+        {'title': 'rates', 'url': 'https://a.com/1', 'source': 'wire.com', 'published_at': pytest.approx(time.time(), abs=60),
+         'sentiment': 'POSITIVE', 'count': 2},
+        {'title': 'rates', 'url': 'https://a.com/2', 'source': 'wire.com', 'published_at': pytest.approx(time.time(), abs=60),
+         'sentiment': 'POSITIVE', 'count': 1}
+    ]
+    assert store.trending('entity', min_docs=1)[0]['documents'] == 2
+
+
+def test_trending_only_counts_the_window(store):
+    ingest(store, 'https://a.com/1', 'one', ['storm', 'vote'])
+    ingest(store, 'https://a.com/2', 'two', ['storm', 'vote'])
+    ingest(store, 'https://a.com/3', 'three', ['vote'], hours_ago=2)
+    ingest(store, 'https://a.com/4', 'four', ['vote'], hours_ago=48)
+    
+    ranked = {row['term']: row for row in store.trending(hours=1, min_docs=2)}
+    assert set(ranked) == {'storm', 'vote'}
+    assert ranked['vote']['documents'] == 2
+    assert ranked['vote']['doc_freq'] == 4
+    # Rarer terms score higher for the same in-window document count
+    assert ranked['storm']['score'] > ranked['vote']['score']
+    
+    assert store.trending(hours=24, min_docs=3)[0]['documents'] == 3
+
+
+def test_term_trend_buckets(store):
+    ingest(store, 'https://a.com/1', 'one', [], [('Fed', 'ORG'), ('Fed', 'ORG')])
+    ingest(store, 'https://a.com/2', 'two', [], [('Fed', 'ORG')], hours_ago=3)
+    ingest(store, 'https://a.com/3', 'three', [], [('Fed', 'ORG')], hours_ago=24 * 30)
+    
+    trend = store.term_trend('Fed')
+    assert [(row['documents'], row['count']) for row in trend] == [(1, 1), (1, 2)]
+    assert trend[1]['bucket'] - trend[0]['bucket'] == 3 * HOUR
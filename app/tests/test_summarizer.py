@@ -0,0 +1,158 @@
+import re
+import pytest
+import torch
+from app.models.summarizer import TextSummarizer
+from config import Config
+
+BOS, PAD, EOS = 0, 1, 2
+
+
+class FakeTokenizer:
+    """Word-level tokenizer with BART's special-token layout"""
+    
+    def __init__(self):
+        self.vocabulary = {}
+        self.words = {}
+    
+    def _id(self, word):
+        if word not in self.vocabulary:
+            self.vocabulary[word] = len(self.vocabulary) + 3
+            self.words[self.vocabulary[word]] = word
+        return self.vocabulary[word]
+    
+    def __call__(self, texts, add_special_tokens=False, return_offsets_mapping=False):
+        matches = [list(re.finditer(r'\S+', text)) for text in texts]
+        return {
+            'input_ids': [[self._id(match.group()) for match in text] for text in matches],
+            'offset_mapping': [[match.span() for match in text] for text in matches]
+        }
+    
+    def num_special_tokens_to_add(self):
+        return 2
+    
+    def build_inputs_with_special_tokens(self, input_ids):
+        return [BOS] + list(input_ids) + [EOS]
+    
+    def pad(self, encoded, return_tensors=None):
+        rows = encoded['input_ids']
+        width = max(len(row) for row in rows)
+        return PaddedBatch(
+            input_ids=torch.tensor([row + [PAD] * (width - len(row)) for row in rows]),
+            attention_mask=torch.tensor([[1] * len(row) + [0] * (width - len(row)) for row in rows])
+        )
+    
+    def batch_decode(self, output_ids, skip_special_tokens=True, clean_up_tokenization_spaces=True):
+        return [' '.join(self.words[int(i)] for i in row if int(i) > EOS) for row in output_ids]
+
+
+class PaddedBatch(dict):
+    def to(self, device):
+        return self
+
+
+class FakeModel:
+    """'Summarizes' each input as its first few words and records every generate call"""
+    
+    device = 'cpu'
+    
+    def __init__(self, summary_words=5, max_batch=None):
+        self.summary_words = summary_words
+        self.max_batch = max_batch
+        self.calls = []
+    
+    def generate(self, input_ids, attention_mask, **kwargs):
+        if self.max_batch and len(input_ids) > self.max_batch:
+            raise RuntimeError('out of memory')
+        self.calls.append([int(length) for length in attention_mask.sum(dim=1)])
+        return input_ids[:, :1 + self.summary_words]
+
+
+def article(name, words):
+    """A text of the given number of words, each tagged with the article name"""
+    return ' '.join(f'{name}{i}' for i in range(words))
+
+
+def summarizer(model=None):
+    return TextSummarizer(models={'tokenizer': FakeTokenizer(), 'model': model or FakeModel()})
+
+
+def test_summarize_batch_keeps_input_order():
+    model = FakeModel()
+    texts = [article('a', 120), 'too short', article('b', 60), article('c', 90), '']
+    summaries = summarizer(model).summarize_batch(texts, batch_size=2)
+    
+    assert summaries == [article('a', 5), 'too short', article('b', 5), article('c', 5), '']
+    # Length-sorted batches: the two shortest inputs share the first call
+    assert model.calls == [[62, 92], [122]]
+
+
+def test_summarize_batch_uses_the_cache():
+    model = FakeModel()
+    text_summarizer = summarizer(model)
+    text_summarizer.summarize_batch([article('a', 60)])
+    assert text_summarizer.summarize_batch([article('a', 60), article('b', 60)]) == [article('a', 5), article('b', 5)]
+    assert model.calls == [[62], [62]]
+
+
+def test_failed_batch_falls_back_per_item():
+    model = FakeModel(max_batch=1)
+    texts = [article('a', 60), article('b', 70), article('c', 80)]
+    assert summarizer(model).summarize_batch(texts, batch_size=3) == [article(name, 5) for name in 'abc']
+    assert model.calls == [[62], [72], [82]]
+
+
+def test_failed_item_falls_back_to_extractive(monkeypatch):
+    text_summarizer = summarizer(FakeModel(max_batch=-1))
+    monkeypatch.setattr(text_summarizer.extractive, 'summarize', lambda text: 'extractive')
+    assert text_summarizer.summarize_batch([article('a', 60)]) == ['extractive']
+
+
+@pytest.fixture
+def small_inputs(monkeypatch):
+    # 40 content tokens per model input
+    monkeypatch.setattr(Config, 'SUMMARY_MAX_INPUT_TOKENS', 42)
+
+
+def sentences(count, words=10):
+    return ' '.join(f"{' '.join(f's{n}w{i}' for i in range(words - 1))} s{n}end." for n in range(count))
+
+
+def test_chunks_break_between_sentences(small_inputs):
+    text_summarizer = summarizer()
+    text = sentences(12)
+    input_ids, offsets = text_summarizer._encode([text])
+    chunks = text_summarizer._chunk_by_sentences(text, input_ids[0], offsets[0])
+    
+    assert [len(chunk) for chunk in chunks] == [40, 40, 40]
+    assert text_summarizer.tokenizer.words[chunks[1][0]] == 's4w0'
+
+
+def test_long_sentences_are_split_on_tokens(small_inputs):
+    text_summarizer = summarizer()
+    text = sentences(1, words=90)
+    input_ids, offsets = text_summarizer._encode([text])
+    assert [len(chunk) for chunk in text_summarizer._chunk_by_sentences(text, input_ids[0], offsets[0])] == [40, 40, 10]
+
+
+def test_long_documents_are_map_reduced(small_inputs):
+    model = FakeModel()
+    summary = summarizer(model).summarize_batch([sentences(12)])[0]
+    
+    # Map over three chunks, then one reduce over their joined summaries
+    assert model.calls[0] == [42, 42, 42]
+    assert model.calls[1] == [17]
+    assert summary == 's0w0 s0w1 s0w2 s0w3 s0w4'
+
+
+def test_map_reduce_stops_at_the_chunk_limit(small_inputs, monkeypatch):
+    monkeypatch.setattr(Config, 'SUMMARY_MAX_CHUNKS', 2)
+    model = FakeModel()
+    summarizer(model).summarize(sentences(12))
+    assert model.calls[0] == [42, 42]
+
+
+def test_long_documents_are_truncated_when_disabled(small_inputs, monkeypatch):
+    monkeypatch.setattr(Config, 'SUMMARY_LONG_DOCUMENTS', False)
+    model = FakeModel()
+    summarizer(model).summarize(sentences(12))
+    assert model.calls == [[42]]
@@ -0,0 +1,123 @@
+import multiprocessing
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+import pytest
+from app.utils import workers
+from app.utils.workers import PoolFullError, StageTimeoutError, WorkerPool, claim_host_pool
+
+
+class FakeExecutor:
+    """Runs nothing; each stage's future is completed by the test"""
+    
+    def __init__(self):
+        self.futures = []
+        self.shut_down = False
+    
+    def submit(self, fn, *args):
+        future = Future()
+        if fn is not workers._warm_up:
+            self.futures.append(future)
+        return future
+    
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+        if cancel_futures:
+            for future in self.futures:
+                future.cancel()
+
+
+class FakePool(WorkerPool):
+    def _create_executor(self):
+        self._warmed_workers = multiprocessing.Value('i', 0)
+        return FakeExecutor()
+
+
+def test_full_queue_is_rejected():
+    pool = FakePool(num_workers=1, queue_size=1, stages=['wordcloud'])
+    pool.submit('wordcloud', 'text')
+    pool.submit('wordcloud', 'text')
+    with pytest.raises(PoolFullError):
+        pool.submit('wordcloud', 'text')
+    assert pool.stats()['pending_stages'] == {'wordcloud': 2}
+
+
+def test_timeout():
+    pool = FakePool(num_workers=1, queue_size=0, stages=['wordcloud'])
+    with pytest.raises(StageTimeoutError):
+        pool.run('wordcloud', 'text', timeout=0.01)
+
+
+def test_broken_pool_is_restarted_once():
+    pool = FakePool(num_workers=2, queue_size=2, stages=['wordcloud'])
+    broken = pool.executor
+    errors = []
+    
+    def run():
+        try:
+            pool.run('wordcloud', 'text')
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=run) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while len(broken.futures) < 3:
+        time.sleep(0.001)
+    for future in broken.futures:
+        future.set_exception(BrokenProcessPool('worker died'))
+    for thread in threads:
+        thread.join()
+    
+    assert broken.shut_down
+    replacement = pool.executor
+    assert replacement is not broken and not replacement.shut_down
+    assert [type(e) for e in errors] == [PoolFullError] * 3
+    
+    # Work queued on the replacement is not cancelled by a late restart of the broken pool
+    future = pool.submit('wordcloud', 'text')
+    pool._restart(broken)
+    assert pool.executor is replacement and not future.cancelled()
+
+
+def test_cancelled_task_is_retryable():
+    pool = FakePool(num_workers=1, queue_size=1, stages=['wordcloud'])
+    executor = pool.executor
+    threading.Timer(0.05, lambda: executor.shutdown(cancel_futures=True)).start()
+    with pytest.raises(PoolFullError):
+        pool.run('wordcloud', 'text')
+
+
+@pytest.mark.skipif(workers.fcntl is None, reason='needs fcntl')
+def test_host_pool_lock_waits_for_the_previous_owner(data_paths, monkeypatch):
+    monkeypatch.setattr(workers, '_host_lock', None)
+    path = str(data_paths / 'worker_pool.lock')
+    holder = subprocess.Popen([
+        sys.executable, '-c',
+        f'import time; from app.utils.workers import claim_host_pool; claim_host_pool({path!r}); print(flush=True); time.sleep(1)'
+    ], stdout=subprocess.PIPE)
+    holder.stdout.readline()
+    
+    with pytest.raises(RuntimeError):
+        claim_host_pool(path, timeout=0)
+    claim_host_pool(path, timeout=10)
+    assert workers._host_lock is not None
+    workers._host_lock.close()
+    holder.wait()
+
+
+def test_warm_up_counts_every_worker():
+    pool = FakePool(num_workers=2, stages=['wordcloud'])
+    broken = pool.executor
+    workers._init_worker([], pool._warmed_workers)
+    assert not pool.warmed_up()
+    workers._init_worker([], pool._warmed_workers)
+    assert pool.warmed_up()
+    assert pool.stats()['warmed_workers'] == 2
+    
+    # A replacement pool loads its models again
+    pool._restart(broken)
+    assert not pool.warmed_up()
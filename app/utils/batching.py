@@ -0,0 +1,150 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from app.utils.workers import PoolFullError, StageTimeoutError
+from config import Config
+
+# Every batcher created in this process, by name
+_batchers = {}
+
+
+def get_batcher_stats():
+    """Queue and batch size metrics for every batcher in this process"""
+    return {name: batcher.stats() for name, batcher in _batchers.items()}
+
+
+class BatchQueueFullError(PoolFullError):
+    """Raised when a batcher's queue is full"""
+
+
+class MicroBatcher:
+    """Collects single items from many request threads into batched model calls"""
+    
+    def __init__(self, name, batch_fn, max_batch_size=None, max_wait=None, max_queue=None, timeout=None, concurrency=1):
+        self.config = Config()
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size or self.config.MICROBATCH_MAX_SIZE
+        self.max_wait = max_wait if max_wait is not None else self.config.MICROBATCH_MAX_WAIT_MS / 1000
+        self.timeout = timeout or self.config.MICROBATCH_TIMEOUT
+        self._queue = queue.Queue(maxsize=max_queue or self.config.MICROBATCH_QUEUE_SIZE)
+        
+        # Up to `concurrency` batches run at once, e.g. one per worker process behind batch_fn
+        self.concurrency = max(1, concurrency)
+        self._running = threading.Semaphore(self.concurrency)
+        self._executor = None
+        if self.concurrency > 1:
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix=f'batcher-{name}')
+        
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.wait_seconds = 0.0
+        self.batch_sizes = Counter()
+        
+        self._thread = threading.Thread(target=self._loop, name=f'batcher-{name}', daemon=True)
+        self._thread.start()
+        _batchers[name] = self
+    
+    def submit(self, item, timeout=None):
+        """Queue one item and return a future for its result; waits up to timeout for room if given"""
+        future = Future()
+        try:
+            if timeout is None:
+                self._queue.put_nowait((item, future, time.monotonic()))
+            else:
+                self._queue.put((item, future, time.monotonic()), timeout=timeout)
+        except queue.Full:
+            raise BatchQueueFullError(f"Batch queue '{self.name}' is full")
+        return future
+    
+    def __call__(self, items):
+        """Run items through the shared batches and return their results in order"""
+        futures = []
+        deadline = time.monotonic() + self.timeout
+        try:
+            for item in items:
+                # A new request is turned away when the queue is full; once accepted,
+                # its remaining items wait for room, so any number of items fits through
+                timeout = max(0, deadline - time.monotonic()) if futures else None
+                futures.append(self.submit(item, timeout))
+        except BatchQueueFullError:
+            for future in futures:
+                future.cancel()
+            if futures:
+                raise StageTimeoutError(f"Batch stage '{self.name}' timed out waiting for queue space")
+            raise
+        
+        try:
+            return [future.result(timeout=self.timeout) for future in futures]
+        except TimeoutError:
+            for future in futures:
+                future.cancel()
+            raise StageTimeoutError(f"Batch stage '{self.name}' timed out")
+    
+    def _loop(self):
+        while True:
+            # Form a batch only once it can start, so items keep collecting while all slots are busy
+            self._running.acquire()
+            batch = [self._queue.get()]
+            
+            # Wait up to max_wait for more items to share the call
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            if self._executor:
+                self._executor.submit(self._run, batch)
+            else:
+                self._run(batch)
+    
+    def _run(self, batch):
+        try:
+            self._run_batch(batch)
+        finally:
+            self._running.release()
+    
+    def _run_batch(self, batch):
+        # Skip items whose caller has already given up
+        batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        
+        now = time.monotonic()
+        with self._lock:
+            self.batches += 1
+            self.items += len(batch)
+            self.wait_seconds += sum(now - enqueued_at for _, _, enqueued_at in batch)
+            self.batch_sizes[len(batch)] += 1
+        
+        try:
+            results = self.batch_fn([item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"Batch stage '{self.name}' returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'batches': self.batches,
+                'items': self.items,
+                'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+                'max_batch_size': max(self.batch_sizes) if self.batch_sizes else 0,
+                'mean_wait_ms': 1000 * self.wait_seconds / self.items if self.items else 0.0,
+                'batch_sizes': dict(self.batch_sizes)
+            }
\ No newline at end of file
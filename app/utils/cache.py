@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from app.utils.metrics import metrics
+from config import Config
+
+# Every cache created in this process, by namespace
+_caches = {}
+
+
+def make_key(text, *params):
+    """Content-addressed key from whitespace-normalized text plus model/generation parameters"""
+    normalized = ' '.join((text or '').split())
+    digest = hashlib.sha256()
+    digest.update(normalized.encode('utf-8'))
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def get_cache_stats():
+    """Hit/miss counters for every cache in this process"""
+    return {namespace: cache.stats() for namespace, cache in _caches.items()}
+
+
+class ResultCache:
+    """Two-tier cache: an in-process LRU in front of an optional SQLite file shared between workers"""
+
+    def __init__(self, namespace, max_entries=None, ttl=None, disk=None, enabled=None):
+        self.config = Config()
+        self.namespace = namespace
+        # enabled=True keeps entries that must outlive the request even when caching is turned off
+        self.enabled = self.config.CACHE_ENABLED if enabled is None else enabled
+        self.max_entries = max_entries or self.config.CACHE_MAX_ENTRIES
+        self.ttl = ttl or self.config.CACHE_TTL
+        self.disk = self.config.CACHE_DISK_ENABLED if disk is None else disk
+        self.db_path = self.config.CACHE_DB_PATH
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.enabled and self.disk:
+            try:
+                self._connection()
+            except sqlite3.Error as e:
+                print(f"Error opening cache database {self.db_path}: {e}")
+                metrics.increment('errors_total', component='cache')
+                self.disk = False
+
+        _caches[namespace] = self
+
+    def _connection(self):
+        """Return this thread's SQLite connection, reopening it after a fork"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'namespace TEXT, key TEXT, expires_at REAL, value BLOB, '
+                'PRIMARY KEY (namespace, key))'
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default"""
+        if not self.enabled:
+            return default
+
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        if self.disk:
+            try:
+                row = self._connection().execute(
+                    'SELECT expires_at, value FROM cache WHERE namespace = ? AND key = ?',
+                    (self.namespace, key)
+                ).fetchone()
+            except sqlite3.Error as e:
+                print(f"Error reading from cache {self.namespace}: {e}")
+                metrics.increment('errors_total', component='cache')
+                row = None
+            if row is not None and row[0] > now:
+                try:
+                    value = pickle.loads(row[1])
+                except Exception as e:
+                    # Written by an older version of a class, or truncated: drop it and recompute
+                    print(f"Error unpickling cache entry in {self.namespace}: {e}")
+                    metrics.increment('errors_total', component='cache')
+                    self._discard(key)
+                else:
+                    self._remember(key, value, row[0])
+                    with self._lock:
+                        self.disk_hits += 1
+                    return value
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def set(self, key, value, ttl=None):
+        """Store value under key in both tiers"""
+        if not self.enabled:
+            return
+
+        expires_at = time.time() + (ttl or self.ttl)
+        self._remember(key, value, expires_at)
+
+        if self.disk:
+            try:
+                conn = self._connection()
+                with conn:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO cache (namespace, key, expires_at, value) VALUES (?, ?, ?, ?)',
+                        (self.namespace, key, expires_at, pickle.dumps(value))
+                    )
+                    self._writes += 1
+                    # Purge expired rows every so often instead of on every write
+                    if self._writes % 500 == 0:
+                        conn.execute('DELETE FROM cache WHERE expires_at <= ?', (time.time(),))
+            except sqlite3.Error as e:
+                print(f"Error writing to cache {self.namespace}: {e}")
+                metrics.increment('errors_total', component='cache')
+
+    def _discard(self, key):
+        """Delete key from the disk tier"""
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute('DELETE FROM cache WHERE namespace = ? AND key = ?', (self.namespace, key))
+        except sqlite3.Error as e:
+            print(f"Error writing to cache {self.namespace}: {e}")
+            metrics.increment('errors_total', component='cache')
+
+    def _remember(self, key, value, expires_at):
+        """Insert into the in-process LRU tier, evicting the oldest entries when full"""
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry in this namespace"""
+        with self._lock:
+            self._entries.clear()
+        if self.disk:
+            conn = self._connection()
+            with conn:
+                conn.execute('DELETE FROM cache WHERE namespace = ?', (self.namespace,))
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0
+            }
@@ -0,0 +1,74 @@
+import re
+import zlib
+import numpy as np
+from config import Config
+
+WORD = re.compile(r'\w+')
+
+# Permutations are (a * x + b) mod a Mersenne prime, which stays inside uint64 for 31-bit x
+PRIME = (1 << 31) - 1
+
+
+class NearDuplicateDetector:
+    """Clusters near-identical articles with MinHash signatures and LSH banding"""
+    
+    def __init__(self, threshold=None, num_perm=None, bands=None, shingle_size=None, seed=1):
+        self.config = Config()
+        self.threshold = threshold or self.config.DEDUP_THRESHOLD
+        self.num_perm = num_perm or self.config.DEDUP_NUM_PERM
+        self.bands = bands or self.config.DEDUP_BANDS
+        self.shingle_size = shingle_size or self.config.DEDUP_SHINGLE_SIZE
+        if self.num_perm % self.bands:
+            raise ValueError('DEDUP_NUM_PERM must be a multiple of DEDUP_BANDS')
+        self.rows = self.num_perm // self.bands
+        
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, PRIME, size=(self.num_perm, 1)).astype(np.uint64)
+        self._b = rng.randint(0, PRIME, size=(self.num_perm, 1)).astype(np.uint64)
+    
+    def shingles(self, text):
+        """Hashes of the overlapping word k-grams of a text"""
+        words = WORD.findall((text or '').lower())
+        if not words:
+            return np.empty(0, dtype=np.uint64)
+        
+        k = min(self.shingle_size, len(words))
+        hashes = {zlib.crc32(' '.join(words[i:i + k]).encode('utf-8')) % PRIME for i in range(len(words) - k + 1)}
+        return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+    
+    def signature(self, text):
+        """MinHash signature of a text, or None when it has no words"""
+        shingles = self.shingles(text)
+        if not shingles.size:
+            return None
+        return ((self._a * shingles + self._b) % np.uint64(PRIME)).min(axis=1)
+    
+    def cluster(self, texts):
+        """Cluster id per text: the index of the first text in its near-duplicate group"""
+        signatures = [self.signature(text) for text in texts]
+        parent = list(range(len(texts)))
+        
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+        
+        # Texts sharing any band are candidates; keep pairs whose estimated Jaccard clears the threshold
+        for band in range(self.bands):
+            buckets = {}
+            for i, signature in enumerate(signatures):
+                if signature is None:
+                    continue
+                key = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+                first = buckets.setdefault(key, i)
+                if first == i:
+                    continue
+                
+                root_i, root_first = find(i), find(first)
+                if root_i == root_first:
+                    continue
+                if np.mean(signatures[first] == signature) >= self.threshold:
+                    parent[max(root_i, root_first)] = min(root_i, root_first)
+        
+        return [find(i) for i in range(len(texts))]
\ No newline at end of file
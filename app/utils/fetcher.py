@@ -1,72 +1,376 @@
 import requests
+from requests.adapters import HTTPAdapter
 from newspaper import Article
 from bs4 import BeautifulSoup
 import json
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor, wait, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+import threading
 import time
+from app.utils.cache import ResultCache, make_key
+from app.utils.metrics import metrics
+from config import Config
+
+# Query parameters that only track the visitor and never change the article
+TRACKING_PARAMS = {'fbclid', 'gclid', 'ocid', 'cmpid', 'mc_cid', 'mc_eid'}
+
+# Largest pageSize News API accepts
+NEWS_API_MAX_PAGE_SIZE = 100
+
+
+def canonicalize_url(url):
+    """Normalize a URL so equivalent article links share one cache entry"""
+    parts = urlparse(url.strip())
+    query = [
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not name.lower().startswith('utm_') and name.lower() not in TRACKING_PARAMS
+    ]
+    path = parts.path.rstrip('/') or '/'
+    return urlunparse((
+        parts.scheme.lower(),
+        parts.netloc.lower(),
+        path,
+        parts.params,
+        urlencode(sorted(query)),
+        ''
+    ))
+
+
+class ArticleRecord(Mapping):
+    """A fetched article with only the fields the pipeline reads, in slots; reads like the dict records"""
+    
+    __slots__ = ('title', 'text', 'url', 'source', 'publish_date', 'top_image')
+    
+    def __init__(self, title, text, url, source, publish_date=None, top_image=''):
+        self.title = title
+        self.text = text
+        self.url = url
+        self.source = source
+        self.publish_date = publish_date
+        self.top_image = top_image
+    
+    def __getitem__(self, name):
+        if name not in self.__slots__:
+            raise KeyError(name)
+        return getattr(self, name)
+    
+    def __iter__(self):
+        return iter(self.__slots__)
+    
+    def __len__(self):
+        return len(self.__slots__)
+    
+    def __repr__(self):
+        return f"ArticleRecord(url={self.url!r}, title={self.title!r})"
+
 
 class NewsFetcher:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, max_workers=None, per_host_limit=None, deadline=None, compact=None):
         self.api_key = api_key
+        self.config = Config()
+        # Compact records skip newspaper's nlp() summary and keywords, which the pipeline does not use
+        self.compact = self.config.FETCH_COMPACT_ARTICLES if compact is None else compact
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        
+        self.max_workers = max_workers or self.config.FETCH_MAX_WORKERS
+        self.per_host_limit = per_host_limit or self.config.FETCH_PER_HOST_LIMIT
+        self.deadline = deadline or self.config.FETCH_DEADLINE
+        
+        # Shared keep-alive session and bounded worker pool
+        self.session = self._create_session()
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='news-fetch')
+        
+        self._host_semaphores = {}
+        self._host_lock = threading.Lock()
+        self._api_lock = threading.Lock()
+        self._last_api_call = 0.0
+        
+        # Parsed articles, failed URLs and News API listings
+        self.article_cache = ResultCache('articles', ttl=self.config.FETCH_CACHE_MAX_AGE)
+        self.failure_cache = ResultCache('article_failures', ttl=self.config.FETCH_NEGATIVE_TTL)
+        self.search_cache = ResultCache('news_api', ttl=self.config.NEWS_API_CACHE_TTL)
+    
+    def _create_session(self):
+        """Create an HTTP session with a connection pool sized for the worker pool"""
+        session = requests.Session()
+        session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+    
+    def _host_semaphore(self, url):
+        """Return the semaphore limiting concurrent requests to the URL's host"""
+        host = urlparse(url).netloc
+        with self._host_lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_semaphores[host]
+    
+    def _throttle_api(self):
+        """Space out News API calls by at least NEWS_API_MIN_INTERVAL seconds"""
+        with self._api_lock:
+            wait_time = self._last_api_call + self.config.NEWS_API_MIN_INTERVAL - time.monotonic()
+            if wait_time > 0:
+                time.sleep(wait_time)
+            self._last_api_call = time.monotonic()
     
-    def fetch_from_url(self, url, timeout=10):
+    def fetch_from_url(self, url, timeout=None):
         """Fetch news content from a URL"""
+        if timeout is None:
+            timeout = self.config.FETCH_TIMEOUT
+        
+        start = time.perf_counter()
+        key = canonicalize_url(url)
+        if self.failure_cache.get(key):
+            metrics.observe('fetch_url_seconds', time.perf_counter() - start, outcome='known_failure')
+            return None
+        
+        entry = self.article_cache.get(key)
+        if entry and time.time() - entry['fetched_at'] < self.config.FETCH_CACHE_FRESHNESS:
+            metrics.observe('fetch_url_seconds', time.perf_counter() - start, outcome='cached')
+            return entry['article']
+        
+        # Revalidate a stale entry instead of downloading it again
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        
         try:
+            with self._host_semaphore(url):
+                response = self.session.get(url, headers=headers, timeout=timeout)
+            
+            if response.status_code == 304 and entry:
+                entry['fetched_at'] = time.time()
+                self.article_cache.set(key, entry)
+                metrics.observe('fetch_url_seconds', time.perf_counter() - start, outcome='revalidated')
+                return entry['article']
+            
+            response.raise_for_status()
+            
             article = Article(url)
-            article.download()
+            article.download(input_html=response.text)
             article.parse()
-            article.nlp()
             
-            return {
-                'title': article.title,
-                'text': article.text,
-                'summary': article.summary,
-                'authors': article.authors,
-                'publish_date': article.publish_date,
-                'top_image': article.top_image,
-                'keywords': article.keywords,
-                'url': url,
-                'source': urlparse(url).netloc
-            }
+            if self.compact:
+                record = ArticleRecord(
+                    article.title,
+                    article.text,
+                    url,
+                    urlparse(url).netloc,
+                    article.publish_date,
+                    article.top_image
+                )
+            else:
+                article.nlp()
+                record = {
+                    'title': article.title,
+                    'text': article.text,
+                    'summary': article.summary,
+                    'authors': article.authors,
+                    'publish_date': article.publish_date,
+                    'top_image': article.top_image,
+                    'keywords': article.keywords,
+                    'url': url,
+                    'source': urlparse(url).netloc
+                }
+            
+            self.article_cache.set(key, {
+                'article': record,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'fetched_at': time.time()
+            })
+            metrics.observe('fetch_url_seconds', time.perf_counter() - start, outcome='downloaded')
+            return record
         except Exception as e:
             print(f"Error fetching from URL {url}: {e}")
+            if entry:
+                # Keep serving the stale copy; the next request revalidates again
+                metrics.observe('fetch_url_seconds', time.perf_counter() - start, outcome='stale')
+                return entry['article']
+            self.failure_cache.set(key, True)
+            metrics.observe('fetch_url_seconds', time.perf_counter() - start, outcome='failed')
             return None
     
-    def fetch_from_news_api(self, query, language='en', sort_by='publishedAt', page_size=10):
-        """Fetch news using News API"""
+    def fetch_many(self, urls, deadline=None):
+        """Fetch several URLs concurrently, returning whatever finished before the deadline"""
+        if deadline is None:
+            deadline = self.deadline
+        
+        futures = [self.executor.submit(self.fetch_from_url, url) for url in urls]
+        done, not_done = wait(futures, timeout=deadline)
+        
+        for future in not_done:
+            future.cancel()
+        if not_done:
+            print(f"Fetch deadline of {deadline}s reached, dropping {len(not_done)} of {len(futures)} articles")
+            metrics.increment('fetch_deadline_dropped_total', len(not_done))
+        
+        # Keep the original ordering of the URLs
+        articles = []
+        for future in futures:
+            if future in done:
+                article = future.result()
+                if article:
+                    articles.append(article)
+        
+        return articles
+    
+    def search_news_api(self, query, language='en', sort_by='publishedAt', page_size=10, page=1):
+        """Return one page of the raw article listing from News API"""
         if not self.api_key:
             raise ValueError("News API key is required")
         
-        url = f"https://newsapi.org/v2/everything?q={query}&language={language}&sortBy={sort_by}&pageSize={page_size}&apiKey={self.api_key}"
+        key = make_key(query, language, sort_by, page_size, page)
+        cached = self.search_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        url = "https://newsapi.org/v2/everything"
+        params = {
+            'q': query,
+            'language': language,
+            'sortBy': sort_by,
+            'pageSize': page_size,
+            'page': page,
+            'apiKey': self.api_key
+        }
+        
+        self._throttle_api()
+        response = self.session.get(url, params=params, timeout=self.config.FETCH_TIMEOUT)
+        response.raise_for_status()
+        
+        listing = response.json().get('articles', [])
+        self.search_cache.set(key, listing)
+        return listing
+    
+    def fetch_from_news_api(self, query, language='en', sort_by='publishedAt', page_size=10, concurrent=True):
+        """Fetch news using News API"""
+        if not self.api_key:
+            raise ValueError("News API key is required")
         
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
+            urls = [article_data['url'] for article_data in self.search_news_api(query, language, sort_by, page_size)]
             
-            data = response.json()
-            articles = []
+            if concurrent:
+                return self.fetch_many(urls)
             
-            for article_data in data.get('articles', []):
-                article = self.fetch_from_url(article_data['url'])
+            articles = []
+            for url in urls:
+                article = self.fetch_from_url(url)
                 if article:
                     articles.append(article)
             
             return articles
         except Exception as e:
             print(f"Error fetching from News API: {e}")
+            metrics.increment('errors_total', component='fetcher')
             return []
     
+    def _iter_listing(self, query, max_articles, language, sort_by, page_size, skip):
+        """URLs from successive News API pages, from listing position skip up to max_articles"""
+        page = skip // page_size + 1
+        position = (page - 1) * page_size
+        while position < max_articles:
+            try:
+                listing = self.search_news_api(query, language, sort_by, page_size, page)
+            except Exception as e:
+                # Plans cap how deep results can be paged; keep what was already found
+                print(f"Error fetching page {page} from News API: {e}")
+                metrics.increment('errors_total', component='fetcher')
+                return
+            
+            for article_data in listing:
+                if skip <= position < max_articles:
+                    yield article_data['url']
+                position += 1
+            if len(listing) < page_size:
+                return
+            page += 1
+    
+    def iter_news_api(self, query, max_articles=100, language='en', sort_by='publishedAt', skip=0, include_failed=False, deadline=None):
+        """Yield up to max_articles for a query in listing order, paging through News API as they are consumed
+        
+        At most 2 * max_workers downloads run ahead of the consumer, so memory stays flat whatever the budget.
+        With include_failed, URLs that could not be fetched (or repeat an earlier page) yield None, so every
+        listing position produces one item. Iteration stops after deadline seconds (FETCH_DEADLINE by
+        default, 0 for none).
+        """
+        if not self.api_key:
+            raise ValueError("News API key is required")
+        if max_articles <= 0:
+            return
+        if deadline is None:
+            deadline = self.deadline
+        expires_at = time.monotonic() + deadline if deadline else None
+        
+        page_size = min(max_articles, NEWS_API_MAX_PAGE_SIZE)
+        seen = set()
+        window = deque()
+        
+        def next_article():
+            future = window[0]
+            if future is not None:
+                timeout = max(0, expires_at - time.monotonic()) if expires_at else None
+                future.result(timeout=timeout)
+            window.popleft()
+            return future.result() if future else None
+        
+        try:
+            for url in self._iter_listing(query, max_articles, language, sort_by, page_size, skip):
+                if expires_at and time.monotonic() >= expires_at:
+                    raise FutureTimeoutError
+                
+                # Listings shift while paging, so an article can show up on two pages
+                key = canonicalize_url(url)
+                window.append(None if key in seen else self.executor.submit(self.fetch_from_url, url))
+                seen.add(key)
+                
+                if len(window) >= 2 * self.max_workers:
+                    article = next_article()
+                    if article or include_failed:
+                        yield article
+            
+            while window:
+                article = next_article()
+                if article or include_failed:
+                    yield article
+        except FutureTimeoutError:
+            print(f"Fetch deadline of {deadline}s reached, dropping the remaining articles for '{query}'")
+            metrics.increment('fetch_deadline_dropped_total', len(window))
+        finally:
+            # The consumer stopped early or the deadline passed: drop downloads that have not started
+            for future in window:
+                if future:
+                    future.cancel()
+    
     def fetch_multiple_sources(self, queries, max_articles=5):
         """Fetch news from multiple sources/queries"""
-        all_articles = []
+        urls = []
+        seen = set()
         
         for query in queries:
-            articles = self.fetch_from_news_api(query, page_size=max_articles)
-            all_articles.extend(articles)
-            time.sleep(1)  # Be respectful to the API
+            try:
+                # API calls are rate limited by _throttle_api
+                listing = self.search_news_api(query, page_size=max_articles)
+            except Exception as e:
+                print(f"Error fetching from News API: {e}")
+                metrics.increment('errors_total', component='fetcher')
+                continue
+            
+            for article_data in listing:
+                if article_data['url'] not in seen:
+                    seen.add(article_data['url'])
+                    urls.append(article_data['url'])
         
-        return all_articles
\ No newline at end of file
+        # Download every article from all queries in one concurrent batch
+        return self.fetch_many(urls)
\ No newline at end of file
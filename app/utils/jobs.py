@@ -0,0 +1,135 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from app.utils.metrics import metrics
+from config import Config
+
+
+class JobStoreFullError(Exception):
+    """Raised when no more jobs can be accepted"""
+
+
+class Job:
+    """A background analysis whose events can be polled or streamed"""
+    
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = 'queued'
+        self.events = []
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._condition = threading.Condition()
+    
+    @property
+    def finished(self):
+        return self.status in ('done', 'error')
+    
+    def add_event(self, event):
+        with self._condition:
+            self.events.append(event)
+            self._condition.notify_all()
+    
+    def _finish(self, status, error=None):
+        with self._condition:
+            self.status = status
+            self.error = error
+            self.finished_at = time.time()
+            self._condition.notify_all()
+    
+    def wait_for_events(self, since, timeout):
+        """Block until there are events after index since or the job finishes"""
+        with self._condition:
+            self._condition.wait_for(lambda: len(self.events) > since or self.finished, timeout=timeout)
+            return self.events[since:], self.finished
+    
+    def iter_events(self, heartbeat=15):
+        """Yield events as they arrive, and None as a keep-alive while waiting"""
+        since = 0
+        while True:
+            events, finished = self.wait_for_events(since, heartbeat)
+            since += len(events)
+            if not events and not finished:
+                yield None
+            for event in events:
+                yield event
+            if finished and since >= len(self.events):
+                return
+    
+    def to_dict(self, since=0):
+        with self._condition:
+            return {
+                'job_id': self.id,
+                'status': self.status,
+                'error': self.error,
+                'events': self.events[since:],
+                'next': len(self.events),
+                'created_at': self.created_at,
+                'finished_at': self.finished_at
+            }
+
+
+class JobStore:
+    """Bounded in-memory store of background jobs with expiry"""
+    
+    def __init__(self, max_jobs=None, ttl=None, workers=None):
+        self.config = Config()
+        self.max_jobs = max_jobs or self.config.JOB_MAX_JOBS
+        self.ttl = ttl or self.config.JOB_TTL
+        self.executor = ThreadPoolExecutor(max_workers=workers or self.config.JOB_WORKERS, thread_name_prefix='analysis-job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _expire(self):
+        """Drop finished jobs older than the TTL, then the oldest finished ones if still full"""
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished and now - job.finished_at > self.ttl:
+                del self._jobs[job_id]
+        
+        for job_id, job in list(self._jobs.items()):
+            if len(self._jobs) < self.max_jobs:
+                break
+            if job.finished:
+                del self._jobs[job_id]
+    
+    def submit(self, fn, *args):
+        """Start fn(job, *args) in the background and return the job"""
+        with self._lock:
+            self._expire()
+            if len(self._jobs) >= self.max_jobs:
+                raise JobStoreFullError(f"Too many active jobs ({self.max_jobs})")
+            job = Job()
+            self._jobs[job.id] = job
+        
+        self.executor.submit(self._run, job, fn, args)
+        return job
+    
+    def _run(self, job, fn, args):
+        job.status = 'running'
+        try:
+            fn(job, *args)
+            job._finish('done')
+        except Exception as e:
+            print(f"Error in job {job.id}: {e}")
+            metrics.increment('errors_total', component='jobs')
+            job._finish('error', str(e))
+    
+    def stats(self):
+        """Number of stored jobs by status"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {'queued': 0, 'running': 0, 'done': 0, 'error': 0}
+        for job in jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+    
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job and job.finished and time.time() - job.finished_at > self.ttl:
+                del self._jobs[job_id]
+                return None
+            return job
\ No newline at end of file
@@ -0,0 +1,139 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+PREFIX = 'news_nexus_'
+
+# Latency histogram upper bounds, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """Process-wide counters, latency histograms and scrape-time collectors in Prometheus text format"""
+    
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._help = {}
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = {}
+        self._request = threading.local()
+    
+    def describe(self, name, kind, help_text):
+        self._help[name] = (kind, help_text)
+    
+    def increment(self, name, amount=1, **labels):
+        """Add to a counter"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+    
+    def observe(self, name, seconds, **labels):
+        """Record one duration in a histogram"""
+        key = (name, _label_key(labels))
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # Per-bucket counts, then the +Inf bucket, sum and count
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            histogram[index] += 1
+            histogram[-2] += seconds
+            histogram[-1] += 1
+    
+    @contextmanager
+    def timer(self, name, **labels):
+        """Time a block into a histogram, and into the current request's timings under its stage label"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.observe(name, elapsed, **labels)
+            timings = getattr(self._request, 'timings', None)
+            if timings is not None:
+                stage = labels.get('stage', name)
+                timings[stage] = timings.get(stage, 0.0) + elapsed
+    
+    def collector(self, name, kind, help_text, fn):
+        """Register fn() -> [(labels, value)], evaluated on every scrape; replaces a collector of the same name"""
+        self.describe(name, kind, help_text)
+        self._collectors[name] = fn
+    
+    def start_request(self):
+        self._request.timings = {}
+    
+    def end_request(self):
+        """Stop collecting request timings and return them"""
+        timings = getattr(self._request, 'timings', None) or {}
+        self._request.timings = None
+        return timings
+    
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: list(values) for key, values in self._histograms.items()}
+        
+        samples = {}
+        for (name, key), value in counters.items():
+            samples.setdefault(name, []).append(f'{PREFIX}{name}{_format_labels(key)} {_format_value(value)}')
+        
+        for (name, key), histogram in sorted(histograms.items()):
+            lines = samples.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), histogram):
+                cumulative += count
+                lines.append(f'{PREFIX}{name}_bucket{_format_labels(key, [("le", _format_value(bound))])} {cumulative}')
+            lines.append(f'{PREFIX}{name}_sum{_format_labels(key)} {_format_value(histogram[-2])}')
+            lines.append(f'{PREFIX}{name}_count{_format_labels(key)} {histogram[-1]}')
+        
+        for name, fn in list(self._collectors.items()):
+            try:
+                values = list(fn())
+            except Exception as e:
+                print(f"Error collecting metric {name}: {e}")
+                continue
+            lines = samples.setdefault(name, [])
+            for labels, value in values:
+                lines.append(f'{PREFIX}{name}{_format_labels(_label_key(labels))} {_format_value(value)}')
+        
+        output = []
+        for name in sorted(samples):
+            if name in self._help:
+                kind, help_text = self._help[name]
+                output.append(f'# HELP {PREFIX}{name} {help_text}')
+                output.append(f'# TYPE {PREFIX}{name} {kind}')
+            output.extend(samples[name])
+        return '\n'.join(output) + '\n'
+
+
+metrics = Metrics()
+metrics.describe('stage_seconds', 'histogram', 'Time spent in each analysis stage')
+metrics.describe('fetch_url_seconds', 'histogram', 'Time to fetch one article URL, by outcome')
+metrics.describe('request_seconds', 'histogram', 'HTTP request latency by endpoint')
+metrics.describe('fallbacks_total', 'counter', 'Texts handled by a fallback path instead of the model')
+metrics.describe('errors_total', 'counter', 'Errors caught and handled, by component')
+metrics.describe('watchlist_refresh_seconds', 'histogram', 'Time to refresh the analysis of one watched query')
+metrics.describe('watchlist_refreshes_total', 'counter', 'Background refreshes of watched queries, by outcome')
+metrics.describe('single_flight_shared_total', 'counter', 'Calls answered by an identical call already in flight')
\ No newline at end of file
@@ -1,26 +1,66 @@
+import importlib.metadata
 import re
+from collections import Counter
+from functools import lru_cache
 import nltk
-from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
-import spacy
+from app.models.registry import registry
+from app.utils.cache import ResultCache, make_key
+from config import Config
 
-# Download required NLTK data
-nltk.download('punkt')
-nltk.download('stopwords')
-nltk.download('wordnet')
+# Bump when the shape of analyze_documents() results changes, so cached results are not reused
+DOCUMENT_FORMAT = 2
+
+# clean_text's URL and non-letter passes as one substitution over lowercased text
+CLEAN_PATTERN = re.compile(r'http\S+|[^a-z\s]')
+
+# The only splits word_tokenize makes inside a run of plain letters
+TREEBANK_SPLITS = {
+    'cannot': ('can', 'not'),
+    'gimme': ('gim', 'me'),
+    'gonna': ('gon', 'na'),
+    'gotta': ('got', 'ta'),
+    'lemme': ('lem', 'me'),
+    'wanna': ('wan', 'na')
+}
 
 class TextPreprocessor:
     def __init__(self):
-        self.stop_words = set(stopwords.words('english'))
-        self.lemmatizer = WordNetLemmatizer()
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            print("Downloading spaCy model...")
-            from spacy.cli import download
-            download("en_core_web_sm")
-            self.nlp = spacy.load("en_core_web_sm")
+        self.config = Config()
+        
+        self.entity_cache = ResultCache('entities')
+        self.document_cache = ResultCache('documents')
+        self._model_version = None
+        
+        # News vocabularies repeat heavily, so lemmas are memoized per word
+        self._lemmatize_word = lru_cache(maxsize=self.config.LEMMA_CACHE_SIZE)(self._lemmatize_uncached)
+    
+    # NLTK data and the spaCy model are loaded by the registry on first use
+    @property
+    def stop_words(self):
+        return registry.get('nltk')['stop_words']
+    
+    @property
+    def lemmatizer(self):
+        return registry.get('nltk')['lemmatizer']
+    
+    @property
+    def nlp(self):
+        return registry.get('spacy')
+    
+    @property
+    def model_version(self):
+        """spaCy model name and installed package versions for cache keys, read without loading the model"""
+        if self._model_version is None:
+            versions = []
+            for package in ('spacy', self.config.SPACY_MODEL):
+                try:
+                    versions.append(importlib.metadata.version(package))
+                except (importlib.metadata.PackageNotFoundError, ValueError):
+                    # e.g. a model loaded from a path
+                    versions.append('unknown')
+            self._model_version = (self.config.SPACY_MODEL, *versions)
+        return self._model_version
     
     def clean_text(self, text):
         """Clean and preprocess text"""
@@ -43,6 +83,7 @@ class TextPreprocessor:
     
     def tokenize(self, text):
         """Tokenize text"""
+        registry.get('nltk')  # makes sure the punkt data is available
         return word_tokenize(text)
     
     def remove_stopwords(self, tokens):
@@ -51,29 +92,124 @@ class TextPreprocessor:
     
     def lemmatize(self, tokens):
         """Lemmatize tokens"""
-        return [self.lemmatizer.lemmatize(token) for token in tokens]
+        lemmatize_word = self._lemmatize_word
+        return [lemmatize_word(token) for token in tokens]
+    
+    def _lemmatize_uncached(self, token):
+        return self.lemmatizer.lemmatize(token)
+    
+    def fast_tokenize(self, text):
+        """Lowercase letter-only tokens, identical to tokenize(clean_text(text)) without NLTK"""
+        if not text:
+            return []
+        
+        tokens = []
+        for token in CLEAN_PATTERN.sub('', text.lower()).split():
+            split = TREEBANK_SPLITS.get(token)
+            if split:
+                tokens.extend(split)
+            else:
+                tokens.append(token)
+        return tokens
     
-    def preprocess(self, text):
+    def preprocess(self, text, fast=None):
         """Complete preprocessing pipeline"""
+        if fast is None:
+            fast = self.config.PREPROCESS_FAST
+        if fast:
+            return self.preprocess_batch([text])[0]
+        
         cleaned_text = self.clean_text(text)
         tokens = self.tokenize(cleaned_text)
         tokens = self.remove_stopwords(tokens)
         tokens = self.lemmatize(tokens)
         return ' '.join(tokens)
     
+    def preprocess_batch(self, texts):
+        """Fast preprocess() over many documents in one call"""
+        stop_words = self.stop_words
+        lemmatize_word = self._lemmatize_word
+        return [
+            ' '.join([lemmatize_word(token) for token in self.fast_tokenize(text) if token not in stop_words])
+            for text in texts
+        ]
+    
     def extract_entities(self, text):
         """Extract named entities using spaCy"""
+        key = make_key(text, *self.model_version)
+        cached = self.entity_cache.get(key)
+        if cached is not None:
+            return cached
+        
         doc = self.nlp(text)
         entities = [(ent.text, ent.label_) for ent in doc.ents]
+        self.entity_cache.set(key, entities)
         return entities
     
     def extract_key_phrases(self, text, num_phrases=5):
         """Extract key phrases based on frequency"""
-        tokens = self.tokenize(self.clean_text(text))
-        tokens = self.remove_stopwords(tokens)
+        tokens = self.remove_stopwords(self.fast_tokenize(text))
         
         # Calculate word frequencies
         freq_dist = nltk.FreqDist(tokens)
         
         # Return most common phrases
-        return [word for word, count in freq_dist.most_common(num_phrases)]
\ No newline at end of file
+        return [word for word, count in freq_dist.most_common(num_phrases)]
+    
+    def analyze_documents(self, texts, batch_size=None):
+        """Parse each text once and return its tokens, lemmas, entities and phrase counts"""
+        if batch_size is None:
+            batch_size = self.config.SPACY_BATCH_SIZE
+        
+        results = [None] * len(texts)
+        keys = [make_key(text, *self.model_version, DOCUMENT_FORMAT) for text in texts]
+        pending = []
+        for i, key in enumerate(keys):
+            results[i] = self.document_cache.get(key)
+            if results[i] is None:
+                pending.append(i)
+        if not pending:
+            return results
+        
+        disable = [name for name in self.config.SPACY_DISABLE if name in self.nlp.pipe_names]
+        docs = self.nlp.pipe((texts[i] or '' for i in pending), batch_size=batch_size, disable=disable)
+        for i, doc in zip(pending, docs):
+            results[i] = self._summarize_doc(doc, texts[i] or '')
+            self.document_cache.set(keys[i], results[i])
+        
+        return results
+    
+    def _summarize_doc(self, doc, text):
+        """Collect everything downstream analysis needs from one parsed document"""
+        stop_words = self.stop_words
+        tokens = []
+        ngram_counts = Counter()
+        run = []
+        
+        # Phrases come from runs of consecutive words; punctuation, numbers and URLs break a run
+        for token in list(doc) + [None]:
+            if token is not None and token.is_alpha and not token.like_url:
+                run.append(token.lower_)
+                if token.lower_ not in stop_words:
+                    tokens.append(token.lower_)
+                continue
+            ngram_counts.update(self._ngrams(run, stop_words))
+            run = []
+        
+        return {
+            'tokens': tokens,
+            'lemmas': self.lemmatize(tokens),
+            'entities': [(ent.text, ent.label_) for ent in doc.ents],
+            'phrase_counts': Counter(tokens),
+            'ngram_counts': ngram_counts,
+            'word_count': len(text.split())
+        }
+    
+    def _ngrams(self, words, stop_words):
+        """N-grams of a word run that neither start nor end with a stopword"""
+        min_n, max_n = self.config.KEYPHRASE_NGRAM_RANGE
+        for n in range(min_n, max_n + 1):
+            for start in range(len(words) - n + 1):
+                if words[start] in stop_words or words[start + n - 1] in stop_words:
+                    continue
+                yield ' '.join(words[start:start + n])
\ No newline at end of file
@@ -0,0 +1,440 @@
+import os
+import pickle
+import random
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from app.utils.metrics import metrics
+from config import Config
+
+SECONDS_PER_DAY = 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS watchlist_budget (
+    name TEXT PRIMARY KEY,
+    tokens REAL,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS watchlist_leases (
+    query TEXT PRIMARY KEY,
+    owner TEXT,
+    expires_at REAL
+);
+CREATE TABLE IF NOT EXISTS watchlist_snapshots (
+    query TEXT PRIMARY KEY,
+    updated_at REAL,
+    snapshot BLOB
+);
+"""
+
+
+def normalize_query(query):
+    """Watchlist key for a query: case and spacing do not change News API results"""
+    return ' '.join(query.lower().split())
+
+
+def _refill(tokens, elapsed, rate, capacity):
+    """Tokens after elapsed seconds at rate per second, up to capacity"""
+    return min(capacity, tokens + max(0.0, elapsed) * rate)
+
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers with the same key share its result"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+    
+    def do(self, key, fn):
+        """Return fn(), or the result of the identical call already in flight"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        
+        if not leader:
+            metrics.increment('single_flight_shared_total')
+            return future.result()
+        
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+        future.set_result(result)
+        return result
+
+
+class RequestBudget:
+    """Token bucket that spreads a daily number of API requests evenly, allowing a burst up to capacity"""
+    
+    def __init__(self, per_day, capacity=1):
+        self.rate = per_day / SECONDS_PER_DAY if per_day > 0 else None
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def try_acquire(self):
+        """Take one request; returns 0 on success, else the seconds until one is available"""
+        if self.rate is None:
+            return 0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = _refill(self.tokens, now - self.updated, self.rate, self.capacity)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+
+class WatchlistStore:
+    """Request budget, refresh leases and latest analyses in SQLite, shared by every server process"""
+    
+    def __init__(self, db_path=None):
+        self.db_path = db_path or Config.CACHE_DB_PATH
+        self._local = threading.local()
+        self._connection()
+    
+    def _connection(self):
+        """Return this thread's SQLite connection, reopening it after a fork"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
+    def _transaction(self, fn):
+        """Run fn(conn) in a write transaction, so processes see each other's updates atomically"""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            result = fn(conn)
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return result
+    
+    def try_acquire_request(self, per_day, capacity, name='news_api'):
+        """Take one request from the shared token bucket; 0 on success, else seconds until one is available"""
+        if per_day <= 0:
+            return 0
+        rate = per_day / SECONDS_PER_DAY
+        
+        def acquire(conn):
+            now = time.time()
+            row = conn.execute('SELECT tokens, updated_at FROM watchlist_budget WHERE name = ?', (name,)).fetchone()
+            tokens = _refill(row[0], now - row[1], rate, capacity) if row else float(capacity)
+            delay = 0 if tokens >= 1 else (1 - tokens) / rate
+            if not delay:
+                tokens -= 1
+            conn.execute(
+                'INSERT OR REPLACE INTO watchlist_budget (name, tokens, updated_at) VALUES (?, ?, ?)',
+                (name, tokens, now)
+            )
+            return delay
+        
+        return self._transaction(acquire)
+    
+    def acquire_lease(self, query, owner, ttl):
+        """Become the only process refreshing query for up to ttl seconds; False if another holds it"""
+        def acquire(conn):
+            now = time.time()
+            row = conn.execute('SELECT owner, expires_at FROM watchlist_leases WHERE query = ?', (query,)).fetchone()
+            if row and row[0] != owner and row[1] > now:
+                return False
+            conn.execute(
+                'INSERT OR REPLACE INTO watchlist_leases (query, owner, expires_at) VALUES (?, ?, ?)',
+                (query, owner, now + ttl)
+            )
+            return True
+        
+        return self._transaction(acquire)
+    
+    def release_lease(self, query, owner):
+        self._connection().execute('DELETE FROM watchlist_leases WHERE query = ? AND owner = ?', (query, owner))
+    
+    def snapshot_time(self, query):
+        """When the stored analysis of query was computed, or None"""
+        row = self._connection().execute(
+            'SELECT updated_at FROM watchlist_snapshots WHERE query = ?', (query,)
+        ).fetchone()
+        return row[0] if row else None
+    
+    def load_snapshot(self, query):
+        """(analysis, updated_at) stored for query, or None"""
+        row = self._connection().execute(
+            'SELECT snapshot, updated_at FROM watchlist_snapshots WHERE query = ?', (query,)
+        ).fetchone()
+        if not row:
+            return None
+        try:
+            return pickle.loads(row[0]), row[1]
+        except Exception as e:
+            # Truncated, or pickled by incompatible code: drop it so the query is analyzed live and stored again
+            print(f"Error loading watchlist snapshot for {query}: {e}")
+            metrics.increment('errors_total', component='watchlist')
+            self.delete_snapshot(query, row[1])
+            return None
+    
+    def delete_snapshot(self, query, updated_at):
+        """Remove the analysis stored at updated_at, keeping any newer one another process saved since"""
+        self._connection().execute(
+            'DELETE FROM watchlist_snapshots WHERE query = ? AND updated_at = ?', (query, updated_at)
+        )
+    
+    def save_snapshot(self, query, snapshot, updated_at):
+        self._connection().execute(
+            'INSERT OR REPLACE INTO watchlist_snapshots (query, updated_at, snapshot) VALUES (?, ?, ?)',
+            (query, updated_at, pickle.dumps(snapshot))
+        )
+
+
+class WatchlistScheduler:
+    """Keeps a ready-to-serve analysis of each watched query, refreshed in the background within a News API budget
+    
+    Every server process runs a scheduler, but the budget, a per-query refresh lease and the analyses
+    themselves live in a WatchlistStore, so each refresh happens once and is served by all processes.
+    """
+    
+    def __init__(self, pipeline, queries=None, interval=None, jitter=None, daily_requests=None, workers=None,
+                 max_age=None, store=None):
+        self.config = Config()
+        self.pipeline = pipeline
+        self.jitter = self.config.WATCHLIST_JITTER if jitter is None else jitter
+        self.daily_requests = self.config.WATCHLIST_DAILY_REQUESTS if daily_requests is None else daily_requests
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{id(self)}'
+        
+        self._state = {}
+        for query in (self.config.WATCHLIST if queries is None else queries):
+            self._state.setdefault(normalize_query(query), {
+                'query': query,
+                'snapshot': None,
+                'updated_at': None,
+                'new_articles': 0,
+                'next_run': None,
+                'refreshing': False,
+                'error': None
+            })
+        
+        self.interval = interval or self.config.WATCHLIST_INTERVAL
+        if self.daily_requests > 0 and self._state:
+            # Stretch the interval so refreshing every query stays within the daily budget
+            self.interval = max(self.interval, SECONDS_PER_DAY * len(self._state) / self.daily_requests)
+        
+        # By default an analysis is served until well after its next refresh is due
+        latest_refresh = self.interval * (1 + self.jitter)
+        self.max_age = max_age or self.config.WATCHLIST_MAX_AGE or 2 * latest_refresh
+        if self._state and self.max_age < latest_refresh:
+            print(f"Warning: WATCHLIST_MAX_AGE of {self.max_age:.0f}s is shorter than the refresh interval of up to "
+                  f"{latest_refresh:.0f}s, so watched queries will often be recomputed on request")
+        
+        self.store = store
+        if self.store is None and self._state:
+            try:
+                self.store = WatchlistStore()
+            except sqlite3.Error as e:
+                # Without shared storage each process keeps to its own budget
+                print(f"Error opening watchlist database: {e}")
+                metrics.increment('errors_total', component='watchlist')
+        self.budget = RequestBudget(self.daily_requests, capacity=len(self._state))
+        
+        self.single_flight = SingleFlight()
+        self.executor = ThreadPoolExecutor(max_workers=workers or self.config.WATCHLIST_WORKERS, thread_name_prefix='watchlist')
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+    
+    @property
+    def queries(self):
+        return [state['query'] for state in self._state.values()]
+    
+    def _jittered(self, seconds):
+        return seconds * random.uniform(1 - self.jitter, 1 + self.jitter)
+    
+    def start(self):
+        """Start refreshing in a daemon thread; does nothing with an empty watchlist"""
+        if self._thread or not self._state:
+            return
+        
+        now = time.monotonic()
+        with self._lock:
+            for state in self._state.values():
+                # Spread the first refreshes so the queries do not hit the API together
+                state['next_run'] = now + random.uniform(0, self.jitter * self.interval)
+        
+        self._thread = threading.Thread(target=self._run, name='watchlist-scheduler', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+        self.executor.shutdown(wait=False)
+    
+    def _run(self):
+        while not self._stopped:
+            now = time.monotonic()
+            wait = self.interval
+            due = []
+            with self._lock:
+                for key, state in self._state.items():
+                    if state['refreshing']:
+                        continue
+                    if state['next_run'] > now:
+                        wait = min(wait, state['next_run'] - now)
+                        continue
+                    state['refreshing'] = True
+                    due.append(key)
+            
+            for key in due:
+                self.executor.submit(self._scheduled_refresh, key)
+            
+            self._wake.wait(max(wait, 0.1))
+            self._wake.clear()
+    
+    def _take_request(self):
+        """0 if a News API request may be spent now, else the seconds to wait"""
+        if self.store:
+            return self.store.try_acquire_request(self.daily_requests, len(self._state))
+        return self.budget.try_acquire()
+    
+    def _scheduled_refresh(self, key):
+        state = self._state[key]
+        next_run = self._jittered(self.interval)
+        leased = False
+        try:
+            # Another process may have refreshed this query since
+            updated_at = self._sync(key)
+            if updated_at and time.time() - updated_at < self.interval * (1 - self.jitter):
+                next_run = max(0.0, updated_at + self._jittered(self.interval) - time.time())
+                return
+            
+            if self.store:
+                leased = self.store.acquire_lease(key, self.owner, self.config.WATCHLIST_LEASE_TTL)
+                if not leased:
+                    # Another process is refreshing it; pick up its result next time round
+                    next_run = self._jittered(self.interval * self.jitter) or 1.0
+                    return
+            
+            delay = self._take_request()
+            if delay:
+                # Out of budget: try again once a request is available
+                next_run = delay
+                metrics.increment('watchlist_refreshes_total', outcome='deferred')
+                return
+            
+            self.refresh(state['query'])
+        except Exception as e:
+            print(f"Error refreshing watched query {state['query']}: {e}")
+            metrics.increment('errors_total', component='watchlist')
+            metrics.increment('watchlist_refreshes_total', outcome='error')
+            with self._lock:
+                state['error'] = str(e)
+        finally:
+            if leased:
+                try:
+                    self.store.release_lease(key, self.owner)
+                except sqlite3.Error as e:
+                    print(f"Error releasing watchlist lease: {e}")
+            with self._lock:
+                state['refreshing'] = False
+                state['next_run'] = time.monotonic() + next_run
+            self._wake.set()
+    
+    def _sync(self, key):
+        """Adopt a newer analysis stored by another process; returns the latest update time"""
+        state = self._state[key]
+        if not self.store:
+            return state['updated_at']
+        
+        updated_at = self.store.snapshot_time(key)
+        if updated_at and (state['updated_at'] is None or updated_at > state['updated_at']):
+            loaded = self.store.load_snapshot(key)
+            if loaded:
+                with self._lock:
+                    state['snapshot'], state['updated_at'] = loaded
+        return state['updated_at']
+    
+    def refresh(self, query):
+        """Fetch the query's listing and analyze only the articles the previous refresh did not have"""
+        key = normalize_query(query)
+        if key not in self._state:
+            raise KeyError(f"Query is not watched: {query}")
+        return self.single_flight.do(key, lambda: self._refresh(key))
+    
+    def _refresh(self, key):
+        state = self._state[key]
+        start = time.perf_counter()
+        news_articles = self.pipeline.fetch(state['query'])
+        if not news_articles:
+            # Keep serving the previous analysis
+            raise ValueError('No news articles found')
+        
+        # Only the latest listing's results are kept, so memory stays bounded by the page size
+        previous = state['snapshot']
+        known_results = {result['url']: result for result in previous['articles']} if previous else {}
+        new_articles = len({article['url'] for article in news_articles} - known_results.keys())
+        response = self.pipeline.analyze(news_articles, known_results=known_results)
+        updated_at = time.time()
+        
+        with self._lock:
+            state['snapshot'] = response
+            state['updated_at'] = updated_at
+            state['new_articles'] = new_articles
+            state['error'] = None
+        if self.store:
+            self.store.save_snapshot(key, response, updated_at)
+        
+        metrics.observe('watchlist_refresh_seconds', time.perf_counter() - start)
+        metrics.increment('watchlist_refreshes_total', outcome='ok')
+        metrics.increment('watchlist_new_articles_total', new_articles)
+        return response
+    
+    def get(self, query, max_age=None):
+        """(analysis, updated_at) for a watched query, or None if it is not watched, not ready or too old"""
+        key = normalize_query(query)
+        if key not in self._state:
+            return None
+        
+        try:
+            self._sync(key)
+        except sqlite3.Error as e:
+            print(f"Error reading watchlist database: {e}")
+            metrics.increment('errors_total', component='watchlist')
+        
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            state = self._state[key]
+            if state['snapshot'] is None or time.time() - state['updated_at'] > max_age:
+                return None
+            return state['snapshot'], state['updated_at']
+    
+    def status(self):
+        """Refresh state of every watched query"""
+        now = time.time()
+        monotonic_now = time.monotonic()
+        with self._lock:
+            return [{
+                'query': state['query'],
+                'ready': state['snapshot'] is not None,
+                'updated_at': state['updated_at'],
+                'age_seconds': round(now - state['updated_at'], 1) if state['updated_at'] else None,
+                'articles': len(state['snapshot']['articles']) if state['snapshot'] else 0,
+                'new_articles': state['new_articles'],
+                'refreshing': state['refreshing'],
+                'next_refresh_seconds': round(max(0, state['next_run'] - monotonic_now), 1) if state['next_run'] else None,
+                'error': state['error']
+            } for state in self._state.values()]
\ No newline at end of file
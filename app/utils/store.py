@@ -0,0 +1,178 @@
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from config import Config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    url TEXT UNIQUE,
+    content_hash TEXT,
+    title TEXT,
+    source TEXT,
+    published_at REAL,
+    added_at REAL,
+    sentiment_label TEXT,
+    sentiment_score REAL,
+    word_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS articles_published ON articles (published_at);
+CREATE INDEX IF NOT EXISTS articles_content_hash ON articles (content_hash);
+CREATE TABLE IF NOT EXISTS postings (
+    kind TEXT,
+    term TEXT,
+    article_id INTEGER,
+    count INTEGER,
+    PRIMARY KEY (kind, term, article_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS term_stats (
+    kind TEXT,
+    term TEXT,
+    doc_freq INTEGER,
+    total_count INTEGER,
+    PRIMARY KEY (kind, term)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS term_buckets (
+    kind TEXT,
+    bucket INTEGER,
+    term TEXT,
+    doc_count INTEGER,
+    count INTEGER,
+    PRIMARY KEY (kind, bucket, term)
+) WITHOUT ROWID;
+"""
+
+
+class ArticleStore:
+    """SQLite store of processed articles with an inverted index and incremental term statistics"""
+    
+    def __init__(self, db_path=None, bucket_seconds=None):
+        self.config = Config()
+        self.db_path = db_path or self.config.ARTICLE_STORE_PATH
+        self.bucket_seconds = bucket_seconds or self.config.ARTICLE_STORE_BUCKET_SECONDS
+        self._local = threading.local()
+        self._connection()
+    
+    def _connection(self):
+        """Return this thread's SQLite connection, reopening it after a fork"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
+    def _bucket(self, timestamp):
+        return int(timestamp // self.bucket_seconds * self.bucket_seconds)
+    
+    def add_articles(self, news_articles, documents, sentiments):
+        """Record articles not seen before and fold their terms and entities into the index"""
+        conn = self._connection()
+        added = 0
+        now = time.time()
+        
+        with conn:
+            for article, document, sentiment in zip(news_articles, documents, sentiments):
+                content_hash = hashlib.sha256(' '.join((article.get('text') or '').split()).encode('utf-8')).hexdigest()
+                published = article.get('publish_date')
+                published_at = published.timestamp() if published else now
+                
+                # Articles without a URL are stored with a NULL one and recognized by their content
+                url = article.get('url') or None
+                if url is None and conn.execute(
+                    'SELECT 1 FROM articles WHERE url IS NULL AND content_hash = ?', (content_hash,)
+                ).fetchone():
+                    continue
+                
+                cursor = conn.execute(
+                    'INSERT OR IGNORE INTO articles (url, content_hash, title, source, published_at, added_at, '
+                    'sentiment_label, sentiment_score, word_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (url, content_hash, article.get('title'), article.get('source'), published_at, now,
+                     sentiment.get('label'), sentiment.get('score'), document['word_count'])
+                )
+                if cursor.rowcount == 0:
+                    continue  # already indexed
+                
+                article_id = cursor.lastrowid
+                bucket = self._bucket(published_at)
+                counts = {
+                    'term': Counter(document['lemmas']),
+                    'entity': Counter(text for text, label in document['entities'])
+                }
+                
+                for kind, term_counts in counts.items():
+                    rows = [(kind, term, count) for term, count in term_counts.items()]
+                    conn.executemany(
+                        'INSERT INTO postings (kind, term, article_id, count) VALUES (?, ?, ?, ?)',
+                        [(kind, term, article_id, count) for kind, term, count in rows]
+                    )
+                    conn.executemany(
+                        'INSERT INTO term_stats (kind, term, doc_freq, total_count) VALUES (?, ?, 1, ?) '
+                        'ON CONFLICT (kind, term) DO UPDATE SET doc_freq = doc_freq + 1, total_count = total_count + excluded.total_count',
+                        rows
+                    )
+                    conn.executemany(
+                        'INSERT INTO term_buckets (kind, bucket, term, doc_count, count) VALUES (?, ?, ?, 1, ?) '
+                        'ON CONFLICT (kind, bucket, term) DO UPDATE SET doc_count = doc_count + 1, count = count + excluded.count',
+                        [(kind, bucket, term, count) for kind, term, count in rows]
+                    )
+                added += 1
+        
+        return added
+    
+    def article_count(self):
+        return self._connection().execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+    
+    def trending(self, kind='term', hours=24, limit=20, min_docs=2):
+        """Terms or entities ranked by in-window document count weighted by corpus-wide rarity"""
+        since = self._bucket(time.time() - hours * 3600)
+        total_docs = max(self.article_count(), 1)
+        
+        rows = self._connection().execute(
+            'SELECT b.term, SUM(b.doc_count), SUM(b.count), s.doc_freq '
+            'FROM term_buckets b JOIN term_stats s ON s.kind = b.kind AND s.term = b.term '
+            'WHERE b.kind = ? AND b.bucket >= ? '
+            'GROUP BY b.term HAVING SUM(b.doc_count) >= ?',
+            (kind, since, min_docs)
+        ).fetchall()
+        
+        ranked = []
+        for term, window_docs, window_count, doc_freq in rows:
+            ranked.append({
+                'term': term,
+                'documents': window_docs,
+                'count': window_count,
+                'doc_freq': doc_freq,
+                'score': round(window_docs * math.log(1 + total_docs / doc_freq), 4)
+            })
+        ranked.sort(key=lambda row: row['score'], reverse=True)
+        return ranked[:limit]
+    
+    def term_trend(self, term, kind='entity', hours=24 * 7):
+        """Per-bucket document and mention counts for one term or entity"""
+        since = self._bucket(time.time() - hours * 3600)
+        rows = self._connection().execute(
+            'SELECT bucket, doc_count, count FROM term_buckets WHERE kind = ? AND term = ? AND bucket >= ? ORDER BY bucket',
+            (kind, term, since)
+        ).fetchall()
+        return [{'bucket': bucket, 'documents': docs, 'count': count} for bucket, docs, count in rows]
+    
+    def search(self, term, kind='term', limit=20):
+        """Articles containing a term or entity, most mentions first"""
+        rows = self._connection().execute(
+            'SELECT a.title, a.url, a.source, a.published_at, a.sentiment_label, p.count '
+            'FROM postings p JOIN articles a ON a.id = p.article_id '
+            'WHERE p.kind = ? AND p.term = ? ORDER BY p.count DESC, a.published_at DESC LIMIT ?',
+            (kind, term, limit)
+        ).fetchall()
+        return [
+            {'title': title, 'url': url, 'source': source, 'published_at': published_at, 'sentiment': label, 'count': count}
+            for title, url, source, published_at, label, count in rows
+        ]
\ No newline at end of file
@@ -1,11 +1,25 @@
 import plotly.graph_objects as go
 import plotly.express as px
 from wordcloud import WordCloud
-import matplotlib.pyplot as plt
 import base64
+import json
 from io import BytesIO
+from app.utils.cache import ResultCache, make_key
+from config import Config
+
+# Served by the /wordcloud/<fingerprint>.png route
+WORDCLOUD_IMAGE_PATH = '/wordcloud/{fingerprint}.png'
 
 class DataVisualizer:
+    def __init__(self):
+        self.config = Config()
+        
+        # PNGs are large, so only a few are kept in memory; the term lists let any image be re-rendered.
+        # Compact responses link to images by fingerprint, so the terms are kept on disk, shared by every
+        # process, whatever the cache settings.
+        self.image_cache = ResultCache('wordcloud_images', max_entries=self.config.WORDCLOUD_CACHE_ENTRIES)
+        self.terms_cache = ResultCache('wordcloud_terms', enabled=True, disk=True)
+    
     @staticmethod
     def create_sentiment_chart(sentiment_stats):
         """Create sentiment distribution chart"""
@@ -37,27 +51,81 @@ class DataVisualizer:
         return fig
     
     @staticmethod
-    def create_wordcloud(text):
-        """Generate word cloud image"""
-        wordcloud = WordCloud(
-            width=800, 
-            height=400, 
+    def chart_data(sentiment_stats, entity_freq, source_analysis):
+        """The numbers behind the three charts, for rendering on the client"""
+        sources = list(source_analysis.keys())
+        return {
+            'sentiment': {
+                'labels': ['Positive', 'Negative', 'Neutral'],
+                'values': [
+                    sentiment_stats['positive_count'],
+                    sentiment_stats['negative_count'],
+                    sentiment_stats['neutral_count']
+                ]
+            },
+            'entities': {
+                'labels': list(entity_freq.keys())[:10],
+                'values': list(entity_freq.values())[:10]
+            },
+            'sources': {
+                'labels': sources,
+                'article_counts': [source_analysis[source]['article_count'] for source in sources],
+                'sentiment_scores': [source_analysis[source]['avg_sentiment']['score'] for source in sources]
+            }
+        }
+    
+    def _wordcloud(self):
+        # Fixed random_state, so one set of frequencies always renders the same image
+        return WordCloud(
+            width=self.config.WORDCLOUD_WIDTH,
+            height=self.config.WORDCLOUD_HEIGHT,
             background_color='white',
-            max_words=100
-        ).generate(text)
+            max_words=self.config.WORDCLOUD_MAX_WORDS,
+            random_state=1
+        )
+    
+    def word_frequencies(self, text):
+        """Word cloud terms and counts, with a fingerprint that identifies their rendered image"""
+        counts = self._wordcloud().process_text(text or '')
+        words = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:self.config.WORDCLOUD_MAX_WORDS]
+        fingerprint = make_key(
+            json.dumps(words),
+            self.config.WORDCLOUD_WIDTH,
+            self.config.WORDCLOUD_HEIGHT,
+            self.config.WORDCLOUD_MAX_WORDS
+        )
+        if words:
+            self.terms_cache.set(fingerprint, words)
+        return {'fingerprint': fingerprint, 'words': words}
+    
+    def wordcloud_image(self, fingerprint, words=None):
+        """PNG bytes of a word cloud, rendered once per fingerprint; None if its terms are unknown"""
+        png = self.image_cache.get(fingerprint)
+        if png is not None:
+            return png
         
-        # Convert to base64 for web display
-        img_buffer = BytesIO()
-        plt.figure(figsize=(10, 5))
-        plt.imshow(wordcloud, interpolation='bilinear')
-        plt.axis('off')
-        plt.tight_layout(pad=0)
-        plt.savefig(img_buffer, format='png')
-        img_buffer.seek(0)
+        if words is None:
+            words = self.terms_cache.get(fingerprint)
+        if not words:
+            return None
         
-        img_str = base64.b64encode(img_buffer.read()).decode('utf-8')
-        plt.close()
+        # Render straight to a PIL image, without matplotlib
+        image = self._wordcloud().generate_from_frequencies(dict(words)).to_image()
+        buffer = BytesIO()
+        image.save(buffer, format='PNG', optimize=True)
+        png = buffer.getvalue()
+        self.image_cache.set(fingerprint, png)
+        return png
+    
+    def create_wordcloud(self, text):
+        """Generate word cloud image"""
+        wordcloud = self.word_frequencies(text)
+        png = self.wordcloud_image(wordcloud['fingerprint'], wordcloud['words'])
+        if png is None:
+            return None
         
+        # Convert to base64 for web display
+        img_str = base64.b64encode(png).decode('utf-8')
         return f"data:image/png;base64,{img_str}"
     
     @staticmethod
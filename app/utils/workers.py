@@ -0,0 +1,238 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from app.utils.metrics import metrics
+from config import Config
+
+try:
+    import fcntl
+except ImportError:  # Windows: the single-pool check is skipped
+    fcntl = None
+
+# Stage name -> (component, method) run inside the worker
+STAGES = {
+    'summarize': ('summarizer', 'summarize_batch'),
+    'summarize_greedy': ('summarizer', 'summarize_batch_greedy'),
+    'summarize_extractive': ('summarizer', 'summarize_batch_extractive'),
+    'sentiment': ('sentiment', 'analyze_sentiment_batch'),
+    'analyze_documents': ('analyzer', 'analyze_documents'),
+    'wordcloud': ('visualizer', 'create_wordcloud')
+}
+
+# Models each component needs, by registry name
+COMPONENT_MODELS = {
+    'summarizer': ['summarization'],
+    'sentiment': ['sentiment'],
+    'analyzer': ['spacy', 'nltk'],
+    'visualizer': []
+}
+
+# Components loaded once per worker process by _init_worker
+_components = {}
+
+# Lock file held open by the one server process on this host that owns a worker pool
+_host_lock = None
+
+
+class PoolFullError(Exception):
+    """Raised when the worker pool queue is full"""
+
+
+class StageTimeoutError(Exception):
+    """Raised when a stage does not finish within its timeout"""
+
+
+def build_components(names):
+    """Create the analysis components needed for the given names"""
+    from app.models.summarizer import TextSummarizer
+    from app.models.sentiment import SentimentAnalyzer
+    from app.models.analyzer import NewsAnalyzer
+    from app.utils.visualizer import DataVisualizer
+    
+    factories = {
+        'summarizer': TextSummarizer,
+        'sentiment': SentimentAnalyzer,
+        'analyzer': NewsAnalyzer,
+        'visualizer': DataVisualizer
+    }
+    return {name: factories[name]() for name in names}
+
+
+def execute(components, stage, *args):
+    """Run a stage against the given components in the current process"""
+    component, method = STAGES[stage]
+    return getattr(components[component], method)(*args)
+
+
+def claim_host_pool(path=None, timeout=None):
+    """Make this the only server process on the host with a worker pool, or raise RuntimeError
+
+    Each pool loads its own model copies, so one per gunicorn worker would multiply memory by the worker count.
+    Waits up to timeout seconds (WORKER_LOCK_TIMEOUT) for the lock, so a worker booting during a graceful
+    reload takes over once the old worker exits.
+    """
+    global _host_lock
+    if _host_lock is not None or fcntl is None:
+        return
+    
+    path = path or Config.WORKER_LOCK_PATH
+    timeout = Config.WORKER_LOCK_TIMEOUT if timeout is None else timeout
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lock = open(path, 'a')
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            break
+        except OSError:
+            if time.monotonic() >= deadline:
+                lock.close()
+                raise RuntimeError(
+                    f"Another server process still runs a worker pool after {timeout:.0f}s ({path} is locked). "
+                    "With WORKER_PROCESSES > 0, run a single gunicorn worker and scale with threads, "
+                    "e.g. gunicorn --workers 1 --threads 8 run:app"
+                )
+            time.sleep(0.5)
+    _host_lock = lock
+
+
+def _init_worker(component_names, warmed_workers=None):
+    """Load models once when a worker process starts, then count the worker as warmed up"""
+    from app.models.registry import registry, configure_threads
+    
+    configure_threads()
+    _components.update(build_components(component_names))
+    registry.warm_up(model_names(component_names), background=False)
+    if warmed_workers is not None:
+        with warmed_workers.get_lock():
+            warmed_workers.value += 1
+
+
+def model_names(component_names):
+    """Registry models needed by the given components"""
+    return [model for name in component_names for model in COMPONENT_MODELS[name]]
+
+
+def _run_stage(stage, args):
+    return execute(_components, stage, *args)
+
+
+def _warm_up():
+    return True
+
+
+class WorkerPool:
+    """Pre-warmed worker processes for CPU-bound stages, with a bounded queue"""
+    
+    def __init__(self, num_workers=None, queue_size=None, task_timeout=None, stages=None):
+        self.config = Config()
+        self.num_workers = num_workers or self.config.WORKER_PROCESSES
+        self.queue_size = queue_size if queue_size is not None else self.config.WORKER_QUEUE_SIZE
+        self.task_timeout = task_timeout or self.config.WORKER_TASK_TIMEOUT
+        self.stages = stages or self.config.WORKER_STAGES
+        self.component_names = sorted({STAGES[stage][0] for stage in self.stages})
+        
+        # One slot per running or queued task; when none are left new work is rejected
+        self._slots = threading.BoundedSemaphore(self.num_workers + self.queue_size)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._pending_stages = Counter()
+        self.executor = self._create_executor()
+    
+    def _create_executor(self):
+        """Start the worker processes and load their models up front"""
+        context = multiprocessing.get_context('spawn')
+        # Shared with the workers: a finished warm-up task does not mean every worker has loaded its models,
+        # since one worker can take several of them
+        self._warmed_workers = context.Value('i', 0)
+        executor = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.component_names, self._warmed_workers)
+        )
+        # Processes are spawned as tasks arrive, so one task per worker starts them all
+        for _ in range(self.num_workers):
+            executor.submit(_warm_up)
+        return executor
+    
+    def warmed_up(self):
+        """Whether every worker process has loaded its models"""
+        return self._warmed_workers.value >= self.num_workers
+    
+    def handles(self, stage):
+        """Whether this pool runs the given stage"""
+        return stage in self.stages
+    
+    def submit(self, stage, *args):
+        """Queue a stage for a worker, raising PoolFullError if the queue is full"""
+        return self._submit(stage, args)[1]
+    
+    def _submit(self, stage, args):
+        """(executor, future) for a queued stage"""
+        if not self._slots.acquire(blocking=False):
+            raise PoolFullError(f"Worker queue is full ({self.num_workers} workers, {self.queue_size} queued)")
+        
+        executor = self.executor
+        try:
+            future = executor.submit(_run_stage, stage, args)
+        except BrokenProcessPool:
+            self._slots.release()
+            self._restart(executor)
+            raise PoolFullError("Worker pool is restarting")
+        with self._lock:
+            self._pending += 1
+            self._pending_stages[stage] += 1
+        future.add_done_callback(lambda future: self._release(stage))
+        return executor, future
+    
+    def _release(self, stage):
+        with self._lock:
+            self._pending -= 1
+            self._pending_stages[stage] -= 1
+        self._slots.release()
+    
+    def run(self, stage, *args, timeout=None):
+        """Run a stage in a worker and wait for its result"""
+        executor, future = self._submit(stage, args)
+        try:
+            return future.result(timeout=timeout or self.task_timeout)
+        except TimeoutError:
+            future.cancel()
+            raise StageTimeoutError(f"Stage '{stage}' timed out")
+        except BrokenProcessPool:
+            self._restart(executor)
+            raise PoolFullError("Worker pool is restarting")
+        except CancelledError:
+            # Queued when another thread restarted the pool
+            raise PoolFullError("Worker pool is restarting")
+    
+    def _restart(self, broken):
+        """Replace a pool whose worker process died, unless another thread already has"""
+        with self._lock:
+            if self.executor is not broken:
+                return
+            print("Worker process died, restarting worker pool")
+            metrics.increment('worker_restarts_total')
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.executor = self._create_executor()
+    
+    def stats(self):
+        """Worker count and tasks running or queued, in total and by stage"""
+        with self._lock:
+            pending = self._pending
+            pending_stages = {stage: count for stage, count in self._pending_stages.items() if count}
+        return {
+            'workers': self.num_workers,
+            'warmed_workers': self._warmed_workers.value,
+            'pending': pending,
+            'pending_stages': pending_stages,
+            'capacity': self.num_workers + self.queue_size
+        }
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
\ No newline at end of file
@@ -0,0 +1,19 @@
+import json
+import os
+from datetime import datetime
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), 'fixtures', 'articles.jsonl')
+
+
+def load_articles(path=FIXTURE_PATH):
+    """Load fixture articles in the same shape NewsFetcher returns"""
+    articles = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            article = json.loads(line)
+            if article.get('publish_date'):
+                article['publish_date'] = datetime.fromisoformat(article['publish_date'])
+            articles.append(article)
+    return articles
\ No newline at end of file
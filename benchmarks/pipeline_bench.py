@@ -0,0 +1,210 @@
+"""Benchmark the full /analyze pipeline offline on the fixture corpus.
+
+    python -m benchmarks.pipeline_bench --iterations 5 --output data/bench.json
+    python -m benchmarks.pipeline_bench --summarization-model sshleifer/distilbart-xsum-1-1 \\
+        --sentiment-model ./models/tiny-sentiment
+
+Articles come from a stubbed NewsFetcher, caches and the article store are
+off, and every stage runs in this process. Reports model load times,
+per-stage latency percentiles, end-to-end throughput and peak RSS as JSON.
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from functools import wraps
+from app.models.registry import registry, inference_profile, summarization_model_name, configure_threads
+from app.models.summarizer import TextSummarizer
+from app.models.sentiment import SentimentAnalyzer
+from app.models.analyzer import NewsAnalyzer
+from app.pipeline import AnalysisPipeline
+from app.utils.visualizer import DataVisualizer
+from benchmarks.corpus import load_articles, FIXTURE_PATH
+from config import Config
+
+# (component, method) -> stage name reported
+TIMED_METHODS = [
+    ('news_fetcher', 'fetch_from_news_api', 'fetch'),
+    ('pipeline', 'deduplicate', 'dedup'),
+    ('summarizer', 'summarize_batch', 'summarize'),
+    ('sentiment_analyzer', 'analyze_sentiment_batch', 'sentiment'),
+    ('news_analyzer', 'analyze_documents', 'spacy'),
+    ('news_analyzer', 'rank_key_phrases', 'key_phrases'),
+    ('news_analyzer', 'analyze_news', 'analyze_news'),
+    ('news_analyzer', 'compare_sources', 'compare_sources'),
+    ('visualizer', 'create_sentiment_chart', 'charts'),
+    ('visualizer', 'create_entity_chart', 'charts'),
+    ('visualizer', 'create_source_comparison_chart', 'charts'),
+    ('visualizer', 'create_wordcloud', 'wordcloud')
+]
+
+
+class StubFetcher:
+    """Serves the fixture corpus in place of NewsFetcher"""
+    
+    def __init__(self, articles):
+        self.articles = articles
+    
+    def fetch_from_news_api(self, query, language='en', sort_by='publishedAt', page_size=10, concurrent=True):
+        # Every run analyzes the whole corpus, whatever page size the pipeline asks for
+        return copy.deepcopy(self.articles)
+    
+    def fetch_from_url(self, url):
+        return next((copy.deepcopy(article) for article in self.articles if article['url'] == url), None)
+
+
+class StageTimer:
+    """Collects wall-clock durations of wrapped methods by stage"""
+    
+    def __init__(self):
+        self.samples = {}
+        self._current = None
+    
+    def wrap(self, obj, method, stage):
+        original = getattr(obj, method)
+        
+        @wraps(original)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self._current[stage] = self._current.get(stage, 0.0) + time.perf_counter() - start
+        
+        setattr(obj, method, timed)
+    
+    def start_run(self):
+        self._current = {}
+    
+    def end_run(self):
+        for stage, seconds in self._current.items():
+            self.samples.setdefault(stage, []).append(seconds)
+
+
+def percentile(values, q):
+    """Linear-interpolated percentile of a list"""
+    values = sorted(values)
+    if not values:
+        return None
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def latency_summary(samples):
+    """Milliseconds at the usual percentiles"""
+    return {
+        'count': len(samples),
+        'mean_ms': round(1000 * sum(samples) / len(samples), 2),
+        'p50_ms': round(1000 * percentile(samples, 50), 2),
+        'p90_ms': round(1000 * percentile(samples, 90), 2),
+        'p99_ms': round(1000 * percentile(samples, 99), 2),
+        'max_ms': round(1000 * max(samples), 2)
+    }
+
+
+def peak_rss_megabytes():
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / 1024 / (1024 if sys.platform == 'darwin' else 1), 1)
+
+
+def build_pipeline(articles):
+    components = {
+        'summarizer': TextSummarizer(),
+        'sentiment_analyzer': SentimentAnalyzer(),
+        'news_analyzer': NewsAnalyzer(),
+        'news_fetcher': StubFetcher(articles),
+        'visualizer': DataVisualizer()
+    }
+    components['pipeline'] = AnalysisPipeline(**components)
+    return components
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', default=FIXTURE_PATH)
+    parser.add_argument('--iterations', type=int, default=5, help='timed runs after one warm-up run')
+    parser.add_argument('--profile', default=Config.INFERENCE_PROFILE)
+    parser.add_argument('--summarization-model', help='checkpoint or local path, e.g. a tiny model for smoke runs')
+    parser.add_argument('--sentiment-model', help='checkpoint or local path')
+    parser.add_argument('--output', help='write the results as JSON')
+    args = parser.parse_args(argv)
+    
+    # Measure the stages themselves: no caches, batching, worker processes or persistence
+    Config.CACHE_ENABLED = False
+    Config.MICROBATCH_ENABLED = False
+    Config.WORKER_PROCESSES = 0
+    Config.INFERENCE_PROFILE = args.profile
+    Config.KEYPHRASE_DF_PATH = os.path.join(tempfile.mkdtemp(prefix='news-nexus-bench-'), 'keyphrases.sqlite3')
+    if args.summarization_model:
+        Config.SUMMARIZATION_MODEL = Config.DISTILLED_SUMMARIZATION_MODEL = args.summarization_model
+    if args.sentiment_model:
+        Config.SENTIMENT_MODEL = args.sentiment_model
+    configure_threads()
+    
+    registry.warm_up(background=False)
+    models = registry.status()
+    
+    articles = load_articles(args.corpus)
+    components = build_pipeline(articles)
+    pipeline = components['pipeline']
+    timer = StageTimer()
+    for component, method, stage in TIMED_METHODS:
+        timer.wrap(components[component], method, stage)
+    
+    def run():
+        timer.start_run()
+        start = time.perf_counter()
+        news_articles = pipeline.fetch('benchmark')
+        pipeline.analyze(news_articles)
+        elapsed = time.perf_counter() - start
+        return len(news_articles), elapsed
+    
+    run()  # warm-up: first-call allocations and lazy initialization
+    
+    totals = []
+    article_count = 0
+    for _ in range(args.iterations):
+        count, elapsed = run()
+        timer.end_run()
+        totals.append(elapsed)
+        article_count += count
+    
+    results = {
+        'corpus': args.corpus,
+        'iterations': args.iterations,
+        'articles_per_run': len(articles),
+        'profile': inference_profile(),
+        'summarization_model': summarization_model_name(),
+        'sentiment_model': Config.SENTIMENT_MODEL,
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'torch_intra_op_threads': Config.TORCH_INTRA_OP_THREADS,
+            'torch_inter_op_threads': Config.TORCH_INTER_OP_THREADS
+        },
+        'model_load_seconds': {name: status['load_seconds'] for name, status in models.items()},
+        'model_errors': {name: status['error'] for name, status in models.items() if status['error']},
+        'end_to_end': latency_summary(totals),
+        'throughput_articles_per_second': round(article_count / sum(totals), 2),
+        'stages': {stage: latency_summary(samples) for stage, samples in timer.samples.items()},
+        'peak_rss_mb': peak_rss_megabytes()
+    }
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
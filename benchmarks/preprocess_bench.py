@@ -0,0 +1,57 @@
+"""Compare the fast preprocessing path against the NLTK reference on the fixture corpus.
+
+    python -m benchmarks.preprocess_bench --repeat 50
+
+Checks that preprocess_batch() produces exactly the reference output of
+preprocess(fast=False) for every article, and reports the time of both.
+Exits non-zero on any mismatch.
+"""
+import argparse
+import json
+import sys
+import time
+from app.utils.preprocessor import TextPreprocessor
+from benchmarks.corpus import load_articles, FIXTURE_PATH
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', default=FIXTURE_PATH)
+    parser.add_argument('--repeat', type=int, default=20, help='passes over the corpus per timing')
+    args = parser.parse_args(argv)
+    
+    texts = [article['text'] for article in load_articles(args.corpus)]
+    preprocessor = TextPreprocessor()
+    preprocessor.stop_words  # load NLTK data outside the timings
+    preprocessor._lemmatize_word = preprocessor._lemmatize_uncached  # the reference path has no lemma memo
+    
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        reference = [preprocessor.preprocess(text, fast=False) for text in texts]
+    reference_seconds = time.perf_counter() - start
+    
+    # A fresh instance, so the fast path starts with an empty lemma memo
+    preprocessor = TextPreprocessor()
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        fast = preprocessor.preprocess_batch(texts)
+    fast_seconds = time.perf_counter() - start
+    
+    mismatches = [i for i, (a, b) in enumerate(zip(reference, fast)) if a != b]
+    print(json.dumps({
+        'corpus': args.corpus,
+        'documents': len(texts) * args.repeat,
+        'reference_ms_per_document': round(1000 * reference_seconds / (len(texts) * args.repeat), 3),
+        'fast_ms_per_document': round(1000 * fast_seconds / (len(texts) * args.repeat), 3),
+        'speedup': round(reference_seconds / max(fast_seconds, 1e-9), 2),
+        'mismatches': mismatches
+    }, indent=2))
+    
+    if mismatches:
+        print("Fast preprocessing output differs from the reference")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,134 @@
+"""Compare a CPU inference profile against the fp32 baseline on the fixture corpus.
+
+    python -m benchmarks.quality_check --profile cpu --output data/quality_cpu.json
+
+Reports summary overlap (ROUGE-L F1 against the fp32 summaries), sentiment
+label agreement, latency and serialized model size for both profiles. Exits
+non-zero when drift exceeds the given thresholds.
+"""
+import argparse
+import io
+import json
+import sys
+import time
+import torch
+from app.models.registry import inference_profile, load_summarization, load_sentiment, configure_threads
+from app.models.summarizer import TextSummarizer
+from app.models.sentiment import SentimentAnalyzer
+from benchmarks.corpus import load_articles, FIXTURE_PATH
+from config import Config
+
+
+def rouge_l(reference, candidate):
+    """ROUGE-L F1 over lowercase whitespace tokens"""
+    ref = reference.lower().split()
+    cand = candidate.lower().split()
+    if not ref or not cand:
+        return 0.0
+    
+    # Longest common subsequence, one row at a time
+    previous = [0] * (len(cand) + 1)
+    for ref_token in ref:
+        current = [0]
+        for j, cand_token in enumerate(cand):
+            current.append(previous[j] + 1 if ref_token == cand_token else max(previous[j + 1], current[j]))
+        previous = current
+    
+    lcs = previous[-1]
+    if lcs == 0:
+        return 0.0
+    precision = lcs / len(cand)
+    recall = lcs / len(ref)
+    return 2 * precision * recall / (precision + recall)
+
+
+def model_megabytes(model):
+    """Size of the serialized weights, which reflects int8 packing"""
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return round(buffer.tell() / 1024 / 1024, 1)
+
+
+def run_profile(name, texts):
+    """Load both models under a profile and time summarization and sentiment"""
+    profile = inference_profile(name)
+    
+    start = time.perf_counter()
+    summarizer = TextSummarizer(models=load_summarization(profile))
+    sentiment_analyzer = SentimentAnalyzer(models=load_sentiment(profile))
+    load_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    summaries = summarizer.summarize_batch(texts)
+    summarize_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    sentiments = sentiment_analyzer.analyze_sentiment_batch(texts)
+    sentiment_seconds = time.perf_counter() - start
+    
+    return {
+        'profile': profile,
+        'load_seconds': round(load_seconds, 2),
+        'summarize_seconds_per_article': round(summarize_seconds / len(texts), 3),
+        'sentiment_seconds_per_article': round(sentiment_seconds / len(texts), 3),
+        'summarization_model_mb': model_megabytes(summarizer.model),
+        'sentiment_model_mb': model_megabytes(sentiment_analyzer.model),
+        'summaries': summaries,
+        'sentiments': sentiments
+    }
+
+
+def compare(baseline, candidate):
+    """Drift of the candidate profile relative to the baseline"""
+    overlaps = [rouge_l(a, b) for a, b in zip(baseline['summaries'], candidate['summaries'])]
+    agreement = [a['label'] == b['label'] for a, b in zip(baseline['sentiments'], candidate['sentiments'])]
+    score_diffs = [abs(a['score'] - b['score']) for a, b in zip(baseline['sentiments'], candidate['sentiments'])]
+    
+    return {
+        'summary_rouge_l_mean': round(sum(overlaps) / len(overlaps), 3),
+        'summary_rouge_l_min': round(min(overlaps), 3),
+        'sentiment_label_agreement': round(sum(agreement) / len(agreement), 3),
+        'sentiment_score_diff_mean': round(sum(score_diffs) / len(score_diffs), 3),
+        'summarize_speedup': round(baseline['summarize_seconds_per_article'] / max(candidate['summarize_seconds_per_article'], 1e-9), 2),
+        'sentiment_speedup': round(baseline['sentiment_seconds_per_article'] / max(candidate['sentiment_seconds_per_article'], 1e-9), 2)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profile', default=Config.INFERENCE_PROFILE, help='profile to check against the fp32 baseline')
+    parser.add_argument('--corpus', default=FIXTURE_PATH)
+    parser.add_argument('--output', help='write the full report as JSON')
+    parser.add_argument('--min-rouge', type=float, default=0.5, help='fail below this mean ROUGE-L')
+    parser.add_argument('--min-agreement', type=float, default=0.85, help='fail below this sentiment label agreement')
+    args = parser.parse_args(argv)
+    
+    # Measure the models, not the result cache
+    Config.CACHE_ENABLED = False
+    configure_threads()
+    
+    texts = [article['text'] for article in load_articles(args.corpus)]
+    baseline = run_profile('default', texts)
+    candidate = run_profile(args.profile, texts)
+    drift = compare(baseline, candidate)
+    
+    report = {'corpus': args.corpus, 'articles': len(texts), 'baseline': baseline, 'candidate': candidate, 'drift': drift}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    
+    print(json.dumps({
+        'profile': args.profile,
+        'drift': drift,
+        'baseline_mb': baseline['summarization_model_mb'] + baseline['sentiment_model_mb'],
+        'candidate_mb': candidate['summarization_model_mb'] + candidate['sentiment_model_mb']
+    }, indent=2))
+    
+    if drift['summary_rouge_l_mean'] < args.min_rouge or drift['sentiment_label_agreement'] < args.min_agreement:
+        print("Quality drift exceeds thresholds")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
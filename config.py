@@ -9,10 +9,68 @@ load_dotenv()
 class Config:
     # Model settings
     SUMMARIZATION_MODEL = "facebook/bart-large-cnn"
+    DISTILLED_SUMMARIZATION_MODEL = "sshleifer/distilbart-cnn-12-6"
     SENTIMENT_MODEL = "cardiffnlp/twitter-roberta-base-sentiment-latest"
     
+    # CPU inference profiles: int8 dynamic quantization of linear layers and/or the distilled summarizer
+    INFERENCE_PROFILES = {
+        'default': {'quantize': False, 'distilled': False},
+        'cpu': {'quantize': True, 'distilled': False},
+        'cpu_distilled': {'quantize': True, 'distilled': True}
+    }
+    INFERENCE_PROFILE = os.getenv("INFERENCE_PROFILE", "default")
+    TORCH_INTRA_OP_THREADS = int(os.getenv("TORCH_INTRA_OP_THREADS", 0))  # 0 keeps torch's default
+    TORCH_INTER_OP_THREADS = int(os.getenv("TORCH_INTER_OP_THREADS", 0))
+    
     # News API settings
     NEWS_API_KEY = os.getenv("NEWS_API_KEY", "your_news_api_key_here")
+    NEWS_API_MIN_INTERVAL = float(os.getenv("NEWS_API_MIN_INTERVAL", 1.0))  # seconds between API calls
+    
+    # Fetch settings
+    FETCH_MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", 8))
+    FETCH_PER_HOST_LIMIT = int(os.getenv("FETCH_PER_HOST_LIMIT", 2))
+    FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", 10))
+    FETCH_DEADLINE = float(os.getenv("FETCH_DEADLINE", 20))  # overall budget for a batch of URLs
+    FETCH_CACHE_FRESHNESS = int(os.getenv("FETCH_CACHE_FRESHNESS", 15 * 60))  # serve cached articles without revalidating
+    FETCH_CACHE_MAX_AGE = int(os.getenv("FETCH_CACHE_MAX_AGE", 24 * 3600))  # keep revalidating cached articles up to this age
+    FETCH_NEGATIVE_TTL = int(os.getenv("FETCH_NEGATIVE_TTL", 10 * 60))  # remember failed URLs this long
+    NEWS_API_CACHE_TTL = int(os.getenv("NEWS_API_CACHE_TTL", 5 * 60))
+    FETCH_COMPACT_ARTICLES = os.getenv("FETCH_COMPACT_ARTICLES", "True").lower() == "true"  # slots records without newspaper's nlp() fields
+    FETCH_MAX_ARTICLES = int(os.getenv("FETCH_MAX_ARTICLES", 500))  # upper bound for max_articles in /analyze
+    FETCH_SYNC_MAX_ARTICLES = int(os.getenv("FETCH_SYNC_MAX_ARTICLES", 50))  # larger max_articles in /analyze run as a job
+    FETCH_SYNC_DEADLINE = float(os.getenv("FETCH_SYNC_DEADLINE", 60))  # paged fetch budget while a request waits
+    
+    # Worker pool settings (0 processes runs every stage on the request thread)
+    WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", 0))
+    WORKER_QUEUE_SIZE = int(os.getenv("WORKER_QUEUE_SIZE", 8))  # tasks waiting beyond the running ones
+    WORKER_TASK_TIMEOUT = float(os.getenv("WORKER_TASK_TIMEOUT", 120))
+    WORKER_STAGES = ['summarize', 'summarize_greedy', 'analyze_documents', 'wordcloud']
+    
+    # Cross-request micro-batching of summarization and sentiment calls
+    MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "True").lower() == "true"
+    MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", 16))
+    MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", 5))
+    MICROBATCH_QUEUE_SIZE = int(os.getenv("MICROBATCH_QUEUE_SIZE", 256))
+    MICROBATCH_TIMEOUT = float(os.getenv("MICROBATCH_TIMEOUT", 120))
+    MICROBATCH_STAGES = ['summarize', 'summarize_greedy', 'sentiment']
+    
+    # Async job settings
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+    JOB_MAX_JOBS = int(os.getenv("JOB_MAX_JOBS", 100))
+    JOB_TTL = int(os.getenv("JOB_TTL", 10 * 60))  # seconds a finished job stays available
+    JOB_CHUNK_SIZE = int(os.getenv("JOB_CHUNK_SIZE", 2))  # articles per streamed batch
+    
+    # Watched queries refreshed in the background and answered from the latest analysis
+    WATCHLIST = [query.strip() for query in os.getenv("WATCHLIST", "").split(",") if query.strip()]
+    WATCHLIST_INTERVAL = float(os.getenv("WATCHLIST_INTERVAL", 15 * 60))  # seconds between refreshes of a query
+    WATCHLIST_JITTER = float(os.getenv("WATCHLIST_JITTER", 0.2))  # +/- fraction of the interval
+    WATCHLIST_DAILY_REQUESTS = int(os.getenv("WATCHLIST_DAILY_REQUESTS", 50))  # News API calls the scheduler may spend per day
+    WATCHLIST_MAX_AGE = float(os.getenv("WATCHLIST_MAX_AGE", 0))  # serve a precomputed analysis up to this age; 0 derives it from the interval
+    WATCHLIST_LEASE_TTL = float(os.getenv("WATCHLIST_LEASE_TTL", 10 * 60))  # longest a process may hold a query's refresh lock
+    WATCHLIST_WORKERS = int(os.getenv("WATCHLIST_WORKERS", 2))
+    
+    # Model loading: 'background' warms models up after startup, 'eager' blocks until loaded, 'lazy' loads on first use
+    MODEL_WARMUP = os.getenv("MODEL_WARMUP", "background")
     
     # Application settings
     DEBUG = os.getenv("DEBUG", False)
@@ -21,8 +79,68 @@ class Config:
     # File paths
     DATA_PATH = os.path.join(os.path.dirname(__file__), 'data')
     MODELS_PATH = os.path.join(os.path.dirname(__file__), 'models')
+    WORKER_LOCK_PATH = os.path.join(DATA_PATH, 'worker_pool.lock')  # held by the one server process with a worker pool
+    WORKER_LOCK_TIMEOUT = float(os.getenv("WORKER_LOCK_TIMEOUT", 60))  # wait this long for the previous pool owner to exit
+    
+    # Result cache settings
+    CACHE_ENABLED = os.getenv("CACHE_ENABLED", "True").lower() == "true"
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 2048))
+    CACHE_TTL = int(os.getenv("CACHE_TTL", 7 * 24 * 3600))  # seconds
+    CACHE_DISK_ENABLED = os.getenv("CACHE_DISK_ENABLED", "True").lower() == "true"
+    CACHE_DB_PATH = os.path.join(DATA_PATH, 'cache.sqlite3')
+    
+    # Persistent article store and trend index
+    ARTICLE_STORE_ENABLED = os.getenv("ARTICLE_STORE_ENABLED", "True").lower() == "true"
+    ARTICLE_STORE_PATH = os.path.join(DATA_PATH, 'articles.sqlite3')
+    ARTICLE_STORE_BUCKET_SECONDS = 3600  # granularity of time-bucketed term counts
+    
+    # Near-duplicate detection
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "True").lower() == "true"
+    DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.7))  # estimated Jaccard similarity of word shingles
+    DEDUP_NUM_PERM = 128
+    DEDUP_BANDS = 32  # LSH bands of DEDUP_NUM_PERM / DEDUP_BANDS rows each
+    DEDUP_SHINGLE_SIZE = 5  # words per shingle
+    
+    # Visualizations
+    VISUALIZATION_MODE = os.getenv("VISUALIZATION_MODE", "full")  # full: Plotly figures and an inline PNG; compact: chart data and an image URL
+    WORDCLOUD_WIDTH = 800
+    WORDCLOUD_HEIGHT = 400
+    WORDCLOUD_MAX_WORDS = 100
+    WORDCLOUD_CACHE_ENTRIES = 64  # rendered PNGs kept in memory
+    
+    # Metrics
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() == "true"  # /metrics endpoint and request timing
+    METRICS_TIMING_HEADERS = os.getenv("METRICS_TIMING_HEADERS", "False").lower() == "true"  # Server-Timing header per response
+    
+    # Key phrase extraction
+    KEYPHRASE_NGRAM_RANGE = (1, 3)
+    KEYPHRASE_MIN_PHRASE_COUNT = 2  # multi-word phrases must occur at least this often in the request
+    KEYPHRASE_DF_PATH = os.path.join(DATA_PATH, 'keyphrases.sqlite3')
+    KEYPHRASE_DF_PRUNE_EVERY = int(os.getenv("KEYPHRASE_DF_PRUNE_EVERY", 1000))  # documents between prunes of rare phrases
+    KEYPHRASE_DF_MIN_COUNT = int(os.getenv("KEYPHRASE_DF_MIN_COUNT", 2))  # phrases in fewer documents are dropped when pruning
     
     # NLP settings
     MAX_SUMMARY_LENGTH = 150
     MIN_SUMMARY_LENGTH = 30
-    NUM_BEAMS = 4
\ No newline at end of file
+    NUM_BEAMS = 4
+    SUMMARY_TIER = os.getenv("SUMMARY_TIER", "auto")  # auto, extractive, greedy or beam
+    SUMMARY_GREEDY_QUEUE_DEPTH = int(os.getenv("SUMMARY_GREEDY_QUEUE_DEPTH", 8))  # auto: greedy decoding at this load
+    SUMMARY_EXTRACTIVE_QUEUE_DEPTH = int(os.getenv("SUMMARY_EXTRACTIVE_QUEUE_DEPTH", 32))  # auto: extractive only at this load
+    SUMMARY_BEAM_MAX_WORDS = 2000  # auto: longer texts use greedy decoding
+    EXTRACTIVE_SENTENCES = 3
+    SUMMARY_BATCH_SIZE = int(os.getenv("SUMMARY_BATCH_SIZE", 8))
+    SUMMARY_MAX_INPUT_TOKENS = 1024
+    SUMMARY_LONG_DOCUMENTS = os.getenv("SUMMARY_LONG_DOCUMENTS", "True").lower() == "true"  # map-reduce over inputs past the token limit
+    SUMMARY_CHUNK_MAX_LENGTH = 120  # summary length per chunk in the map step
+    SUMMARY_CHUNK_MIN_LENGTH = 20
+    SUMMARY_MAX_CHUNKS = 16  # bounds the cost of very long documents
+    SUMMARY_MAX_REDUCE_DEPTH = 2
+    SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", 16))
+    SENTIMENT_MAX_TOKENS = 512
+    SENTIMENT_WINDOWED = os.getenv("SENTIMENT_WINDOWED", "False").lower() == "true"  # score the whole article in overlapping windows
+    SENTIMENT_WINDOW_STRIDE = 128  # tokens shared between consecutive windows
+    PREPROCESS_FAST = os.getenv("PREPROCESS_FAST", "True").lower() == "true"  # regex tokenizer instead of NLTK's word_tokenize
+    LEMMA_CACHE_SIZE = 50000  # memoized lemmas per process
+    SPACY_MODEL = "en_core_web_sm"
+    SPACY_BATCH_SIZE = int(os.getenv("SPACY_BATCH_SIZE", 16))
+    SPACY_DISABLE = ['parser', 'tagger', 'attribute_ruler', 'lemmatizer']  # only tokens and entities are needed
\ No newline at end of file
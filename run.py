@@ -1,6 +1,10 @@
+from werkzeug.serving import is_running_from_reloader
 from app.main import create_app
+from config import Config
 
-app = create_app()
+# Under the debug reloader this process only watches files and restarts the child that serves requests
+reloader_parent = __name__ == '__main__' and bool(Config.DEBUG) and not is_running_from_reloader()
+app = create_app(background=not reloader_parent)
 
 if __name__ == '__main__':
     app.run(debug=app.config['DEBUG'], host='0.0.0.0', port=5000)
\ No newline at end of file